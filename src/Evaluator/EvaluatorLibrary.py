@@ -1,35 +1,82 @@
-from rouge import Rouge
-from pyrouge import Rouge155
-from .evaluator_source_files.Meteor.Meteor import Meteor
-from .evaluator_source_files.bleu import compute_bleu
-from .evaluator_source_files.nist import compute_nist
+from tools.registry import PluginRegistry
+from tools.defaults import (
+    DEFAULT_METEOR_WORKERS,
+    DEFAULT_METEOR_MEMORY,
+    DEFAULT_PYROUGE_ENGINE
+)
 
+EVALUATOR_ENTRY_POINT_GROUP = 'text_generation_benchmark.evaluators'
+'''
+    Third party metrics register a MetricAccumulator subclass
+    (Evaluator/accumulators.py) under this entry point group.
+'''
 
-def fetchEvaluators(enabledEvaluators):
+
+def _rouge():
+    from .evaluator_source_files.rouge_engine import RougeEngine
+    return RougeEngine()
+
+
+def _meteor(workers=DEFAULT_METEOR_WORKERS, memory=DEFAULT_METEOR_MEMORY,
+            daemon=False, socket=None):
+    # Starts the METEOR JVMs, so only done when METEOR is enabled
+    if daemon and socket:
+        from .evaluator_source_files.Meteor.daemon import connectMeteor
+        return connectMeteor(socket, workers, memory)
+
+    from .evaluator_source_files.Meteor.Meteor import Meteor
+    return Meteor(workers, memory)
+
+
+def _pyrouge(engine=DEFAULT_PYROUGE_ENGINE):
+    # The native engine needs neither pyrouge nor perl
+    if engine == 'native':
+        from .evaluator_source_files.rouge155 import NativeRouge155
+        return NativeRouge155
+
+    from pyrouge import Rouge155
+    return Rouge155
+
+
+EVALUATORS = PluginRegistry(EVALUATOR_ENTRY_POINT_GROUP)
+EVALUATORS.register('rouge', _rouge)
+EVALUATORS.register('pyrouge', _pyrouge)
+EVALUATORS.register('meteor', _meteor)
+EVALUATORS.registerModule(
+    'bleu', '.evaluator_source_files.bleu', 'compute_bleu', __package__)
+EVALUATORS.registerModule(
+    'nist', '.evaluator_source_files.nist', 'compute_nist', __package__)
+EVALUATORS.registerModule(
+    'cider', '.evaluator_source_files.cider', 'compute_cider', __package__)
+
+
+def supportedEvaluators():
+    '''
+        output: set of the keys of the built in and installed evaluators.
+    '''
+    return EVALUATORS.keys()
+
+
+def fetchEvaluators(enabledEvaluators, libraryOptions=None):
     '''
-        input: list of evaluator keys
+        input: list of evaluator keys and optionally dict(evaluatorKey:
+        keyword options of its library loader)
         output: dict(
                     evaluatorKey: evaluatorMethod
                                  (None if no method is specified))
         purpose: Onload of evaluator switch this function is called
         before hand to prevent cluttering the file with library
         imports. The output dictionary can be interfaced to
-        fetch the metric function desired.
+        fetch the metric function desired. Only the libraries of the
+        enabled evaluators are imported and constructed.
     '''
-
-    EVALUATORS = {
-        'rouge': Rouge(),
-        'pyrouge': Rouge155,
-        'meteor': Meteor(),
-        'bleu': compute_bleu,
-        'nist': compute_nist
-    }
-
+    libraryOptions = libraryOptions or {}
+    # Only lowercase keys in the evaluators list. As users may opt out of
+    # using this to assist to load in libraries for their metrics.
     desiredEvaluators = dict(
-        (k.lower(), EVALUATORS[k.lower()])
+        (k.lower(), EVALUATORS.fetch(k, **libraryOptions.get(k.lower(), {})))
         if k.lower() in EVALUATORS else (k, None)
         for k in enabledEvaluators
-    )# Only lowercase keys in the evaluators list. As users may opt out of
-     # using this to assist to load in libraries for their metrics.
+    )
 
     return desiredEvaluators
@@ -1,46 +1,184 @@
+import inspect
 import os
-import codecs
-
-from .EvaluatorLibrary import fetchEvaluators
+import threading
+
+from .EvaluatorLibrary import fetchEvaluators, EVALUATORS
+from . import accumulators as accumulatorsModule
+from .evaluator_source_files import ngrams as ngramsModule
+from .accumulators import (
+    NgramService,
+    RougeAccumulator,
+    PyRougeAccumulator,
+    NativeRougeAccumulator,
+    MeteorAccumulator,
+    BleuAccumulator,
+    NistAccumulator,
+    CiderAccumulator
+)
 
 from tqdm import tqdm
 
-from tools.utils import (
-    TemporaryDirectory
+from tools.defaults import (
+    DEFAULT_PYROUGE_ENGINE,
+    DEFAULT_RESOURCE_CLASS,
+    EVALUATOR_RESOURCE_CLASSES
 )
+from tools.gold import GoldArtifact
+from tools.scores import scoreStorePath
 
 from tools.logger import Logger
 LOGGER = Logger.getInstance()
 
 
 class EvaluatorSwitch(object):
-    def __init__(self, evaluators, tokenizer):
+    def __init__(self, evaluators, tokenizer, goldCacheFolder=None,
+                 evaluatorOptions=None, storeSampleScores=False,
+                 libraryOptions=None, compiledCorpora=False):
         self.tokenizer = tokenizer
-        self.evaluationLibrary = fetchEvaluators(evaluators)
+
+        # Per sample scores are written next to the summaries they score
+        self.storeSampleScores = storeSampleScores
+
+        # dict(evaluatorKey: dict of keyword arguments of its accumulator)
+        self.evaluatorOptions = evaluatorOptions or {}
+
+        # Prepared references of every gold file, shared by all summarizers
+        self.goldCacheFolder = goldCacheFolder
+        self.goldArtifacts = {}
+        self.goldArtifactsLock = threading.Lock()
+        # References are prepared from compiled gold files (tools/corpus.py)
+        self.compiledCorpora = compiledCorpora
+        # dict(evaluatorKey: keyword options of its library, e.g. the size
+        # of the METEOR pool)
+        libraryOptions = libraryOptions or {}
+        self.evaluationLibrary = fetchEvaluators(evaluators, libraryOptions)
+        # pyRouge is scored by ROUGE-1.5.5.pl or by NativeRouge155
+        self.pyRougeEngine = libraryOptions.get('pyrouge', {}).get(
+            'engine', DEFAULT_PYROUGE_ENGINE)
         self.functionMap = {
             'rouge': self._rougeScore,
             'pyrouge': self._pyRouge,
             'meteor': self._meteor,
             'bleu': self._bleu,
-            'nist': self._nist
+            'nist': self._nist,
+            'cider': self._cider
         }
         self.functionMap = dict(
             (k.lower(), v)
             for k, v in self.functionMap.items()
         )
 
-    def executeAndReportEvaluatorsOnCorpus(self, SRO):
+        # Evaluators that can be scored one sample at a time. All of them
+        # share a single read of the SRO.
+        self.accumulatorMap = {
+            'rouge': RougeAccumulator,
+            'pyrouge': NativeRougeAccumulator
+            if self.pyRougeEngine == 'native' else PyRougeAccumulator,
+            'meteor': MeteorAccumulator,
+            'bleu': BleuAccumulator,
+            'nist': NistAccumulator,
+            'cider': CiderAccumulator
+        }
+
+        # Metrics installed through entry points are MetricAccumulators
+        for k, evaluator in self.evaluationLibrary.items():
+            if k not in self.functionMap and not EVALUATORS.isBuiltIn(k) \
+                    and evaluator is not None:
+                self.accumulatorMap[k] = evaluator
+                self.functionMap[k] = self._pluginAccumulate(k)
+
+    def executeAndReportEvaluatorsOnCorpus(self, SRO, evaluatorKeys=None):
+        '''
+            input: SRO and optionally the subset of enabled evaluators to run
+            output: dict(evaluatorKey: report)
+            purpose: Reads and decodes every (hypothesis, references) pair of
+            the SRO once and hands it to the per sample hook of every
+            evaluator. Evaluators without an accumulator are run afterwards
+            on their own copy of the SRO.
+        '''
+        if evaluatorKeys is None:
+            evaluatorKeys = list(self.evaluationLibrary)
+
+        accumulators = self.createAccumulators(evaluatorKeys)
+
         evaluatorReportsForCorpus = {}
-        currSRO = SRO
-        for evaluator in self.evaluationLibrary:
-            result = self._toggleAndExecuteEvaluator(
-                evaluator, currSRO)
-            currSRO = currSRO.copy()
+        if accumulators:
+            LOGGER.info(
+                'Calculating %s Scores:',
+                ', '.join(k.upper() for k in accumulators))
 
-            evaluatorReportsForCorpus[evaluator] = result
+            self._feedAccumulators(accumulators, SRO)
+
+            for evaluator, accumulator in accumulators.items():
+                evaluatorReportsForCorpus[evaluator] = accumulator.report()
+            self.saveSampleScores(SRO.summaryFilePath, accumulators)
+
+        for evaluator in evaluatorKeys:
+            if evaluator in accumulators:
+                continue
+            evaluatorReportsForCorpus[evaluator] = \
+                self._toggleAndExecuteEvaluator(evaluator, SRO.copy())
 
         return evaluatorReportsForCorpus
 
+    def executeAndReportEvaluatorOnCorpus(self, evaluatorKey, SRO):
+        '''
+            Runs a single enabled evaluator on the SRO and returns its report.
+        '''
+        return self._toggleAndExecuteEvaluator(evaluatorKey, SRO)
+
+    def scoresSystemsJointly(self, evaluatorKey):
+        '''
+            output: True if the evaluator scores the summaries of several
+            summarizers together (e.g. pyRouge, in a single ROUGE-1.5.5 run)
+        '''
+        return hasattr(self.accumulatorMap.get(evaluatorKey), 'reportSystems')
+
+    def resourceClass(self, evaluatorKey):
+        '''
+            output: the scheduler resource class of the evaluator's jobs
+        '''
+        if evaluatorKey == 'pyrouge' and self.pyRougeEngine == 'native':
+            return DEFAULT_RESOURCE_CLASS  # No perl process
+        return EVALUATOR_RESOURCE_CLASSES.get(
+            evaluatorKey, DEFAULT_RESOURCE_CLASS)
+
+    def executeAndReportEvaluatorOnSystems(self, evaluatorKey, SROs):
+        '''
+            input: evaluator key and dict(summarizerKey: SRO) of the
+            summaries of several summarizers on one corpus
+            output: dict(summarizerKey: report)
+            purpose: Evaluators that scoresSystemsJointly feed one
+            accumulator per summarizer and report all of them at once.
+            Others are run on every SRO in turn.
+        '''
+        if not self.scoresSystemsJointly(evaluatorKey):
+            return dict(
+                (summarizerKey, self._toggleAndExecuteEvaluator(
+                    evaluatorKey, SRO))
+                for summarizerKey, SRO in SROs.items()
+            )
+
+        LOGGER.info(
+            'Calculating %s Scores of %s:', evaluatorKey.upper(),
+            ', '.join(sorted(SROs)))
+
+        summarizerKeys = sorted(SROs)
+        accumulators = []
+        for summarizerKey in summarizerKeys:
+            accumulator = self.createAccumulators([evaluatorKey])
+            self._feedAccumulators(accumulator, SROs[summarizerKey])
+            accumulators.append(accumulator[evaluatorKey])
+
+        reports = self.accumulatorMap[evaluatorKey].reportSystems(
+            accumulators)
+        for summarizerKey, accumulator in zip(summarizerKeys, accumulators):
+            self.saveSampleScores(
+                SROs[summarizerKey].summaryFilePath,
+                {evaluatorKey: accumulator})
+
+        return dict(zip(summarizerKeys, reports))
+
     def _toggleAndExecuteEvaluator(self, evaluatorKey, SRO):
         functions = self.functionMap
 
@@ -52,160 +190,182 @@ class EvaluatorSwitch(object):
         error = '{0}: Is not an available evaluator'.format(evaluatorKey)
         raise ValueError(error)
 
-    def _nist(self, SRO):
-        LOGGER.info('Calculating NIST Score:')
-        nist = self.evaluationLibrary['nist']
+    def createAccumulators(self, evaluatorKeys=None):
+        '''
+            output: dict(evaluatorKey: MetricAccumulator) for every enabled
+            evaluator (or every one of evaluatorKeys) that can be scored one
+            sample at a time.
+        '''
+        if evaluatorKeys is None:
+            evaluatorKeys = self.evaluationLibrary
+
+        return dict(
+            (evaluatorKey, self.accumulatorMap[evaluatorKey](
+                self.evaluationLibrary[evaluatorKey], self.tokenizer,
+                **self.evaluatorOptions.get(evaluatorKey, {})))
+            for evaluatorKey in evaluatorKeys
+            if evaluatorKey in self.accumulatorMap
+        )
+
+    def goldArtifact(self, goldFilePath):
+        '''
+            output: the GoldArtifact of the gold file, created once.
+        '''
+        with self.goldArtifactsLock:
+            if goldFilePath not in self.goldArtifacts:
+                self.goldArtifacts[goldFilePath] = GoldArtifact(
+                    goldFilePath, self.goldCacheFolder,
+                    compiled=self.compiledCorpora)
+            return self.goldArtifacts[goldFilePath]
+
+    def preparedReferences(self, goldFilePath, accumulators):
+        '''
+            output: dict(evaluatorKey: prepared references of every
+            document) for the accumulators.
+        '''
+        artifact = self.goldArtifact(goldFilePath)
+        return dict(
+            (evaluatorKey, artifact.prepared(accumulator))
+            for evaluatorKey, accumulator in accumulators.items()
+        )
 
+    def _feedAccumulators(self, accumulators, SRO):
+        '''
+            Adds every sample of the SRO to the accumulators, using the
+            prepared references of its gold file. Samples are read
+            tokenizer.batchSize at a time, and the hypothesis n-grams of the
+            accumulators that score them counted once for all of them
+            (NgramService).
+        '''
+        prepared = self.preparedReferences(SRO.goldFilePath, accumulators)
+        ngramService = NgramService.forAccumulators(
+            self.tokenizer, accumulators.values())
+
+        batch = []
         readerLength = len(SRO)
-        numSamples = 0
-        sumScores = 0.0
         for i in tqdm(range(readerLength)):
-            hypothesis, references = SRO.readOne()
-
-            nistScore = nist(hypothesis, references)
-
-            sumScores += nistScore
-            numSamples += 1
-
-        avg = (float(sumScores) / float(numSamples)) if readerLength \
-            else 0.0
+            sample = SRO.readHypothesis(i)
+            if sample is None:
+                continue
+            batch.append(sample)
+            if len(batch) >= self.tokenizer.batchSize:
+                self._feedBatch(accumulators, prepared, ngramService, batch)
+                batch = []
+        self._feedBatch(accumulators, prepared, ngramService, batch)
+
+    def _feedBatch(self, accumulators, prepared, ngramService, batch):
+        if not batch:
+            return
+
+        if ngramService is None:
+            batchNgrams = [{}] * len(batch)
+        else:
+            batchNgrams = ngramService.count(
+                [hypothesis for documentIndex, hypothesis in batch])
+
+        for (documentIndex, hypothesis), ngrams in zip(batch, batchNgrams):
+            for evaluatorKey, accumulator in accumulators.items():
+                references = prepared[evaluatorKey][documentIndex]
+                tokenization = getattr(accumulator, 'ngramTokenization', None)
+                if tokenization in ngrams:
+                    accumulator.addDocument(
+                        documentIndex, hypothesis, references,
+                        ngrams=ngrams[tokenization])
+                else:
+                    accumulator.addDocument(
+                        documentIndex, hypothesis, references)
+
+    def saveSampleScores(self, summaryFilePath, accumulators):
+        '''
+            Writes the per sample scores of every accumulator to the score
+            store of its evaluator next to the summaries file
+            (tools/scores.py). Must be called after report().
+        '''
+        if not self.storeSampleScores:
+            return
+
+        for evaluatorKey, accumulator in accumulators.items():
+            if not len(accumulator.samples):
+                continue
+            path = scoreStorePath(summaryFilePath, evaluatorKey)
+            try:
+                accumulator.samples.save(path)
+            except (IOError, OSError) as err:
+                LOGGER.warning(
+                    'Unable to write %s scores to %s: %s',
+                    evaluatorKey, path, err)
+
+    def evaluatorParameters(self, evaluatorKey):
+        '''
+            input: evaluator key
+            output: dict of the settings that affect the report of that
+            evaluator.
+        '''
+        parameters = dict(self.evaluatorOptions.get(evaluatorKey, {}))
+        if evaluatorKey in ('bleu', 'cider'):  # Tokenized with the tokenizer
+            parameters['tokenizer'] = \
+                self.tokenizer.targetTokenizer.lower()
+        if evaluatorKey == 'pyrouge':
+            parameters['engine'] = self.pyRougeEngine
+        return parameters
+
+    def evaluatorSourceFiles(self, evaluatorKey):
+        '''
+            input: evaluator key
+            output: list of the source files whose code produces the report
+            of that evaluator. Used to notice code changes.
+        '''
+        sourceFiles = [
+            os.path.abspath(__file__),
+            inspect.getsourcefile(accumulatorsModule),
+            inspect.getsourcefile(ngramsModule)
+        ]
+
+        evaluator = self.evaluationLibrary.get(evaluatorKey)
+        if evaluator is not None and not inspect.isclass(evaluator) and \
+                not inspect.isroutine(evaluator):
+            evaluator = type(evaluator)  # Library object, e.g. Rouge()
+        try:
+            sourceFiles.append(inspect.getsourcefile(evaluator))
+        except TypeError:
+            pass
+
+        return sourceFiles
+
+    def _accumulate(self, evaluatorKey, SRO):
+        accumulators = self.createAccumulators([evaluatorKey])
+        self._feedAccumulators(accumulators, SRO)
+
+        report = accumulators[evaluatorKey].report()
+        self.saveSampleScores(SRO.summaryFilePath, accumulators)
+        return report
+
+    def _pluginAccumulate(self, evaluatorKey):
+        def pluginFunc(SRO):
+            LOGGER.info('Calculating %s Score:', evaluatorKey.upper())
+            return self._accumulate(evaluatorKey, SRO)
+        return pluginFunc
+
+    def _cider(self, SRO):
+        LOGGER.info('Calculating CIDEr Score:')
+        return self._accumulate('cider', SRO)
 
-        return avg
+    def _nist(self, SRO):
+        LOGGER.info('Calculating NIST Score:')
+        return self._accumulate('nist', SRO)
 
     def _bleu(self, SRO):
-        tokenizer = self.tokenizer
         LOGGER.info('Calculating BLEU Score:')
-        bleu = self.evaluationLibrary['bleu']
-
-        readerLength = len(SRO)
-        numSamples = 0
-        sumScores = 0.0
-        for i in tqdm(range(readerLength)):
-            hypothesis, references = SRO.readOne()
-
-            hypothesisTokens = tokenizer.word_tokenize(hypothesis)
-
-            referenceTokensLists = [
-                tokenizer.word_tokenize(sentence)
-                for reference in references
-                for sentence in tokenizer.sent_tokenize(reference)
-            ]
-
-            scores = bleu(hypothesisTokens, referenceTokensLists)
-            bleuScore = scores[0]
-
-            sumScores += bleuScore
-            numSamples += 1
-
-        avg = (float(sumScores) * 100 / float(numSamples)) if readerLength \
-            else 0.0
-
-        return avg
+        return self._accumulate('bleu', SRO)
 
     def _meteor(self, SRO):
         LOGGER.info('Calculating METEOR Score:')
-
-        meteor = self.evaluationLibrary['meteor']
-
-        readerLength = len(SRO)
-        numSamples = 0
-        sumScores = 0.0
-        for i in tqdm(range(readerLength)):
-            hypothesis, references = SRO.readOne()
-            score = meteor.score(hypothesis, references)
-
-            sumScores += score
-            numSamples += 1
-
-        avg = (float(sumScores) * 100 / float(numSamples)) if readerLength \
-            else 0.0
-
-        return avg
+        return self._accumulate('meteor', SRO)
 
     def _rougeScore(self, SRO):
         LOGGER.info('Calculating Rouge Score:')
-
-        rouge = self.evaluationLibrary['rouge']
-
-        sumRouge1 = {'r': 0.0, 'p': 0.0, 'f': 0.0}
-        sumRouge2 = {'r': 0.0, 'p': 0.0, 'f': 0.0}
-        sumRougel = {'r': 0.0, 'p': 0.0, 'f': 0.0}
-
-        readerLength = len(SRO)
-        numSamples = 0
-        for i in tqdm(range(readerLength)):
-            hypothesis, references = SRO.readOne()
-            for reference in references:
-                score = rouge.get_scores(hypothesis, reference)[0]
-                sumRouge1 = {k: sumRouge1[k] + score['rouge-1'][k]
-                             for k in sumRouge1}
-                sumRouge2 = {k: sumRouge2[k] + score['rouge-2'][k]
-                             for k in sumRouge2}
-                sumRougel = {k: sumRougel[k] + score['rouge-l'][k]
-                             for k in sumRougel}
-
-                numSamples += 1
-
-        avg = {
-            'rouge-1': {k: float(sumRouge1[k]) * 100 / float(numSamples)
-                        for k in sumRouge1 if numSamples > 0},
-            'rouge-2': {k: float(sumRouge2[k]) * 100 / float(numSamples)
-                        for k in sumRouge2 if numSamples > 0},
-            'rouge-l': {k: float(sumRougel[k]) * 100 / float(numSamples)
-                        for k in sumRougel if numSamples > 0}
-        }
-
-        return avg
+        return self._accumulate('rouge', SRO)
 
     def _pyRouge(self, SRO):
         LOGGER.info('Calculating pyRouge score:')
-        Rouge155 = self.evaluationLibrary['pyrouge']
-        output = ''
-
-        readerLength = len(SRO)
-        failures = SRO.failedIndicies
-        if len(failures) == readerLength:
-            # No summaries were successful
-            return [
-                'The pyRouge score could not be calculated. No'
-                ' summaries were succesfully generated.',
-            ]
-
-        with TemporaryDirectory() as temp_dir:
-            system_dir = os.path.join(temp_dir, 'system')
-            model_dir = os.path.join(temp_dir, 'model')
-            os.makedirs(system_dir)
-            os.makedirs(model_dir)
-
-            for i in tqdm(range(readerLength)):
-                hypothesis, references = SRO.readOne()
-
-                hypothesis_fn = '%i.txt' % i
-                for j, reference in enumerate(references):
-                    ref_fn = '%i.%i.txt' % (i, j)
-                    with codecs.open(os.path.join(
-                        model_dir, ref_fn), 'w', 'utf-8'
-                    ) as f:
-                        f.write(reference)
-
-                    with codecs.open(os.path.join(
-                        system_dir, hypothesis_fn), 'w', 'utf-8'
-                    ) as f:
-                        f.write(hypothesis)
-
-            rouge = Rouge155()
-
-            rouge.system_dir = system_dir
-            rouge.model_dir = model_dir
-            rouge.system_filename_pattern = '(\d+).txt'
-            rouge.model_filename_pattern = '#ID#.\d+.txt'
-
-            output = rouge.convert_and_evaluate()
-            output_dict = rouge.output_to_dict(output)
-
-            output_dict = {
-                k: (float(v) * 100)
-                for (k, v) in output_dict.items()
-            }
-
-        return output_dict
+        return self._accumulate('pyrouge', SRO)
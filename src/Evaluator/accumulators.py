@@ -0,0 +1,1202 @@
+import io
+import os
+import atexit
+import shutil
+import tempfile
+import multiprocessing
+
+from collections import deque
+
+import numpy as np
+
+from .evaluator_source_files.ngrams import count_ngrams_many
+from .evaluator_source_files.rouge_engine import ROUGE_ORDER, split_words
+from .evaluator_source_files.bleu import (
+    get_reference_ngrams,
+    get_bleu_statistics,
+    bleu_from_statistics
+)
+from .evaluator_source_files.nist import (
+    NIST_ORDER,
+    tokenize as tokenize_nist,
+    tokenize_references as tokenize_nist_references,
+    prepare_all_references as prepare_all_nist_references,
+    nist_statistics,
+    nist_scores,
+    nist_from_statistics
+)
+from .evaluator_source_files.cider import (
+    CIDER_ORDER,
+    prepare_all_references as prepare_all_cider_references,
+    cider_scores
+)
+from .evaluator_source_files.pyrouge_runner import (
+    write_see_file,
+    write_models,
+    evaluate_systems
+)
+from .evaluator_source_files.rouge155 import (
+    see_sentences,
+    init_worker,
+    score_in_worker
+)
+from tools.scores import SampleScores
+from tools.defaults import (
+    DEFAULT_ROUGE_MULTI_REFERENCE,
+    DEFAULT_ROUGE_BATCH_SIZE,
+    DEFAULT_METEOR_BATCH_SIZE,
+    DEFAULT_METEOR_BULK,
+    DEFAULT_METEOR_BULK_MIN_SAMPLES,
+    DEFAULT_NIST_BATCH_SIZE,
+    DEFAULT_CIDER_VARIANT,
+    DEFAULT_PYROUGE_WORKERS,
+    DEFAULT_PYROUGE_CHUNK_SIZE,
+    DEFAULT_PYROUGE_OPTIONS,
+    DEFAULT_METRIC_LEVEL,
+    METRIC_LEVELS
+)
+
+
+class NgramService(object):
+    '''
+        Tokenizes hypotheses once per tokenization and counts their n-grams
+        (evaluator_source_files/ngrams.py) up to the highest order any
+        metric asked for, so every metric of a tokenization shares them.
+        orders is dict(tokenization: highest order), of the tokenizations
+            tokens: the benchmark tokenizer (BLEU)
+            lowercase: the same tokens lowercased (CIDEr)
+            nist: nltk's NISTTokenizer (NIST)
+            rouge: the words of the rouge package (ROUGE)
+        The NgramCounts keep their tokens.
+    '''
+    TOKENIZATIONS = set(['tokens', 'lowercase', 'nist', 'rouge'])
+
+    def __init__(self, tokenizer, orders):
+        for tokenization in orders:
+            if tokenization not in self.TOKENIZATIONS:
+                raise ValueError(
+                    '{0}: Is not a supported tokenization. '
+                    'Expected {1}'.format(
+                        tokenization, ', '.join(sorted(self.TOKENIZATIONS))))
+        self.tokenizer = tokenizer
+        self.orders = orders
+
+    @classmethod
+    def forAccumulators(cls, tokenizer, accumulators):
+        '''
+            output: NgramService of the accumulators that count n-grams,
+            None if none of them does
+        '''
+        orders = {}
+        for accumulator in accumulators:
+            tokenization = getattr(accumulator, 'ngramTokenization', None)
+            if tokenization is not None:
+                orders[tokenization] = max(
+                    orders.get(tokenization, 0), accumulator.ngramOrder)
+        return cls(tokenizer, orders) if orders else None
+
+    def tokenize(self, hypotheses):
+        '''
+            output: dict(tokenization: list of the tokens of every
+            hypothesis). The lowercase tokens reuse those of the tokenizer.
+        '''
+        tokens = {}
+        if 'tokens' in self.orders or 'lowercase' in self.orders:
+            tokens['tokens'] = self.tokenizer.tokenize_many(hypotheses)
+        if 'lowercase' in self.orders:
+            tokens['lowercase'] = [
+                [token.lower() for token in hypothesisTokens]
+                for hypothesisTokens in tokens['tokens']
+            ]
+        if 'nist' in self.orders:
+            tokens['nist'] = [tokenize_nist(h) for h in hypotheses]
+        if 'rouge' in self.orders:
+            tokens['rouge'] = [split_words(h) for h in hypotheses]
+        return tokens
+
+    def count(self, hypotheses):
+        '''
+            input: list of hypothesis Strings
+            output: list of dict(tokenization: NgramCounts) of every
+            hypothesis
+        '''
+        counts = [{} for hypothesis in hypotheses]
+        for tokenization, tokensList in self.tokenize(hypotheses).items():
+            if tokenization not in self.orders:
+                continue
+            for hypothesisCounts, ngrams in zip(counts, count_ngrams_many(
+                    tokensList, self.orders[tokenization], keepTokens=True)):
+                hypothesisCounts[tokenization] = ngrams
+        return counts
+
+
+class MetricAccumulator(object):
+    '''
+        Scores a corpus one sample at a time.
+            add(hypothesis, references): scores one hypothesis against its
+                list of references.
+            report(): the corpus level report for every sample added.
+            merge(other): adds the samples of another accumulator of the
+                same metric and options, e.g. fed with another shard of the
+                corpus.
+        Accumulators only keep the sufficient statistics of their samples.
+        state() returns them JSON serializable, so shards scored in other
+        processes or on other machines are combined exactly with
+        mergeState(state).
+
+        Samples added with addDocument(documentIndex, hypothesis,
+        preparedReferences) also have their per sample scores kept in
+        self.samples (tools/scores.py), with the index of their document.
+
+        evaluator is the library object fetched by fetchEvaluators and
+        tokenizer is the benchmark Tokenizer (tools/tokenizer.py). Metric
+        settings (EvaluatorSwitch evaluatorOptions) are passed as keyword
+        arguments.
+
+        Work that only depends on the references is done in
+        prepareReferences, so it can be done once per gold file and shared
+        by every summarizer (tools/gold.py). Subclasses that prepare
+        references implement prepareReferences, addPrepared and
+        preparationKey instead of add. With preparesFiles, their
+        prepareAllReferences(referencesList, folder) is also given a folder
+        to write files to, kept with the gold file's cache.
+
+        Metrics scoring hypothesis n-grams set ngramTokenization (of the
+        NgramService) and ngramOrder. The EvaluatorSwitch then counts them
+        once for every metric of that tokenization and passes them to
+        addPrepared(hypothesis, preparedReferences, ngrams=NgramCounts).
+
+        Metrics that can prepare references from the tokens of a compiled
+        gold file (tools/corpus.py) list the tokenizations they read in
+        compiledTokenizations. When the gold file is compiled their
+        prepareAllReferences(referencesList, corpus) is also given its
+        TokenizedCorpus, and must prepare the same references from it.
+    '''
+    preparesFiles = False
+    ngramTokenization = None
+    ngramOrder = 0
+    compiledTokenizations = ()
+
+    def __init__(self, evaluator, tokenizer):
+        self.evaluator = evaluator
+        self.tokenizer = tokenizer
+        self.numSamples = 0
+        self.samples = SampleScores()
+        self.documents = deque()  # Of the samples waiting to be scored
+
+    def preparationKey(self):
+        '''
+            output: String identifying the output of prepareReferences, or
+            None if the references are used as they are.
+        '''
+        return None
+
+    def prepareReferences(self, references):
+        return references
+
+    def prepareAllReferences(self, referencesList):
+        '''
+            input: list of the references of every document
+            output: list of prepareReferences outputs
+        '''
+        return [
+            self.prepareReferences(references)
+            for references in referencesList
+        ]
+
+    def add(self, hypothesis, references):
+        self.addPrepared(hypothesis, self.prepareReferences(references))
+
+    def addPrepared(self, hypothesis, preparedReferences):
+        '''
+            Accumulators that only implement add, and so do not prepare
+            their references (preparationKey() is None), are given the
+            references as they are.
+        '''
+        if type(self).add is MetricAccumulator.add or \
+                self.preparationKey() is not None:
+            raise NotImplementedError(
+                '{0} must implement addPrepared'.format(type(self).__name__))
+        self.add(hypothesis, preparedReferences)
+
+    def addDocument(self, documentIndex, hypothesis, preparedReferences,
+                    ngrams=None):
+        self.documents.append(documentIndex)
+        if ngrams is None:
+            self.addPrepared(hypothesis, preparedReferences)
+        else:
+            self.addPrepared(hypothesis, preparedReferences, ngrams=ngrams)
+
+    def countNgrams(self, pending):
+        '''
+            input: list of (hypothesis, preparedReferences, NgramCounts or
+            None) of the samples to score
+            output: list of the NgramCounts of every hypothesis, those not
+            counted yet counted at once
+        '''
+        missing = [
+            hypothesis for hypothesis, preparedReferences, ngrams in pending
+            if ngrams is None]
+        if missing:
+            service = NgramService(
+                self.tokenizer, {self.ngramTokenization: self.ngramOrder})
+            counted = iter(service.count(missing))
+        return [
+            ngrams if ngrams is not None else
+            next(counted)[self.ngramTokenization]
+            for hypothesis, preparedReferences, ngrams in pending
+        ]
+
+    def nextDocument(self):
+        '''
+            output: document index of the next sample scored, -1 for
+            samples added without one.
+        '''
+        return self.documents.popleft() if self.documents else -1
+
+    def recordSample(self, fields):
+        '''
+            input: dict(field: value) of the next sample scored
+        '''
+        self.samples.add(self.nextDocument(), fields)
+
+    def report(self):
+        raise NotImplementedError
+
+    def state(self):
+        '''
+            output: JSON serializable sufficient statistics of every sample
+            added.
+        '''
+        raise NotImplementedError
+
+    def mergeState(self, state):
+        '''
+            input: state() of an accumulator of the same metric and options
+        '''
+        raise NotImplementedError
+
+    def merge(self, other):
+        self.mergeState(other.state())
+        if len(other.samples):
+            self.samples.extend(
+                other.samples.documentIndex, other.samples.columns)
+        return self
+
+    def validateLevel(self, level):
+        if level not in METRIC_LEVELS:
+            raise ValueError(
+                '{0}: Is not a supported level. Expected {1}'.format(
+                    level, ', '.join(sorted(METRIC_LEVELS))))
+        return level
+
+    def validateState(self, state, **expected):
+        for key, value in expected.items():
+            if state.get(key) != value:
+                raise ValueError(
+                    'Unable to merge {0} statistics with {1} = {2}, '
+                    'expected {3}'.format(
+                        type(self).__name__, key, state.get(key), value))
+
+
+def _f_r_p(evaluated, reference, overlapping):
+    precision = overlapping / evaluated if evaluated > 0 else 0.0
+    recall = overlapping / reference if reference > 0 else 0.0
+    f1_score = 2.0 * ((precision * recall) / (precision + recall + 1e-8))
+    return {'f': f1_score, 'p': precision, 'r': recall}
+
+
+class RougeAccumulator(MetricAccumulator):
+    '''
+        Scores samples batchSize at a time with the RougeEngine
+        (evaluator_source_files/rouge_engine.py). multiReference selects
+        how a hypothesis with several references is counted:
+            pairs: every (hypothesis, reference) pair is a sample
+            mean: the mean over its references is one sample
+            max: the reference with the best F score (per ROUGE type) is
+                one sample
+        level selects the report:
+            sentence: mean of the sample scores
+            corpus: scores of the n-gram (or LCS word) counts summed over
+                all samples
+    '''
+    ngramTokenization = 'rouge'
+    ngramOrder = ROUGE_ORDER
+    compiledTokenizations = ('rouge',)
+
+    def __init__(self, evaluator, tokenizer,
+                 multiReference=DEFAULT_ROUGE_MULTI_REFERENCE,
+                 batchSize=DEFAULT_ROUGE_BATCH_SIZE,
+                 level=DEFAULT_METRIC_LEVEL):
+        super(RougeAccumulator, self).__init__(evaluator, tokenizer)
+        self.multiReference = multiReference
+        self.batchSize = batchSize
+        self.level = self.validateLevel(level)
+        self.pending = []
+        self.sums = dict(
+            (rougeType, {'r': 0.0, 'p': 0.0, 'f': 0.0})
+            for rougeType in ['rouge-1', 'rouge-2', 'rouge-l']
+        )
+        self.counts = dict(
+            (rougeType,
+             {'evaluated': 0.0, 'reference': 0.0, 'overlapping': 0.0})
+            for rougeType in self.sums
+        )
+
+    def preparationKey(self):
+        return 'rouge-engine'
+
+    def prepareReferences(self, references):
+        return self.evaluator.prepare_references(references)
+
+    def prepareAllReferences(self, referencesList, corpus=None):
+        # One vocabulary, shared by every reference of the gold file
+        wordsList = None
+        if corpus is not None:
+            wordsList = [
+                corpus.tokens('rouge', i) for i in range(len(referencesList))
+            ]
+        return self.evaluator.prepare_all_references(
+            referencesList, wordsList=wordsList)
+
+    def addPrepared(self, hypothesis, preparedReferences, ngrams=None):
+        self.pending.append((hypothesis, preparedReferences, ngrams))
+        if len(self.pending) >= self.batchSize:
+            self._flush()
+
+    def _flush(self):
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+
+        hypotheses, preparedReferences, ngrams = zip(*pending)
+        scores, hypothesisIndex, counts = self.evaluator.score_batch(
+            hypotheses, preparedReferences, hypothesisNgrams=ngrams)
+
+        documents = np.array(
+            [self.nextDocument() for hypothesis in pending], dtype=np.int64)
+
+        # Weight of every (hypothesis, reference) pair in its sample
+        numHypotheses = len(pending)
+        referenceCounts = np.bincount(hypothesisIndex, minlength=numHypotheses)
+        if self.multiReference == 'pairs':
+            weights = np.ones(len(hypothesisIndex))
+            sampleDocuments = documents[hypothesisIndex]
+        else:
+            scored = referenceCounts > 0
+            sampleDocuments = documents[scored]
+            if self.multiReference == 'mean':
+                weights = 1.0 / referenceCounts[hypothesisIndex]
+
+        def sampleValues(pairValues):
+            if self.multiReference == 'pairs':
+                return pairValues
+            return np.bincount(
+                hypothesisIndex, weights=weights * pairValues,
+                minlength=numHypotheses)[scored]
+
+        fields = {}
+        for rougeType, sums in self.sums.items():
+            rougeScores = scores[rougeType]
+            if self.multiReference == 'max':
+                # Pairs sorted by hypothesis, then best F first
+                order = np.lexsort((-rougeScores['f'], hypothesisIndex))
+                best = order[np.unique(
+                    hypothesisIndex[order], return_index=True)[1]]
+                weights = np.zeros(len(hypothesisIndex))
+                weights[best] = 1.0
+
+            for statistic, pairValues in [
+                    ('sums', rougeScores), ('counts', counts[rougeType])]:
+                totals = getattr(self, statistic)[rougeType]
+                for k in totals:
+                    values = sampleValues(pairValues[k])
+                    totals[k] += float(np.sum(values))
+                    fields['{0}.{1}'.format(rougeType, k)] = values
+
+        self.numSamples += len(sampleDocuments)
+        self.samples.extend(sampleDocuments, fields)
+
+    def report(self):
+        self._flush()
+        numSamples = self.numSamples
+        if self.level == 'corpus':
+            return dict(
+                (rougeType, {
+                    k: float(v) * 100
+                    for k, v in _f_r_p(**counts).items() if numSamples > 0})
+                for rougeType, counts in self.counts.items()
+            )
+
+        return dict(
+            (rougeType, {
+                k: float(sums[k]) * 100 / float(numSamples)
+                for k in sums if numSamples > 0})
+            for rougeType, sums in self.sums.items()
+        )
+
+    def state(self):
+        self._flush()
+        return {
+            'multiReference': self.multiReference,
+            'numSamples': self.numSamples,
+            'sums': self.sums,
+            'counts': self.counts
+        }
+
+    def mergeState(self, state):
+        self.validateState(state, multiReference=self.multiReference)
+        self.numSamples += state['numSamples']
+        for statistic in ('sums', 'counts'):
+            for rougeType, values in getattr(self, statistic).items():
+                for k in values:
+                    values[k] += state[statistic][rougeType][k]
+
+
+class BleuAccumulator(MetricAccumulator):
+    '''
+        level selects how samples are scored:
+            sentence: compute_bleu of every sample, which pairs the
+                sentences of its references with its tokens, averaged.
+            corpus: BLEU of the n-gram matches, possible matches and lengths
+                summed over all samples, each hypothesis being scored against
+                its whole references.
+        References are prepared as the n-gram counts of their tokenized
+        sentences (sentence) or texts (corpus). Samples are buffered and
+        tokenized tokenizer.batchSize at a time with tokenizer.tokenize_many,
+        unless their tokens come from the NgramService.
+    '''
+    ngramTokenization = 'tokens'
+
+    def __init__(self, evaluator, tokenizer, level=DEFAULT_METRIC_LEVEL):
+        super(BleuAccumulator, self).__init__(evaluator, tokenizer)
+        self.level = self.validateLevel(level)
+        # Sentence level only needs the tokens, see prepareAllReferences
+        self.ngramOrder = 4 if self.level == 'corpus' else 0
+        self.compiledTokenizations = \
+            ('words',) if self.level == 'corpus' else ('sentences',)
+        self.sumScores = 0.0
+        self.matchesByOrder = [0] * 4
+        self.possibleMatchesByOrder = [0] * 4
+        self.referenceLength = 0
+        self.translationLength = 0
+        self.pending = []
+
+    def preparationKey(self):
+        key = 'bleu-{0}'.format(self.tokenizer.targetTokenizer.lower())
+        return key if self.level == 'sentence' else '{0}-corpus'.format(key)
+
+    def prepareReferences(self, references):
+        return self.prepareAllReferences([references])[0]
+
+    def prepareAllReferences(self, referencesList, corpus=None):
+        if self.level == 'corpus':
+            if corpus is not None:
+                return [
+                    get_reference_ngrams(corpus.words('words', i))
+                    for i in range(len(referencesList))
+                ]
+
+            referenceTokens = iter(self.tokenizer.tokenize_many(
+                reference for references in referencesList
+                for reference in references))
+            return [
+                get_reference_ngrams(
+                    [next(referenceTokens) for reference in references])
+                for references in referencesList
+            ]
+
+        # compute_bleu pairs each reference sentence with a hypothesis token:
+        # the words of the sentence are the references of that token
+        if corpus is not None:
+            return [
+                [
+                    get_reference_ngrams(sentence)
+                    for sentences in corpus.tokens('sentences', i)
+                    for sentence in sentences
+                ]
+                for i in range(len(referencesList))
+            ]
+
+        tokenizer = self.tokenizer
+        referenceSentences = tokenizer.tokenize_many(
+            (reference for references in referencesList
+             for reference in references), sentences=True)
+        sentenceTokens = iter(tokenizer.tokenize_many(
+            sentence for sentences in referenceSentences
+            for sentence in sentences))
+        referenceSentences = iter(referenceSentences)
+
+        return [
+            [
+                get_reference_ngrams(next(sentenceTokens))
+                for reference in references
+                for sentence in next(referenceSentences)
+            ]
+            for references in referencesList
+        ]
+
+    def addPrepared(self, hypothesis, preparedReferences, ngrams=None):
+        self.pending.append((hypothesis, preparedReferences, ngrams))
+        if len(self.pending) >= self.tokenizer.batchSize:
+            self._flush()
+
+    def _flush(self):
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+
+        for ngrams, (hypothesis, preparedReferences, shared) in zip(
+                self.countNgrams(pending), pending):
+            if self.level == 'corpus':
+                statistics = get_bleu_statistics(
+                    [ngrams], None, reference_ngrams=[preparedReferences])
+                self._addStatistics(*statistics)
+                self.recordSample(self._statisticFields(*statistics))
+            else:
+                scores = self.evaluator(
+                    ngrams.tokens, None,
+                    reference_ngrams=preparedReferences)
+                self.sumScores += scores[0]
+                self.recordSample({'score': scores[0]})
+            self.numSamples += 1
+
+    def _statisticFields(self, matchesByOrder, possibleMatchesByOrder,
+                         referenceLength, translationLength):
+        fields = {
+            'referenceLength': referenceLength,
+            'translationLength': translationLength
+        }
+        for i in range(len(matchesByOrder)):
+            fields['matches.{0}'.format(i + 1)] = matchesByOrder[i]
+            fields['possibleMatches.{0}'.format(i + 1)] = \
+                possibleMatchesByOrder[i]
+        return fields
+
+    def _addStatistics(self, matchesByOrder, possibleMatchesByOrder,
+                       referenceLength, translationLength):
+        for i in range(len(self.matchesByOrder)):
+            self.matchesByOrder[i] += matchesByOrder[i]
+            self.possibleMatchesByOrder[i] += possibleMatchesByOrder[i]
+        self.referenceLength += referenceLength
+        self.translationLength += translationLength
+
+    def report(self):
+        self._flush()
+        if self.level == 'corpus':
+            if not (self.referenceLength and self.translationLength):
+                return 0.0
+            return float(bleu_from_statistics(
+                self.matchesByOrder, self.possibleMatchesByOrder,
+                self.referenceLength, self.translationLength)[0]) * 100
+
+        return (float(self.sumScores) * 100 / float(self.numSamples)) \
+            if self.numSamples else 0.0
+
+    def state(self):
+        self._flush()
+        return {
+            'level': self.level,
+            'numSamples': self.numSamples,
+            'sumScores': self.sumScores,
+            'matchesByOrder': self.matchesByOrder,
+            'possibleMatchesByOrder': self.possibleMatchesByOrder,
+            'referenceLength': self.referenceLength,
+            'translationLength': self.translationLength
+        }
+
+    def mergeState(self, state):
+        self.validateState(state, level=self.level)
+        self.numSamples += state['numSamples']
+        self.sumScores += state['sumScores']
+        self._addStatistics(
+            state['matchesByOrder'], state['possibleMatchesByOrder'],
+            state['referenceLength'], state['translationLength'])
+
+
+class MeteorAccumulator(MetricAccumulator):
+    '''
+        Samples are sent to the METEOR pool (or daemon) batchSize at a time
+        with score_many or stats_many, so every JVM of the pool is busy.
+        With bulk, once bulkMinSamples samples are added the rest of the
+        corpus is written to a hypothesis and a reference file
+        (MeteorFiles) and scored by a single METEOR run over the files,
+        which avoids a stdio round trip per sample. Smaller corpora are
+        scored over stdio.
+        level selects how samples are scored:
+            sentence: mean of the METEOR score of every sample
+            corpus: METEOR score of the statistics lines of all samples,
+                summed field by field
+    '''
+    def __init__(self, evaluator, tokenizer, level=DEFAULT_METRIC_LEVEL,
+                 batchSize=DEFAULT_METEOR_BATCH_SIZE,
+                 bulk=DEFAULT_METEOR_BULK,
+                 bulkMinSamples=DEFAULT_METEOR_BULK_MIN_SAMPLES):
+        super(MeteorAccumulator, self).__init__(evaluator, tokenizer)
+        self.level = self.validateLevel(level)
+        self.batchSize = batchSize
+        self.bulk = bulk
+        self.bulkMinSamples = bulkMinSamples
+        self.bulkFiles = None  # MeteorFiles once the samples are written
+        self.pending = []
+        self.sumScores = 0.0
+        self.stats = None
+
+    def addPrepared(self, hypothesis, references):
+        if self.bulkFiles is not None:
+            self.bulkFiles.add(hypothesis, references)
+            return
+
+        self.pending.append((hypothesis, references))
+        if self.bulk:
+            if len(self.pending) >= self.bulkMinSamples:
+                from .evaluator_source_files.Meteor.Meteor import MeteorFiles
+                self.bulkFiles = MeteorFiles()
+                for sample in self.pending:
+                    self.bulkFiles.add(*sample)
+                self.pending = []
+        elif len(self.pending) >= self.batchSize:
+            self._flush()
+
+    def _flush(self):
+        if self.bulkFiles is not None:
+            self._flushFiles()
+
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+
+        if self.level == 'corpus':
+            self._addAllStats(self.evaluator.stats_many(pending))
+        else:
+            self._addScores(self.evaluator.score_many(pending))
+
+    def _flushFiles(self):
+        bulkFiles, self.bulkFiles = self.bulkFiles, None
+        try:
+            files = bulkFiles.finish()
+            if self.level == 'corpus':
+                results = self.evaluator.stats_files(*files)
+            else:
+                results = self.evaluator.score_files(*files)[0]
+        finally:
+            bulkFiles.close()
+
+        if len(results) != len(bulkFiles):
+            raise ValueError('METEOR scored {0} of {1} segments'.format(
+                len(results), len(bulkFiles)))
+
+        if self.level == 'corpus':
+            self._addAllStats(results)
+        else:
+            self._addScores(results)
+
+    def _addScores(self, scores):
+        for score in scores:
+            self.sumScores += score
+            self.recordSample({'score': score})
+        self.numSamples += len(scores)
+
+    def _addAllStats(self, allStats):
+        for stats in allStats:
+            self._addStats(stats)
+            self.recordSample(dict(
+                ('stats.{0}'.format(i), stat)
+                for i, stat in enumerate(stats)))
+        self.numSamples += len(allStats)
+
+    def _addStats(self, stats):
+        if self.stats is None:
+            self.stats = list(stats)
+        else:
+            self.stats = [a + b for a, b in zip(self.stats, stats)]
+
+    def report(self):
+        self._flush()
+        if self.level == 'corpus':
+            return float(self.evaluator.eval_stats(self.stats)) * 100 \
+                if self.numSamples else 0.0
+
+        return (float(self.sumScores) * 100 / float(self.numSamples)) \
+            if self.numSamples else 0.0
+
+    def state(self):
+        self._flush()
+        return {
+            'level': self.level,
+            'numSamples': self.numSamples,
+            'sumScores': self.sumScores,
+            'stats': self.stats
+        }
+
+    def mergeState(self, state):
+        self._flush()
+        self.validateState(state, level=self.level)
+        self.numSamples += state['numSamples']
+        self.sumScores += state['sumScores']
+        if state['stats'] is not None:
+            self._addStats(state['stats'])
+
+
+class NistAccumulator(MetricAccumulator):
+    '''
+        The information weights of the n-grams are computed once over all
+        the references of a gold file and prepared with them. Every sample
+        is scored against them, as its own segment (score) and into the
+        statistics of the corpus. level selects the report:
+            sentence: the mean of the segment scores.
+            corpus: NIST of the statistics summed over all samples.
+        Samples are buffered and their segment scores computed batchSize
+        at a time with NumPy.
+    '''
+    ngramTokenization = 'nist'
+    ngramOrder = NIST_ORDER
+    compiledTokenizations = ('nist',)
+
+    def __init__(self, evaluator, tokenizer, level=DEFAULT_METRIC_LEVEL,
+                 batchSize=DEFAULT_NIST_BATCH_SIZE):
+        super(NistAccumulator, self).__init__(evaluator, tokenizer)
+        self.level = self.validateLevel(level)
+        self.batchSize = batchSize
+        self.sumScores = 0.0
+        self.numerators = [0.0] * NIST_ORDER
+        self.denominators = [0] * NIST_ORDER
+        self.referenceLength = 0
+        self.hypothesisLength = 0
+        self.pending = []
+
+    def preparationKey(self):
+        return 'nist-weights'
+
+    def prepareReferences(self, references):
+        return self.prepareAllReferences([references])[0]
+
+    def prepareAllReferences(self, referencesList, corpus=None):
+        if corpus is not None:
+            return prepare_all_nist_references([
+                corpus.words('nist', i) for i in range(len(referencesList))
+            ])
+        return prepare_all_nist_references([
+            tokenize_nist_references(references)
+            for references in referencesList
+        ])
+
+    def addPrepared(self, hypothesis, preparedReferences, ngrams=None):
+        self.pending.append((hypothesis, preparedReferences, ngrams))
+        if len(self.pending) >= self.batchSize:
+            self._flush()
+
+    def _flush(self):
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+
+        allStatistics = [
+            nist_statistics(ngrams, preparedReferences)
+            for ngrams, (hypothesis, preparedReferences, shared) in zip(
+                self.countNgrams(pending), pending)
+        ]
+        numerators, denominators, referenceLengths, hypothesisLengths = \
+            zip(*allStatistics)
+        scores = nist_scores(
+            numerators, denominators, referenceLengths, hypothesisLengths)
+        for statistics, score in zip(allStatistics, scores):
+            self._addStatistics(*statistics)
+            self.sumScores += float(score)
+            self.recordSample({
+                'score': float(score),
+                'referenceLength': statistics[2],
+                'hypothesisLength': statistics[3]
+            })
+            self.numSamples += 1
+
+    def _addStatistics(self, numerators, denominators, referenceLength,
+                       hypothesisLength):
+        for i in range(NIST_ORDER):
+            self.numerators[i] += numerators[i]
+            self.denominators[i] += denominators[i]
+        self.referenceLength += referenceLength
+        self.hypothesisLength += hypothesisLength
+
+    def report(self):
+        self._flush()
+        if not self.numSamples:
+            return 0.0
+        if self.level == 'corpus':
+            return nist_from_statistics(
+                self.numerators, self.denominators, self.referenceLength,
+                self.hypothesisLength)
+        return float(self.sumScores) / float(self.numSamples)
+
+    def state(self):
+        self._flush()
+        return {
+            'level': self.level,
+            'numSamples': self.numSamples,
+            'sumScores': self.sumScores,
+            'numerators': self.numerators,
+            'denominators': self.denominators,
+            'referenceLength': self.referenceLength,
+            'hypothesisLength': self.hypothesisLength
+        }
+
+    def mergeState(self, state):
+        self.validateState(state, level=self.level)
+        self.numSamples += state.get('numSamples', 0)
+        self.sumScores += state['sumScores']
+        self._addStatistics(
+            state['numerators'], state['denominators'],
+            state['referenceLength'], state['hypothesisLength'])
+
+
+class CiderAccumulator(MetricAccumulator):
+    '''
+        CIDEr or CIDEr-D (variant) of every sample, averaged. The document
+        frequencies are computed once over all the references of a gold file
+        and prepared with the TF-IDF vectors of the references, so they are
+        shared by every summarizer. Samples are buffered, tokenized and
+        scored tokenizer.batchSize at a time.
+    '''
+    ngramTokenization = 'lowercase'
+    ngramOrder = CIDER_ORDER
+    compiledTokenizations = ('words',)
+
+    def __init__(self, evaluator, tokenizer, variant=DEFAULT_CIDER_VARIANT):
+        super(CiderAccumulator, self).__init__(evaluator, tokenizer)
+        self.variant = variant
+        self.sumScores = 0.0
+        self.pending = []
+
+    def preparationKey(self):
+        return 'cider-{0}'.format(self.tokenizer.targetTokenizer.lower())
+
+    def _tokenize(self, texts):
+        return [
+            [token.lower() for token in tokens]
+            for tokens in self.tokenizer.tokenize_many(texts)
+        ]
+
+    def prepareReferences(self, references):
+        return self.prepareAllReferences([references])[0]
+
+    def prepareAllReferences(self, referencesList, corpus=None):
+        if corpus is not None:
+            return prepare_all_cider_references([
+                [
+                    [token.lower() for token in tokens]
+                    for tokens in corpus.words('words', i)
+                ]
+                for i in range(len(referencesList))
+            ])
+
+        referenceTokens = iter(self._tokenize(
+            reference for references in referencesList
+            for reference in references))
+        return prepare_all_cider_references([
+            [next(referenceTokens) for reference in references]
+            for references in referencesList
+        ])
+
+    def addPrepared(self, hypothesis, preparedReferences, ngrams=None):
+        self.pending.append((hypothesis, preparedReferences, ngrams))
+        if len(self.pending) >= self.tokenizer.batchSize:
+            self._flush()
+
+    def _flush(self):
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+
+        scores = cider_scores(
+            self.countNgrams(pending),
+            [preparedReferences for hypothesis, preparedReferences, ngrams in
+             pending],
+            self.variant)
+        for score in scores:
+            self.sumScores += float(score)
+            self.recordSample({'score': float(score)})
+            self.numSamples += 1
+
+    def report(self):
+        self._flush()
+        return (float(self.sumScores) / float(self.numSamples)) \
+            if self.numSamples else 0.0
+
+    def state(self):
+        self._flush()
+        return {
+            'variant': self.variant,
+            'numSamples': self.numSamples,
+            'sumScores': self.sumScores
+        }
+
+    def mergeState(self, state):
+        self.validateState(state, variant=self.variant)
+        self.numSamples += state['numSamples']
+        self.sumScores += state['sumScores']
+
+
+class PyRougeAccumulator(MetricAccumulator):
+    '''
+        Writes every summary in the SEE format ROUGE-1.5.5 reads and runs it
+        once in report(). The references of a gold file are converted once
+        and shared by every summarizer (prepareAllReferences).
+        reportSystems scores several accumulators, e.g. one per summarizer,
+        with a single ROUGE-1.5.5 run. With several workers, corpora of more
+        than chunkSize documents are split in chunks scored by parallel
+        ROUGE-1.5.5 runs and their per document scores are combined.
+        The files are removed by report(), close() or when the run exits.
+    '''
+    preparesFiles = True
+
+    def __init__(self, evaluator, tokenizer,
+                 workers=DEFAULT_PYROUGE_WORKERS,
+                 chunkSize=DEFAULT_PYROUGE_CHUNK_SIZE):
+        super(PyRougeAccumulator, self).__init__(evaluator, tokenizer)
+        self.workers = workers
+        self.chunkSize = chunkSize
+        self.tempDir = tempfile.mkdtemp()
+        atexit.register(shutil.rmtree, self.tempDir, True)  # If not reported
+        self.systemDir = os.path.join(self.tempDir, 'system')
+        self.modelDir = os.path.join(self.tempDir, 'model')
+        os.makedirs(self.systemDir)
+        os.makedirs(self.modelDir)
+        self.numModels = 0
+
+        # (summary file, model folder, model files) of every sample
+        self.peers = []
+
+    def preparationKey(self):
+        return 'pyrouge-see'
+
+    def prepareReferences(self, references):
+        # References of samples added without a gold file
+        filenames = []
+        for reference in references:
+            filename = '{0}.html'.format(self.numModels)
+            write_see_file(
+                self.evaluator, os.path.join(self.modelDir, filename),
+                reference)
+            filenames.append(filename)
+            self.numModels += 1
+        return self.modelDir, filenames
+
+    def prepareAllReferences(self, referencesList, folder=None):
+        if folder is None:
+            return super(PyRougeAccumulator, self).prepareAllReferences(
+                referencesList)
+
+        return [
+            (folder, filenames)
+            for filenames in write_models(
+                self.evaluator, folder, referencesList)
+        ]
+
+    def addPrepared(self, hypothesis, preparedReferences):
+        modelFolder, modelFilenames = preparedReferences
+        peerPath = os.path.join(
+            self.systemDir, '{0}.html'.format(self.numSamples))
+        write_see_file(self.evaluator, peerPath, hypothesis)
+        self.peers.append((peerPath, modelFolder, modelFilenames))
+
+        self.nextDocument()  # Only scored as a whole by ROUGE-1.5.5
+        self.numSamples += 1
+
+    def state(self):
+        '''
+            The SEE files of every sample, each model only once, so the
+            state can be merged on another machine.
+        '''
+        models = []
+        modelIndices = {}
+        peers = []
+        for peerPath, modelFolder, modelFilenames in self.peers:
+            indices = []
+            for filename in modelFilenames:
+                modelPath = os.path.join(modelFolder, filename)
+                if modelPath not in modelIndices:
+                    modelIndices[modelPath] = len(models)
+                    models.append(_readFile(modelPath))
+                indices.append(modelIndices[modelPath])
+            peers.append((_readFile(peerPath), indices))
+
+        return {
+            'numSamples': self.numSamples,
+            'models': models,
+            'peers': peers
+        }
+
+    def mergeState(self, state):
+        modelFilenames = []
+        for model in state['models']:
+            filename = '{0}.html'.format(self.numModels)
+            _writeFile(os.path.join(self.modelDir, filename), model)
+            modelFilenames.append(filename)
+            self.numModels += 1
+
+        for peer, indices in state['peers']:
+            peerPath = os.path.join(
+                self.systemDir, '{0}.html'.format(self.numSamples))
+            _writeFile(peerPath, peer)
+            self.peers.append((
+                peerPath, self.modelDir,
+                [modelFilenames[i] for i in indices]))
+            self.numSamples += 1
+
+    def report(self):
+        return self.reportSystems([self])[0]
+
+    @staticmethod
+    def reportSystems(accumulators):
+        '''
+            input: list of PyRougeAccumulators
+            output: list of the report of every accumulator. Each one is a
+            peer system of a single ROUGE-1.5.5 run.
+        '''
+        scored = [
+            accumulator for accumulator in accumulators
+            if accumulator.numSamples]
+        try:
+            outputs = evaluate_systems(
+                scored[0].evaluator,
+                [accumulator.peers for accumulator in scored],
+                workers=scored[0].workers,
+                chunkSize=scored[0].chunkSize
+            ) if scored else []
+        finally:
+            for accumulator in accumulators:
+                accumulator.cleanup()
+
+        outputs = iter(outputs)
+        reports = []
+        for accumulator in accumulators:
+            if not accumulator.numSamples:
+                # No summaries were successful
+                reports.append([
+                    'The pyRouge score could not be calculated. No'
+                    ' summaries were succesfully generated.',
+                ])
+                continue
+
+            reports.append({
+                k: (float(v) * 100)
+                for (k, v) in next(outputs).items()
+            })
+        return reports
+
+    def cleanup(self):
+        if os.path.exists(self.tempDir):
+            shutil.rmtree(self.tempDir)
+
+    def close(self):
+        self.cleanup()
+
+
+def _readFile(path):
+    with io.open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _writeFile(path, text):
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+class NativeRougeAccumulator(MetricAccumulator):
+    '''
+        pyRouge scores computed by NativeRouge155
+        (evaluator_source_files/rouge155.py) instead of ROUGE-1.5.5.pl, with
+        the same report. options are ROUGE-1.5.5 command line options and
+        dataDir its data folder. Models are tokenized once per gold file.
+        Samples are scored in batches of chunkSize, by a pool of workers
+        processes when there is more than one. Only the scores of every
+        sample are kept, the averages and confidence intervals of the
+        report are computed from them.
+    '''
+    def __init__(self, evaluator, tokenizer,
+                 workers=DEFAULT_PYROUGE_WORKERS,
+                 chunkSize=DEFAULT_PYROUGE_CHUNK_SIZE,
+                 options=DEFAULT_PYROUGE_OPTIONS, dataDir=None):
+        super(NativeRougeAccumulator, self).__init__(evaluator, tokenizer)
+        self.rouge = evaluator(options, dataDir)
+        self.workers = workers
+        self.chunkSize = chunkSize
+        self.pool = None
+        self.pending = []  # (prepared peer, prepared models)
+        self.rows = []  # Scores of every sample, see NativeRouge155.score
+
+    def preparationKey(self):
+        return 'rouge155-{0}'.format(self.rouge.preparation_key())
+
+    def prepareReferences(self, references):
+        return [
+            self.rouge.prepare(see_sentences(reference))
+            for reference in references
+        ]
+
+    def addPrepared(self, hypothesis, preparedReferences):
+        self.pending.append(
+            (self.rouge.prepare(see_sentences(hypothesis)),
+             preparedReferences))
+        self.numSamples += 1
+        if len(self.pending) >= self.chunkSize:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+
+        if self.workers > 1:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(
+                    self.workers, initializer=init_worker,
+                    initargs=(self.rouge,))
+            rows = self.pool.map(
+                score_in_worker, self.pending,
+                chunksize=max(1, len(self.pending) // (4 * self.workers)))
+        else:
+            rows = [
+                self.rouge.score(peer, models)
+                for peer, models in self.pending]
+        self.pending = []
+
+        for row in rows:
+            self.rows.append(row)
+            self.recordSample(dict(
+                ('{0}.{1}'.format(rougeType.lower(), measure), row[3 * i + j])
+                for i, rougeType in enumerate(self.rouge.rougeTypes)
+                for j, measure in enumerate(['r', 'p', 'f'])))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def report(self):
+        self._flush()
+        self.close()
+        if not self.numSamples:
+            return [
+                'The pyRouge score could not be calculated. No'
+                ' summaries were succesfully generated.',
+            ]
+
+        return {
+            k: (float(v) * 100)
+            for (k, v) in self.rouge.evaluate(self.rows).items()
+        }
+
+    def state(self):
+        self._flush()
+        return {
+            'numSamples': self.numSamples,
+            'rougeTypes': self.rouge.rougeTypes,
+            'rows': self.rows
+        }
+
+    def mergeState(self, state):
+        self.validateState(state, rougeTypes=self.rouge.rougeTypes)
+        self._flush()  # Keeps the rows in the order of the samples
+        self.numSamples += state['numSamples']
+        self.rows.extend(state['rows'])
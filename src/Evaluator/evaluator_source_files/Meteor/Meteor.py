@@ -4,19 +4,105 @@
 # Acknowledge Michael Denkowski for the generous discussion and help
 
 import os
+import re
+import io
 import sys
+import shutil
+import tempfile
 import subprocess
 import threading
+import concurrent.futures
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
 
 # Assumes meteor-1.5.jar is in the same directory as meteor.py.  Change as needed.
 METEOR_JAR = 'meteor-1.5.jar'
+DEFAULT_METEOR_MEMORY = '2G'
+DEFAULT_METEOR_WORKERS = 1
 
+SEGMENT_SCORE = re.compile(r'^Segment (\d+) score:\s*(\S+)')
+FINAL_SCORE = re.compile(r'^Final score:\s*(\S+)')
+
+
+def sanitize_hypothesis(hypothesis_str):
+    '''
+        Cleanup of a hypothesis before it is sent to METEOR, in stdio and
+        in file mode alike so both give the same scores.
+    '''
+    return hypothesis_str.replace('|||', '').replace('  ', ' ')
 
-class Meteor:
 
+class MeteorFiles:
+    '''
+        Aligned hypothesis and reference files of a corpus for scoring in
+        file mode: one hypothesis per line, and the references of every
+        hypothesis on consecutive lines. Samples are written as they are
+        added. Segments with fewer references than the others repeat their
+        last one, which does not change their score as METEOR keeps the
+        best scoring reference.
+    '''
     def __init__(self):
-        self.meteor_cmd = ['java', '-jar', '-Xmx2G', METEOR_JAR,
-                           '-', '-', '-stdio', '-l', 'en', '-norm']
+        self.folder = tempfile.mkdtemp(prefix='meteor-')
+        self.hypothesisPath = os.path.join(self.folder, 'hypotheses.txt')
+        self.referencePath = os.path.join(self.folder, 'references.txt')
+        self.hypotheses = self._open(self.hypothesisPath, 'w')
+        self.references = self._open(self.referencePath, 'w')
+        self.referenceCounts = []
+
+    def __len__(self):
+        return len(self.referenceCounts)
+
+    def _open(self, path, mode):
+        # Lines only end with '\n', like METEOR reads them
+        return io.open(path, mode, encoding='utf-8', newline='\n')
+
+    def _line(self, text):
+        return text.replace('\n', '').replace('\r', '') + '\n'
+
+    def add(self, hypothesis_str, reference_list):
+        reference_list = list(reference_list) or ['']
+        self.hypotheses.write(self._line(sanitize_hypothesis(hypothesis_str)))
+        for reference in reference_list:
+            self.references.write(self._line(reference))
+        self.referenceCounts.append(len(reference_list))
+
+    def finish(self):
+        '''
+            output: (hypothesis file, reference file, references per segment)
+        '''
+        self.hypotheses.close()
+        self.references.close()
+
+        references = max(self.referenceCounts) if self.referenceCounts else 1
+        if any(count != references for count in self.referenceCounts):
+            paddedPath = os.path.join(self.folder, 'references.padded.txt')
+            with self._open(self.referencePath, 'r') as source, \
+                    self._open(paddedPath, 'w') as padded:
+                for count in self.referenceCounts:
+                    lines = [source.readline() for _ in range(count)]
+                    lines += lines[-1:] * (references - count)
+                    padded.writelines(lines)
+            self.referencePath = paddedPath
+
+        return self.hypothesisPath, self.referencePath, references
+
+    def close(self):
+        self.hypotheses.close()
+        self.references.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+class MeteorProcess:
+    '''
+        One METEOR JVM, driven over stdio one request at a time.
+    '''
+    def __init__(self, memory=DEFAULT_METEOR_MEMORY):
+        self.meteor_cmd = ['java', '-jar', '-Xmx{0}'.format(memory),
+                           METEOR_JAR, '-', '-', '-stdio', '-l', 'en',
+                           '-norm']
 
         self.meteor_p = subprocess.Popen(' '.join(self.meteor_cmd),
                                          shell=True,
@@ -38,13 +124,28 @@ class Meteor:
         return sourceString.replace('\n', '')
 
     def score(self, hypothesis_str, reference_list):
-        self.lock.acquire()
+        with self.lock:
+            return self._eval(self._stats(hypothesis_str, reference_list))
+
+    def stats(self, hypothesis_str, reference_list):
+        with self.lock:
+            return self._stats(hypothesis_str, reference_list)
+
+    def stats_and_score(self, hypothesis_str, reference_list):
+        with self.lock:
+            stats = self._stats(hypothesis_str, reference_list)
+            return stats, self._eval(stats)
+
+    def eval(self, stats):
+        with self.lock:
+            return self._eval(stats)
 
+    def _stats(self, hypothesis_str, reference_list):
         # Clean the stdio
         self.meteor_p.stdin.flush()
 
         # SCORE ||| reference 1 words ||| reference n words ||| hypothesis words
-        hypothesis_str = hypothesis_str.replace('|||', '').replace('  ', ' ')
+        hypothesis_str = sanitize_hypothesis(hypothesis_str)
         score_line = ' ||| '.join(
             ('SCORE', ' ||| '.join(reference_list), hypothesis_str))
 
@@ -52,23 +153,149 @@ class Meteor:
         self.meteor_p.stdin.write('{}\n'.format(score_line))
         self.meteor_p.stdin.flush()  # Needed to work with both python2 & 3
 
-        stats = self.meteor_p.stdout.readline().strip()
+        return self.meteor_p.stdout.readline().strip()
 
+    def _eval(self, stats):
         eval_line = 'EVAL ||| {}'.format(stats)
         eval_line = self.sanitize(eval_line)
         # EVAL ||| stats
         self.meteor_p.stdin.write('{}\n'.format(eval_line))
         self.meteor_p.stdin.flush()  # Needed to work with both python2 &  3
 
-        score = float(self.meteor_p.stdout.readline().strip())
+        return float(self.meteor_p.stdout.readline().strip())
+
+    def close(self):
+        with self.lock:
+            if self.meteor_p.poll() is None:
+                self.meteor_p.stdin.close()
+                self.meteor_p.kill()
+                self.meteor_p.wait()
+
+
+class Meteor:
+    '''
+        Pool of workers METEOR JVMs, each started with -Xmx memory. Every
+        request is served by an idle JVM, so callers in several threads are
+        scored in parallel. score_many and stats_many spread a list of
+        samples across all JVMs.
+    '''
+    def __init__(self, workers=DEFAULT_METEOR_WORKERS,
+                 memory=DEFAULT_METEOR_MEMORY):
+        self.workers = max(int(workers), 1)
+        self.memory = memory
+        self.processes = [
+            MeteorProcess(memory) for _ in range(self.workers)]
+
+        self.idle = queue.Queue()
+        for process in self.processes:
+            self.idle.put(process)
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(self.workers)
 
-        self.lock.release()
+    def _call(self, method, *args):
+        process = self.idle.get()
+        try:
+            return getattr(process, method)(*args)
+        finally:
+            self.idle.put(process)
+
+    def score(self, hypothesis_str, reference_list):
+        return self._call('score', hypothesis_str, reference_list)
+
+    def stats(self, hypothesis_str, reference_list):
+        '''
+            output: the METEOR statistics line of the hypothesis, a list of
+            floats. Statistics of several segments can be summed and scored
+            together with eval_stats.
+        '''
+        stats = self._call('stats', hypothesis_str, reference_list)
+        return [float(stat) for stat in stats.split()]
+
+    def stats_and_score(self, hypothesis_str, reference_list):
+        '''
+            output: (stats, score) of the hypothesis
+        '''
+        stats, score = self._call(
+            'stats_and_score', hypothesis_str, reference_list)
+        return [float(stat) for stat in stats.split()], score
+
+    def eval_stats(self, stats):
+        '''
+            input: list of floats, one or more statistics lines summed
+            output: METEOR score of the statistics
+        '''
+        return self._call(
+            'eval', ' '.join(repr(float(stat)) for stat in stats))
+
+    def score_many(self, samples):
+        '''
+            input: list of (hypothesis, references)
+            output: list of the score of every sample, in order
+        '''
+        return list(self.executor.map(
+            lambda sample: self.score(*sample), samples))
+
+    def stats_many(self, samples):
+        '''
+            input: list of (hypothesis, references)
+            output: list of the statistics of every sample, in order
+        '''
+        return list(self.executor.map(
+            lambda sample: self.stats(*sample), samples))
+
+    def _run_files(self, hypothesisPath, referencePath, references,
+                   options=()):
+        command = ['java', '-jar', '-Xmx{0}'.format(self.memory), METEOR_JAR,
+                   os.path.abspath(hypothesisPath),
+                   os.path.abspath(referencePath),
+                   '-l', 'en', '-norm', '-r', str(references)]
+        command.extend(options)
+        return subprocess.check_output(
+            command, cwd=os.path.dirname(os.path.abspath(__file__)),
+            universal_newlines=True).splitlines()
+
+    def score_files(self, hypothesisPath, referencePath, references=1):
+        '''
+            input: hypothesis file, reference file with references lines per
+            hypothesis (MeteorFiles)
+            output: (list of the score of every segment, system level
+            score), from a single METEOR run over the files
+        '''
+        segmentScores, finalScore = {}, None
+        for line in self._run_files(hypothesisPath, referencePath, references):
+            segment = SEGMENT_SCORE.match(line)
+            if segment:
+                segmentScores[int(segment.group(1))] = float(segment.group(2))
+                continue
+            final = FINAL_SCORE.match(line)
+            if final:
+                finalScore = float(final.group(1))
+
+        if finalScore is None:
+            raise ValueError('METEOR output has no final score')
+        return [segmentScores[i + 1] for i in range(len(segmentScores))], \
+            finalScore
+
+    def stats_files(self, hypothesisPath, referencePath, references=1):
+        '''
+            output: list of the statistics of every segment of the files,
+            from a single METEOR run
+        '''
+        stats = []
+        for line in self._run_files(
+                hypothesisPath, referencePath, references, ['-ssOut']):
+            try:
+                stats.append([float(stat) for stat in line.split()])
+            except ValueError:
+                continue  # Not a statistics line
+        return [segmentStats for segmentStats in stats if segmentStats]
 
-        return score
+    def close(self):
+        executor = getattr(self, 'executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+        for process in getattr(self, 'processes', []):
+            process.close()
 
     def __del__(self):
-        self.lock.acquire()
-        self.meteor_p.stdin.close()
-        self.meteor_p.kill()
-        self.meteor_p.wait()
-        self.lock.release()
+        self.close()
@@ -0,0 +1,226 @@
+'''
+    Long lived METEOR daemon. It keeps a warmed Meteor pool (JVMs with
+    their paraphrase tables loaded) between benchmark runs and serves it over
+    a unix socket, one JSON request per line:
+        {"method": "score", "args": [hypothesis, references]}
+        -> {"result": 0.25} or {"error": "..."}
+    Start it with
+        python -m Evaluator.evaluator_source_files.Meteor.daemon \
+            --socket ../cache/meteor.sock --workers 4 --memory 2G
+    from src, or let connectMeteor start it.
+'''
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import socketserver
+except ImportError:  # Python 2
+    import SocketServer as socketserver
+
+from .Meteor import Meteor, DEFAULT_METEOR_WORKERS, DEFAULT_METEOR_MEMORY
+
+from tools.logger import Logger
+LOGGER = Logger.getInstance()
+
+DAEMON_METHODS = set([
+    'score', 'stats', 'stats_and_score', 'eval_stats',
+    'score_many', 'stats_many', 'score_files', 'stats_files',
+    'ping', 'shutdown'
+])
+DAEMON_START_TIMEOUT = 120  # Seconds to wait for the JVMs to start
+
+
+class MeteorRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode('utf-8'))
+                method = request['method']
+                if method not in DAEMON_METHODS:
+                    raise ValueError(
+                        '{0}: Is not a METEOR daemon method'.format(method))
+                response = {'result': self.server.dispatch(
+                    method, request.get('args', []))}
+            except Exception as err:
+                response = {'error': '{0}: {1}'.format(
+                    type(err).__name__, err)}
+
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+            if request.get('method') == 'shutdown':
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+
+class MeteorDaemon(socketserver.ThreadingMixIn,
+                   socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socketPath, meteor):
+        self.meteor = meteor
+        if os.path.exists(socketPath):
+            os.unlink(socketPath)  # Left by a daemon that did not exit
+        socketserver.UnixStreamServer.__init__(
+            self, socketPath, MeteorRequestHandler)
+
+    def dispatch(self, method, args):
+        if method == 'ping':
+            return {'workers': self.meteor.workers,
+                    'memory': self.meteor.memory}
+        if method == 'shutdown':
+            return True
+        return getattr(self.meteor, method)(*args)
+
+
+class MeteorClient(object):
+    '''
+        Same interface as Meteor, served by a MeteorDaemon. A batch sent with
+        score_many or stats_many is spread across all JVMs of the daemon.
+    '''
+    def __init__(self, socketPath):
+        self.socketPath = socketPath
+        self.lock = threading.Lock()
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socketPath)
+        self.stream = self.socket.makefile('rwb')
+
+        info = self._request('ping')
+        self.workers = info['workers']
+        self.memory = info['memory']
+
+    def _request(self, method, *args):
+        request = json.dumps({'method': method, 'args': args})
+        with self.lock:
+            self.stream.write(request.encode('utf-8') + b'\n')
+            self.stream.flush()
+            line = self.stream.readline()
+
+        if not line:
+            raise IOError('The METEOR daemon closed the connection')
+        response = json.loads(line.decode('utf-8'))
+        if 'error' in response:
+            raise RuntimeError(
+                'METEOR daemon error: {0}'.format(response['error']))
+        return response['result']
+
+    def score(self, hypothesis_str, reference_list):
+        return self._request('score', hypothesis_str, reference_list)
+
+    def stats(self, hypothesis_str, reference_list):
+        return self._request('stats', hypothesis_str, reference_list)
+
+    def stats_and_score(self, hypothesis_str, reference_list):
+        stats, score = self._request(
+            'stats_and_score', hypothesis_str, reference_list)
+        return stats, score
+
+    def eval_stats(self, stats):
+        return self._request('eval_stats', stats)
+
+    def score_many(self, samples):
+        return self._request('score_many', samples)
+
+    def stats_many(self, samples):
+        return self._request('stats_many', samples)
+
+    def score_files(self, hypothesisPath, referencePath, references=1):
+        # The daemon runs on this machine, so it reads the files directly
+        segmentScores, finalScore = self._request(
+            'score_files', os.path.abspath(hypothesisPath),
+            os.path.abspath(referencePath), references)
+        return segmentScores, finalScore
+
+    def stats_files(self, hypothesisPath, referencePath, references=1):
+        return self._request(
+            'stats_files', os.path.abspath(hypothesisPath),
+            os.path.abspath(referencePath), references)
+
+    def shutdown(self):
+        return self._request('shutdown')
+
+    def close(self):
+        self.stream.close()
+        self.socket.close()
+
+
+def startDaemon(socketPath, workers, memory):
+    '''
+        Starts a detached daemon that outlives this process. Its output goes
+        to socketPath.log.
+    '''
+    srcFolder = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__)))))
+    command = [
+        sys.executable, '-m', __name__,
+        '--socket', os.path.abspath(socketPath),
+        '--workers', str(workers), '--memory', memory
+    ]
+    with open('{0}.log'.format(socketPath), 'ab') as log:
+        subprocess.Popen(
+            command, cwd=srcFolder, stdin=subprocess.PIPE, stdout=log,
+            stderr=log, close_fds=True, start_new_session=True)
+
+
+def connectMeteor(socketPath, workers=DEFAULT_METEOR_WORKERS,
+                  memory=DEFAULT_METEOR_MEMORY):
+    '''
+        output: MeteorClient of the daemon listening on socketPath, started
+        if it is not running yet, or a local Meteor pool if the daemon is
+        unavailable (e.g. no unix sockets on this platform).
+    '''
+    try:
+        try:
+            client = MeteorClient(socketPath)
+        except (IOError, OSError):
+            LOGGER.info('Starting METEOR daemon on %s', socketPath)
+            startDaemon(socketPath, workers, memory)
+            client = _waitForDaemon(socketPath)
+
+        LOGGER.info(
+            'Using METEOR daemon on %s with %s workers', socketPath,
+            client.workers)
+        return client
+    except (AttributeError, IOError, OSError, RuntimeError) as err:
+        LOGGER.warning(
+            'METEOR daemon unavailable (%s). Starting METEOR locally.', err)
+        return Meteor(workers, memory)
+
+
+def _waitForDaemon(socketPath):
+    deadline = time.time() + DAEMON_START_TIMEOUT
+    while True:
+        try:
+            return MeteorClient(socketPath)
+        except (IOError, OSError):
+            if time.time() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='METEOR daemon')
+    parser.add_argument('--socket', required=True)
+    parser.add_argument('--workers', type=int, default=DEFAULT_METEOR_WORKERS)
+    parser.add_argument('--memory', default=DEFAULT_METEOR_MEMORY)
+    args = parser.parse_args()
+
+    # The pool is started before binding, so a connection means it is ready
+    server = MeteorDaemon(args.socket, Meteor(args.workers, args.memory))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        server.meteor.close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
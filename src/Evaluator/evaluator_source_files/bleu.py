@@ -20,9 +20,17 @@ Chin-Yew Lin, Franz Josef Och. ORANGE: a method for evaluating automatic
 evaluation metrics for machine translation. COLING 2004.
 """
 
-import collections
 import math
 
+from .ngrams import (
+    NgramCounts,
+    count_ngrams,
+    count_ngrams_many,
+    merge_max,
+    clipped_matches,
+    truncate
+)
+
 
 def _get_ngrams(segment, max_order):
     """Extracts all n-grams upto a given maximum order from an input segment.
@@ -31,52 +39,85 @@ def _get_ngrams(segment, max_order):
       max_order: maximum length in tokens of the n-grams returned by this
           methods.
     Returns:
-      The Counter containing all n-grams upto max_order in segment
+      The NgramCounts (ngrams.py) of all n-grams upto max_order in segment,
       with a count of how many times each n-gram occurred.
     """
-    ngram_counts = collections.Counter()
-    for order in range(1, max_order + 1):
-        for i in range(0, len(segment) - order + 1):
-            ngram = tuple(segment[i:i + order])
-            ngram_counts[ngram] += 1
-    return ngram_counts
+    return count_ngrams(segment, max_order)
 
 
-def compute_bleu(translation_corpus, reference_corpus, max_order=4,
-                 smooth=False):
-    """Computes BLEU score of translated segments against one or more references.
+def get_reference_ngrams(references, max_order=4):
+    """Computes the reference side statistics compute_bleu needs.
+    Args:
+      references: list of tokenized references of one translation.
+      max_order: Maximum n-gram order to use when computing BLEU score.
+    Returns:
+      Tuple of the merged (clipped) reference n-gram counts and the length of
+      the shortest reference.
+    """
+    merged_ref_ngram_counts = merge_max(
+        count_ngrams_many(references, max_order))
+    return merged_ref_ngram_counts, merged_ref_ngram_counts.length
+
+
+def get_bleu_statistics(translation_corpus, reference_corpus, max_order=4,
+                        reference_ngrams=None):
+    """Computes the sufficient statistics of the BLEU score of a corpus.
+    Statistics of several corpora can be summed and scored together with
+    bleu_from_statistics.
     Args:
       reference_corpus: list of lists of references for each translation. Each
           reference should be tokenized into a list of tokens.
       translation_corpus: list of translations to score. Each translation
-          should be tokenized into a list of tokens.
+          should be tokenized into a list of tokens, or be given as its
+          NgramCounts of order max_order or more.
       max_order: Maximum n-gram order to use when computing BLEU score.
-      smooth: Whether or not to apply Lin et al. 2004 smoothing.
+      reference_ngrams: optional list of get_reference_ngrams outputs, one
+          per translation. Used instead of reference_corpus so reference
+          n-grams can be computed once and reused.
     Returns:
-      3-Tuple with the BLEU score, n-gram precisions, geometric mean of n-gram
-      precisions and brevity penalty.
+      4-Tuple with the n-gram matches and possible matches of every order,
+      the reference length and the translation length.
     """
     matches_by_order = [0] * max_order
     possible_matches_by_order = [0] * max_order
     reference_length = 0
     translation_length = 0
-    for (references, translation) in zip(reference_corpus,
-                                         translation_corpus):
-        reference_length += min(len(r) for r in references)
-        translation_length += len(translation)
-
-        merged_ref_ngram_counts = collections.Counter()
-        for reference in references:
-            merged_ref_ngram_counts |= _get_ngrams(reference, max_order)
-        translation_ngram_counts = _get_ngrams(translation, max_order)
-        overlap = translation_ngram_counts & merged_ref_ngram_counts
-        for ngram in overlap:
-            matches_by_order[len(ngram) - 1] += overlap[ngram]
+    if reference_ngrams is None:
+        reference_ngrams = (
+            get_reference_ngrams(references, max_order)
+            for references in reference_corpus)
+
+    for ((merged_ref_ngram_counts, min_reference_length),
+         translation) in zip(reference_ngrams, translation_corpus):
+        if isinstance(translation, NgramCounts):
+            translation_ngram_counts = truncate(translation, max_order)
+        else:
+            translation_ngram_counts = _get_ngrams(translation, max_order)
+
+        reference_length += min_reference_length
+        translation_length += translation_ngram_counts.length
+        matches = clipped_matches(
+            translation_ngram_counts, merged_ref_ngram_counts)
         for order in range(1, max_order + 1):
-            possible_matches = len(translation) - order + 1
+            matches_by_order[order - 1] += int(matches[order - 1])
+            possible_matches = translation_ngram_counts.length - order + 1
             if possible_matches > 0:
                 possible_matches_by_order[order - 1] += possible_matches
 
+    return (matches_by_order, possible_matches_by_order,
+            reference_length, translation_length)
+
+
+def bleu_from_statistics(matches_by_order, possible_matches_by_order,
+                         reference_length, translation_length, smooth=False):
+    """Computes the BLEU score of get_bleu_statistics outputs.
+    Args:
+      smooth: Whether or not to apply Lin et al. 2004 smoothing.
+    Returns:
+      3-Tuple with the BLEU score, n-gram precisions, geometric mean of n-gram
+      precisions and brevity penalty.
+    """
+    max_order = len(matches_by_order)
     precisions = [0] * max_order
     for i in range(0, max_order):
         if smooth:
@@ -105,3 +146,27 @@ def compute_bleu(translation_corpus, reference_corpus, max_order=4,
     bleu = geo_mean * bp
 
     return (bleu, precisions, bp, ratio, translation_length, reference_length)
+
+
+def compute_bleu(translation_corpus, reference_corpus, max_order=4,
+                 smooth=False, reference_ngrams=None):
+    """Computes BLEU score of translated segments against one or more references.
+    Args:
+      reference_corpus: list of lists of references for each translation. Each
+          reference should be tokenized into a list of tokens.
+      translation_corpus: list of translations to score. Each translation
+          should be tokenized into a list of tokens, or be given as its
+          NgramCounts of order max_order or more.
+      max_order: Maximum n-gram order to use when computing BLEU score.
+      smooth: Whether or not to apply Lin et al. 2004 smoothing.
+      reference_ngrams: optional list of get_reference_ngrams outputs, one
+          per translation. Used instead of reference_corpus so reference
+          n-grams can be computed once and reused.
+    Returns:
+      3-Tuple with the BLEU score, n-gram precisions, geometric mean of n-gram
+      precisions and brevity penalty.
+    """
+    return bleu_from_statistics(
+        *get_bleu_statistics(translation_corpus, reference_corpus, max_order,
+                             reference_ngrams),
+        smooth=smooth)
@@ -0,0 +1,247 @@
+'''
+    CIDEr and CIDEr-D (Vedantam et al., 2015) as computed by pycocoevalcap's
+    CiderScorer and CiderDScorer, with
+        - the document frequencies of the n-grams computed once over all the
+          references of a corpus (prepare_all_references)
+        - the TF-IDF vectors of the references kept as sparse NumPy arrays
+          of n-gram ids and values, and those of the hypotheses built the
+          same way
+        - the cosine similarities of a batch of hypotheses with all their
+          references computed at once (cider_scores).
+    CIDEr-D clips the hypothesis TF-IDF values by those of the reference
+    and weighs every reference by a Gaussian of the length difference.
+'''
+import math
+
+import numpy as np
+
+from .ngrams import (
+    NgramCounts,
+    count_ngrams_many,
+    truncate,
+    match_indices
+)
+
+CIDER_ORDER = 4
+CIDER_SIGMA = 6.0
+CIDER_VARIANTS = set(['cider', 'cider-d'])
+
+
+def _ngrams(texts, n=CIDER_ORDER):
+    '''
+        output: NgramCounts of tokenized texts, or of texts already counted
+    '''
+    counted = iter(count_ngrams_many(
+        [text for text in texts if not isinstance(text, NgramCounts)], n))
+    return [
+        truncate(text, n) if isinstance(text, NgramCounts) else next(counted)
+        for text in texts
+    ]
+
+
+class CiderVectors(object):
+    '''
+        Sparse TF-IDF vectors of one or more texts: every nonzero value with
+        its row (text), n-gram id and order, and the norm of every row and
+        order. length is the number of bigrams of every row, as
+        pycocoevalcap uses for CIDEr-D's length penalty.
+    '''
+    __slots__ = ['rows', 'ids', 'orders', 'values', 'norms', 'lengths']
+
+    def __init__(self, rows, ids, orders, values, norms, lengths):
+        self.rows = rows
+        self.ids = ids
+        self.orders = orders
+        self.values = values
+        self.norms = norms
+        self.lengths = lengths
+
+
+class CiderDocumentFrequencies(object):
+    '''
+        input: list of the tokenized references of every document of a
+        corpus
+        purpose: Every n-gram of the references gets an id and its inverse
+        document frequency, log(documents) - log(max(1, frequency)).
+        vectors(texts) gives the CiderVectors of tokenized texts (or of
+        their NgramCounts), n-grams missing from the references having no
+        id. The ids are the indices of the n-grams in keys, the sorted keys
+        of ngrams.py of all the n-grams of the references.
+    '''
+    def __init__(self, referencesList, n=CIDER_ORDER):
+        self.n = n
+        documentKeys = []
+        for references in referencesList:
+            if references:
+                # An n-gram counts once per document
+                documentKeys.append(np.unique(np.concatenate([
+                    ngrams.keys for ngrams in _ngrams(references, n)])))
+
+        self.logDocuments = math.log(float(len(referencesList))) \
+            if referencesList else 0.0
+        self.keys, frequencies = np.unique(
+            np.concatenate(documentKeys) if documentKeys
+            else np.zeros(0, dtype=np.uint64), return_counts=True)
+        self.idfs = self.logDocuments - np.log(np.maximum(1.0, frequencies))
+
+    @property
+    def numIds(self):
+        return len(self.keys)
+
+    def vectors(self, texts):
+        allNgrams = _ngrams(texts, self.n)
+        rows = np.repeat(
+            np.arange(len(allNgrams), dtype=np.int32),
+            [len(ngrams.keys) for ngrams in allNgrams])
+        keys, orders, counts = [
+            np.concatenate([getattr(ngrams, name) for ngrams in allNgrams])
+            if allNgrams else np.zeros(0, dtype=dtype)
+            for name, dtype in [('keys', np.uint64), ('orders', np.int8),
+                                ('counts', np.int64)]]
+
+        indices, ngramIds = match_indices(keys, self.keys)
+        idfs = np.full(len(keys), self.logDocuments)
+        idfs[indices] = self.idfs[ngramIds]
+        values = counts * idfs
+        norms = np.bincount(
+            rows.astype(np.int64) * self.n + orders, weights=values * values,
+            minlength=len(allNgrams) * self.n).reshape(-1, self.n)
+
+        kept = values[indices] != 0
+        indices = indices[kept]
+        lengths = np.array(
+            [max(ngrams.length - 1, 0) for ngrams in allNgrams],
+            dtype=np.float64)
+        return CiderVectors(
+            rows[indices], ngramIds[kept].astype(np.int64), orders[indices],
+            values[indices], np.sqrt(norms), lengths)
+
+
+def prepare_all_references(referencesList, n=CIDER_ORDER):
+    '''
+        input: list of the tokenized references of every document
+        output: list of (CiderDocumentFrequencies, CiderVectors of the
+        references) of every document. The document frequencies are shared
+        by all documents.
+    '''
+    # The references of every document are counted at once
+    counted = iter(count_ngrams_many([
+        reference for references in referencesList
+        for reference in references], n))
+    referencesList = [
+        [next(counted) for reference in references]
+        for references in referencesList
+    ]
+    frequencies = CiderDocumentFrequencies(referencesList, n)
+    return [
+        (frequencies, frequencies.vectors(references))
+        for references in referencesList
+    ]
+
+
+def cider_scores(hypotheses, preparedReferences, variant='cider-d',
+                 sigma=CIDER_SIGMA):
+    '''
+        input: list of tokenized hypotheses (or their NgramCounts) and the
+        prepared references of each of them (prepare_all_references)
+        output: array of the CIDEr (or CIDEr-D) score of every hypothesis
+    '''
+    if variant not in CIDER_VARIANTS:
+        raise ValueError('{0}: Is not a CIDEr variant. Expected {1}'.format(
+            variant, ', '.join(sorted(CIDER_VARIANTS))))
+    if not len(hypotheses):
+        return np.zeros(0)
+
+    n = preparedReferences[0][0].n
+    hypothesisVectors = [
+        frequencies.vectors([hypothesis])
+        for hypothesis, (frequencies, references) in zip(
+            hypotheses, preparedReferences)]
+
+    # Every (hypothesis, reference) pair is a row of the batch
+    pairHypothesis, pairNorms, pairLengths, referenceCounts = [], [], [], []
+    pairOffsets = []
+    pairs = 0
+    for i, (frequencies, references) in enumerate(preparedReferences):
+        numReferences = len(references.norms)
+        pairOffsets.append(pairs)
+        pairHypothesis.extend([i] * numReferences)
+        pairNorms.append(references.norms)
+        pairLengths.append(references.lengths)
+        referenceCounts.append(numReferences)
+        pairs += numReferences
+    if not pairs:
+        return np.zeros(len(hypotheses))
+    pairHypothesis = np.asarray(pairHypothesis)
+    referenceNorms = np.vstack(pairNorms)
+    referenceLengths = np.concatenate(pairLengths)
+
+    # Sorted keys (hypothesis, n-gram id) of the hypothesis values
+    numIds = 1 + max(
+        frequencies.numIds for frequencies, references in preparedReferences)
+    hypothesisKeys = np.concatenate([
+        i * numIds + vectors.ids
+        for i, vectors in enumerate(hypothesisVectors)])
+    hypothesisValues = np.concatenate([
+        vectors.values for vectors in hypothesisVectors])
+    order = np.argsort(hypothesisKeys)
+    hypothesisKeys = hypothesisKeys[order]
+    hypothesisValues = hypothesisValues[order]
+
+    # Every reference value, looked up in the values of its hypothesis
+    referenceRows = np.concatenate([
+        np.full(len(vectors.ids), i, dtype=np.int64)
+        for i, (frequencies, vectors) in enumerate(preparedReferences)])
+    referencePairs = np.concatenate([
+        pairOffsets[i] + vectors.rows
+        for i, (frequencies, vectors) in enumerate(preparedReferences)])
+    referenceOrders = np.concatenate([
+        vectors.orders for frequencies, vectors in preparedReferences])
+    referenceValues = np.concatenate([
+        vectors.values for frequencies, vectors in preparedReferences])
+    referenceKeys = referenceRows * numIds + np.concatenate([
+        vectors.ids for frequencies, vectors in preparedReferences])
+
+    position = np.searchsorted(hypothesisKeys, referenceKeys)
+    position = np.minimum(position, max(len(hypothesisKeys) - 1, 0))
+    matched = hypothesisKeys[position] == referenceKeys \
+        if len(hypothesisKeys) else np.zeros(len(referenceKeys), dtype=bool)
+    matchedHypothesis = hypothesisValues[position[matched]] \
+        if len(hypothesisKeys) else np.zeros(0)
+    matchedReference = referenceValues[matched]
+    if variant == 'cider-d':
+        matchedHypothesis = np.minimum(matchedHypothesis, matchedReference)
+
+    products = np.bincount(
+        referencePairs[matched] * n + referenceOrders[matched],
+        weights=matchedHypothesis * matchedReference,
+        minlength=pairs * n).reshape(pairs, n)
+
+    hypothesisNorms = np.vstack([
+        vectors.norms for vectors in hypothesisVectors])[pairHypothesis]
+    normProducts = hypothesisNorms * referenceNorms
+    similarities = np.where(
+        normProducts != 0, products / np.where(normProducts != 0,
+                                               normProducts, 1), products)
+    if variant == 'cider-d':
+        hypothesisLengths = np.array([
+            vectors.lengths[0] for vectors in hypothesisVectors])
+        delta = hypothesisLengths[pairHypothesis] - referenceLengths
+        similarities *= np.exp(-(delta ** 2) / (2 * sigma ** 2))[:, None]
+
+    # Mean over the orders, averaged over the references, times 10
+    sums = np.bincount(
+        pairHypothesis, weights=similarities.mean(axis=1),
+        minlength=len(hypotheses))
+    return sums / np.maximum(referenceCounts, 1) * 10.0
+
+
+def compute_cider(hypothesis, references, variant='cider-d'):
+    '''
+        input: tokenized hypothesis and references
+        output: CIDEr (or CIDEr-D) of the hypothesis with document
+        frequencies over its own references. These are only informative
+        over a corpus, see prepare_all_references.
+    '''
+    prepared = prepare_all_references([references])
+    return float(cider_scores([hypothesis], prepared, variant)[0])
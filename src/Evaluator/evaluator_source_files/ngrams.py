@@ -0,0 +1,231 @@
+'''
+    N-gram extraction shared by BLEU, NIST, ROUGE and CIDEr.
+
+    Every token gets a 64-bit key, the first 8 bytes of the MD5 digest of
+    its UTF-8 encoding, so keys are the same in every process and can be
+    cached with the prepared references of a gold file. The key of an
+    n-gram is that of its prefix times NGRAM_MULTIPLIER plus the key of its
+    last token, modulo 2^64, so the keys of every order are computed from
+    those of the order below with one NumPy operation. Distinct n-grams
+    have the same key with a probability of about 2^-64.
+
+    count_ngrams gives the NgramCounts of a text (count_ngrams_many those
+    of a batch of texts): the n-grams of all orders as a single sorted array
+    of unique keys, so that metrics compare two texts with one match_indices
+    (or clipped_matches) for all the orders.
+'''
+import hashlib
+
+import numpy as np
+
+NGRAM_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)  # Odd, 2^64 / golden ratio
+
+_tokenKeys = {}  # dict(token: key), shared by every text of the process
+
+
+def token_keys(tokens):
+    '''
+        input: sequence of tokens (Strings)
+        output: uint64 array of the key of every token
+    '''
+    keys = _tokenKeys
+    for token in tokens:
+        if token not in keys:
+            keys[token] = int.from_bytes(
+                hashlib.md5(token.encode('utf-8')).digest()[:8], 'little')
+    return np.fromiter(
+        (keys[token] for token in tokens), dtype=np.uint64,
+        count=len(tokens))
+
+
+def ngram_keys(tokens, maxOrder):
+    '''
+        input: sequence of tokens and the highest n-gram order
+        output: list of the uint64 arrays of the keys of the n-grams of
+        every order, in text order. Entry i of every array is the n-gram
+        starting at token i, so the prefix of n-gram i of order n is n-gram
+        i of order n - 1.
+    '''
+    keys = token_keys(tokens)
+    orders = [keys]
+    for n in range(2, maxOrder + 1):
+        previous = orders[-1]
+        if len(previous) <= 1:
+            orders.append(np.zeros(0, dtype=np.uint64))
+            continue
+        orders.append(previous[:-1] * NGRAM_MULTIPLIER + keys[n - 1:])
+    return orders[:maxOrder]
+
+
+class NgramCounts(object):
+    '''
+        N-grams of the orders 1 to maxOrder of a text, as arrays aligned
+        with keys, the sorted unique keys of the n-grams of all orders:
+            orders: order - 1 of every n-gram
+            counts: number of occurrences of every n-gram
+            first: position of the first occurrence of every n-gram, the
+                order a Counter of the n-grams iterates in (None for merged
+                counts)
+        length is the number of tokens of the text, and tokens the tokens
+        if they were kept.
+    '''
+    __slots__ = ['keys', 'orders', 'counts', 'first', 'maxOrder', 'length',
+                 'tokens']
+
+    def __init__(self, keys, orders, counts, first, maxOrder, length,
+                 tokens=None):
+        self.keys = keys
+        self.orders = orders
+        self.counts = counts
+        self.first = first
+        self.maxOrder = maxOrder
+        self.length = length
+        self.tokens = tokens
+
+    def order_keys(self, n):
+        '''
+            output: sorted unique keys of the n-grams of order n
+        '''
+        return self.keys[self.orders == n - 1]
+
+    def totals(self):
+        '''
+            output: int64 array of the number of n-grams of every order
+        '''
+        return np.bincount(
+            self.orders, weights=self.counts,
+            minlength=self.maxOrder).astype(np.int64)
+
+
+def count_ngrams(tokens, maxOrder, keepTokens=False):
+    '''
+        input: sequence of tokens, the highest n-gram order and whether the
+        NgramCounts keep the tokens
+        output: NgramCounts of the tokens
+    '''
+    return count_ngrams_many([tokens], maxOrder, keepTokens)[0]
+
+
+def count_ngrams_many(tokensList, maxOrder, keepTokens=False):
+    '''
+        input: list of sequences of tokens, the highest n-gram order and
+        whether the NgramCounts keep the tokens
+        output: list of the NgramCounts of every sequence
+        purpose: The n-grams of all the sequences are keyed and sorted
+        together, so a batch of texts costs a few NumPy operations rather
+        than a few per text.
+    '''
+    lengths = np.array([len(tokens) for tokens in tokensList], dtype=np.int64)
+    tokenKeys = token_keys(
+        [token for tokens in tokensList for token in tokens])
+    textIds = np.repeat(np.arange(len(tokensList)), lengths)
+    positions = np.arange(len(tokenKeys)) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths)
+    # Tokens left until the end of their text, the token included
+    remaining = lengths[textIds] - positions
+
+    keys, texts, orders, first = [], [], [], []
+    orderKeys = tokenKeys
+    for order in range(maxOrder):
+        if order:  # N-gram i of every order starts at token i
+            orderKeys = orderKeys[:-1] * NGRAM_MULTIPLIER + tokenKeys[order:]
+        valid = remaining[:len(orderKeys)] > order
+        keys.append(orderKeys[valid])
+        texts.append(textIds[:len(orderKeys)][valid])
+        orders.append(np.full(int(valid.sum()), order, dtype=np.int8))
+        first.append(positions[:len(orderKeys)][valid])
+
+    if keys:
+        keys, texts = np.concatenate(keys), np.concatenate(texts)
+        orders, first = np.concatenate(orders), np.concatenate(first)
+    else:
+        keys = np.zeros(0, dtype=np.uint64)
+        texts = first = np.zeros(0, dtype=np.int64)
+        orders = np.zeros(0, dtype=np.int8)
+
+    # Sorted by text then key, the first occurrence first
+    sort = np.lexsort((keys, texts))
+    keys, texts = keys[sort], texts[sort]
+    runs = np.ones(len(keys), dtype=bool)
+    runs[1:] = (keys[1:] != keys[:-1]) | (texts[1:] != texts[:-1])
+    starts = np.flatnonzero(runs)
+    counts = np.diff(np.append(starts, len(keys)))
+    keys, texts = keys[starts], texts[starts]
+    orders, first = orders[sort][starts], first[sort][starts]
+
+    bounds = np.searchsorted(texts, np.arange(len(tokensList) + 1)).tolist()
+    return [
+        NgramCounts(
+            keys[start:end], orders[start:end], counts[start:end],
+            first[start:end], maxOrder, len(tokens),
+            tokens if keepTokens else None)
+        for tokens, start, end in zip(tokensList, bounds, bounds[1:])
+    ]
+
+
+def truncate(ngrams, maxOrder):
+    '''
+        output: NgramCounts of the orders up to maxOrder of ngrams, which
+        may have been counted up to a higher order for another metric.
+    '''
+    if ngrams.maxOrder == maxOrder:
+        return ngrams
+    if ngrams.maxOrder < maxOrder:
+        raise ValueError(
+            'N-grams counted up to order {0}, {1} needed'.format(
+                ngrams.maxOrder, maxOrder))
+
+    kept = ngrams.orders < maxOrder
+    return NgramCounts(
+        ngrams.keys[kept], ngrams.orders[kept], ngrams.counts[kept],
+        ngrams.first[kept] if ngrams.first is not None else None,
+        maxOrder, ngrams.length, ngrams.tokens)
+
+
+def merge_max(ngramsList):
+    '''
+        input: non empty list of NgramCounts of the same maxOrder
+        output: NgramCounts of every n-gram of any of them, with its highest
+        count (the clipping counts of several references). length is the
+        shortest length.
+    '''
+    keys, index, inverse = np.unique(
+        np.concatenate([ngrams.keys for ngrams in ngramsList]),
+        return_index=True, return_inverse=True)
+    counts = np.zeros(len(keys), dtype=np.int64)
+    np.maximum.at(
+        counts, inverse.reshape(-1),
+        np.concatenate([ngrams.counts for ngrams in ngramsList]))
+    orders = np.concatenate([ngrams.orders for ngrams in ngramsList])
+    return NgramCounts(
+        keys, orders[index], counts, None, ngramsList[0].maxOrder,
+        min(ngrams.length for ngrams in ngramsList))
+
+
+def match_indices(keys, otherKeys):
+    '''
+        input: key array and sorted unique key array otherKeys
+        output: tuple(indices in keys, indices in otherKeys) of the keys
+        both contain, in the order of keys
+    '''
+    if not len(otherKeys):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    position = np.searchsorted(otherKeys, keys)
+    position[position == len(otherKeys)] = 0
+    indices = np.flatnonzero(otherKeys[position] == keys)
+    return indices, position[indices]
+
+
+def clipped_matches(ngrams, otherNgrams):
+    '''
+        output: int64 array of the number of n-grams of every order of
+        ngrams found in otherNgrams, each counted at most as often as
+        otherNgrams contains it
+    '''
+    indices, otherIndices = match_indices(ngrams.keys, otherNgrams.keys)
+    return np.bincount(
+        ngrams.orders[indices],
+        weights=np.minimum(
+            ngrams.counts[indices], otherNgrams.counts[otherIndices]),
+        minlength=ngrams.maxOrder).astype(np.int64)
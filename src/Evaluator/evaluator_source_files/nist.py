@@ -1,13 +1,195 @@
-from nltk.translate.nist_score import sentence_nist
-from nltk.tokenize.nist import NISTTokenizer
-ntok = NISTTokenizer()
+'''
+    NIST (Doddington, 2002) with the information weights and statistics of
+    nltk's corpus_nist, split so that
+        - the information weights are computed once over all the references
+          of a corpus (prepare_all_references), and shared by every
+          hypothesis scored against them
+        - every hypothesis gives sufficient statistics (nist_statistics),
+          which are summed for the corpus level score and scored a batch at
+          a time with NumPy for the per segment scores (nist_scores).
+    N-grams are counted as the integer keys of ngrams.py. Orders without
+    any hypothesis n-gram have a precision of 0, where nltk raises
+    ZeroDivisionError.
+'''
+import math
 
+import numpy as np
 
-def compute_nist(hypothesis, references):
-    hypothesis = list(ntok.tokenize(hypothesis))
+from .ngrams import (
+    NgramCounts,
+    ngram_keys,
+    count_ngrams,
+    count_ngrams_many,
+    truncate,
+    match_indices
+)
 
-    references = [
-        list(ntok.tokenize(reference)) for reference in references
+NIST_ORDER = 5
+# Length penalty of 0.5 when the hypotheses are 2/3 of the reference length
+PENALTY_BETA = math.log(0.5) / math.log(1.5) ** 2
+
+_tokenizer = None
+
+
+def tokenize(text):
+    global _tokenizer
+    if _tokenizer is None:
+        from nltk.tokenize.nist import NISTTokenizer
+        _tokenizer = NISTTokenizer()
+    return list(_tokenizer.tokenize(text))
+
+
+def tokenize_references(references):
+    return [tokenize(reference) for reference in references]
+
+
+def information_weights(referencesList, n=NIST_ORDER):
+    '''
+        input: list of the tokenized references of every document
+        output: tuple(sorted unique keys of the n-grams of every order,
+        array of their information weights) over all the references, Eqn 2
+        of Doddington (2002)
+    '''
+    keys, prefixKeys, orders = [], [], []
+    referenceWords = 0
+    for references in referencesList:
+        for reference in references:
+            referenceKeys = ngram_keys(reference, n)
+            for order, orderKeys in enumerate(referenceKeys):
+                keys.append(orderKeys)
+                prefixKeys.append(
+                    referenceKeys[order - 1][:len(orderKeys)] if order
+                    else orderKeys)
+                orders.append(np.full(len(orderKeys), order, dtype=np.int8))
+            referenceWords += len(reference)
+    if not keys:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0)
+
+    tableKeys, first, counts = np.unique(
+        np.concatenate(keys), return_index=True, return_counts=True)
+    # Count of the prefix of every n-gram, the words for unigrams
+    prefixes = np.searchsorted(tableKeys, np.concatenate(prefixKeys)[first])
+    numerators = np.where(
+        np.concatenate(orders)[first] > 0,
+        counts[np.minimum(prefixes, len(tableKeys) - 1)], referenceWords)
+    weights = np.array([
+        math.log(ratio, 2)
+        for ratio in (numerators / counts.astype(np.float64)).tolist()
+    ])
+    return tableKeys, weights
+
+
+def prepare_references(references, weights, n=NIST_ORDER):
+    '''
+        input: tokenized references of a document and information_weights
+        output: list of (NgramCounts, array of the information weights of
+        its n-grams, length) of every reference
+    '''
+    tableKeys, tableWeights = weights
+    prepared = []
+    for reference, ngrams in zip(
+            references, count_ngrams_many(references, n)):
+        prepared.append((
+            ngrams, tableWeights[np.searchsorted(tableKeys, ngrams.keys)],
+            len(reference)))
+    return prepared
+
+
+def prepare_all_references(referencesList, n=NIST_ORDER):
+    '''
+        input: list of the tokenized references of every document
+        output: list of the prepare_references of every document, with the
+        information weights of all of them
+    '''
+    weights = information_weights(referencesList, n)
+    return [
+        prepare_references(references, weights, n)
+        for references in referencesList
     ]
 
-    return sentence_nist(references, hypothesis)
+
+def nist_statistics(hypothesis, preparedReferences, n=NIST_ORDER):
+    '''
+        input: tokenized hypothesis (or its NgramCounts of order n or more)
+        and its prepare_references
+        output: tuple(information of the matches of every order, n-grams of
+        every order, reference length, hypothesis length). The reference of
+        every order is the one with the best precision, as in corpus_nist,
+        and the lengths are summed over the orders like it does.
+    '''
+    if isinstance(hypothesis, NgramCounts):
+        hypothesis = truncate(hypothesis, n)
+    else:
+        hypothesis = count_ngrams(hypothesis, n)
+
+    denominators = [int(total) for total in hypothesis.totals()]
+    best = [(0.0, 0.0, denominator, 0) for denominator in denominators]
+    for i, (ngrams, weights, length) in enumerate(preparedReferences):
+        indices, referenceIndices = match_indices(
+            hypothesis.keys, ngrams.keys)
+        information = weights[referenceIndices] * np.minimum(
+            hypothesis.counts[indices], ngrams.counts[referenceIndices])
+
+        # Summed in the order of the hypothesis n-grams, like nltk, so
+        # references of the same precision tie the same way
+        orders = hypothesis.orders[indices]
+        inOrder = np.lexsort((hypothesis.first[indices], orders))
+        information = information[inOrder].tolist()
+        bounds = np.searchsorted(orders[inOrder], np.arange(n + 1)).tolist()
+
+        for order, denominator in enumerate(denominators):
+            numerator = sum(
+                information[bounds[order]:bounds[order + 1]], 0.0)
+            precision = numerator / denominator if denominator else 0.0
+            candidate = (precision, numerator, denominator, length)
+            if i == 0 or candidate > best[order]:
+                best[order] = candidate
+
+    numerators = [candidate[1] for candidate in best]
+    referenceLength = sum(candidate[3] for candidate in best)
+    return numerators, denominators, referenceLength, n * hypothesis.length
+
+
+def nist_scores(numerators, denominators, referenceLengths,
+                hypothesisLengths):
+    '''
+        input: (segments, orders) matrices of nist_statistics and arrays of
+        their lengths
+        output: array of the NIST score of every segment. The corpus level
+        score is that of the statistics summed over all segments.
+    '''
+    numerators = np.asarray(numerators, dtype=np.float64)
+    denominators = np.asarray(denominators, dtype=np.float64)
+    precision = np.sum(np.where(
+        denominators > 0,
+        numerators / np.maximum(denominators, 1), 0.0), axis=1)
+
+    referenceLengths = np.asarray(referenceLengths, dtype=np.float64)
+    ratio = np.asarray(hypothesisLengths, dtype=np.float64) / \
+        np.maximum(referenceLengths, 1)
+    ratio[referenceLengths == 0] = 0.0
+    penalty = np.where(
+        (ratio > 0) & (ratio < 1),
+        np.exp(PENALTY_BETA * np.log(np.where(ratio > 0, ratio, 1)) ** 2),
+        np.clip(ratio, 0.0, 1.0))
+    return precision * penalty
+
+
+def nist_from_statistics(numerators, denominators, referenceLength,
+                         hypothesisLength):
+    return float(nist_scores(
+        [numerators], [denominators], [referenceLength],
+        [hypothesisLength])[0])
+
+
+def compute_nist(hypothesis, references, references_tokenized=False):
+    '''
+        NIST of one hypothesis, with the information weights of its own
+        references like nltk's sentence_nist.
+    '''
+    if not references_tokenized:
+        references = tokenize_references(references)
+
+    prepared = prepare_all_references([references])[0]
+    return nist_from_statistics(
+        *nist_statistics(tokenize(hypothesis), prepared))
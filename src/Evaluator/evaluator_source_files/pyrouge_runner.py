@@ -0,0 +1,294 @@
+'''
+    Runs ROUGE-1.5.5 through pyrouge's Rouge155 on summaries that are
+    already in the SEE format it reads, so that
+        - the model (reference) files of a gold file are converted once and
+          shared by every summarizer scored against it
+        - several systems (summarizers) are scored by a single ROUGE-1.5.5
+          run, each as its own peer, and their results split back out.
+    Scores are the same as Rouge155.convert_and_evaluate with the same
+    files: the configuration has one EVAL per document with the same models,
+    and ROUGE-1.5.5 is run with the same options.
+'''
+import io
+import os
+import re
+import subprocess
+import tempfile
+import concurrent.futures
+
+from collections import OrderedDict
+
+import numpy as np
+
+MODEL_ID_OFFSET = 65  # Models are labelled A, B, ... like pyrouge does
+SYSTEM_OUTPUT = re.compile(r'^(\d+) ROUGE-')
+# 1 ROUGE-1 Eval 12.1 R:0.34188 P:0.34188 F:0.34188
+DOCUMENT_OUTPUT = re.compile(
+    r'^(\d+) (ROUGE-\S+) Eval \S+ R:(\S+) P:(\S+) F:(\S+)')
+DEFAULT_CHUNK_SIZE = 500
+BOOTSTRAP_CELLS = 2000000  # Size of the resample count matrices
+
+
+def write_see_file(rougeClass, path, text):
+    '''
+        Writes text (one sentence per line) to path in the SEE format, as
+        Rouge155.convert_summaries_to_rouge_format would.
+    '''
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(rougeClass.convert_text_to_rouge_format(text))
+
+
+def write_models(rougeClass, folder, referencesList):
+    '''
+        input: Rouge155, folder and the references of every document
+        output: list of the model file names of every document. Files are
+        named <document>.<reference>.html.
+    '''
+    models = []
+    for i, references in enumerate(referencesList):
+        filenames = []
+        for j, reference in enumerate(references):
+            filename = '{0}.{1}.html'.format(i, j)
+            write_see_file(
+                rougeClass, os.path.join(folder, filename), reference)
+            filenames.append(filename)
+        models.append(filenames)
+    return models
+
+
+def _eval_string(taskId, peers, modelRoot, modelFilenames):
+    # The peers of every system share the EVAL of the document
+    peerRoot = os.path.commonpath(
+        [os.path.dirname(peerPath) for systemId, peerPath in peers])
+    peerElements = '\n'.join(
+        '            <P ID="{0}">{1}</P>'.format(
+            systemId, os.path.relpath(peerPath, peerRoot))
+        for systemId, peerPath in peers)
+    modelElements = '\n'.join(
+        '            <M ID="{0}">{1}</M>'.format(
+            chr(MODEL_ID_OFFSET + i), filename)
+        for i, filename in enumerate(sorted(modelFilenames)))
+    return '''
+    <EVAL ID="{0}">
+        <MODEL-ROOT>{1}</MODEL-ROOT>
+        <PEER-ROOT>{2}</PEER-ROOT>
+        <INPUT-FORMAT TYPE="SEE">
+        </INPUT-FORMAT>
+        <PEERS>
+{3}
+        </PEERS>
+        <MODELS>
+{4}
+        </MODELS>
+    </EVAL>
+'''.format(taskId, modelRoot, peerRoot, peerElements, modelElements)
+
+
+def document_evaluations(systems):
+    '''
+        input: list of the systems, each a list of (summary file, model
+        folder, model file names) per sample
+        output: list of (model folder, model file names, list of (system,
+        summary file)), one EVAL per document with the summaries of every
+        system of that document as its peers. System i is labelled i + 1 in
+        the ROUGE output.
+    '''
+    evaluations = OrderedDict()  # dict(models: list of dict(system: peer))
+    for systemId, samples in enumerate(systems, 1):
+        for peerPath, modelRoot, modelFilenames in samples:
+            key = (modelRoot, tuple(sorted(modelFilenames)))
+            peerSets = evaluations.setdefault(key, [])
+            # A system scoring the same document twice gets another EVAL
+            peers = next(
+                (peers for peers in peerSets if systemId not in peers), None)
+            if peers is None:
+                peers = OrderedDict()
+                peerSets.append(peers)
+            peers[systemId] = os.path.abspath(peerPath)
+
+    return [
+        (modelRoot, modelFilenames, list(peers.items()))
+        for (modelRoot, modelFilenames), peerSets in evaluations.items()
+        for peers in peerSets
+    ]
+
+
+def write_config(path, evaluations, firstTaskId=1):
+    '''
+        input: config file path, document_evaluations and the ID of the
+        first EVAL
+    '''
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(u'<ROUGE-EVAL version="1.55">')
+        for taskId, (modelRoot, modelFilenames, peers) in enumerate(
+                evaluations, firstTaskId):
+            f.write(_eval_string(taskId, peers, modelRoot, modelFilenames))
+        f.write(u'</ROUGE-EVAL>')
+
+
+def rouge_options(rouge, configPath, extraOptions=()):
+    '''
+        output: the ROUGE-1.5.5 command line options Rouge155.evaluate uses,
+        with extraOptions.
+    '''
+    if rouge.args:
+        options = rouge.args.split()
+    else:
+        options = [
+            '-e', rouge.data_dir, '-c', '95', '-2', '-1', '-U',
+            '-r', '1000', '-n', '4', '-w', '1.2', '-a'
+        ]
+    return options + list(extraOptions) + ['-m', configPath]
+
+
+def _option(options, flag, default):
+    return type(default)(
+        options[options.index(flag) + 1]) if flag in options else default
+
+
+def run_rouge(rouge, evaluations, firstTaskId=1, extraOptions=()):
+    '''
+        output: ROUGE-1.5.5 output on the evaluations
+    '''
+    configFile, configPath = tempfile.mkstemp(
+        prefix='rouge-conf-', suffix='.xml')
+    os.close(configFile)
+    try:
+        write_config(configPath, evaluations, firstTaskId)
+        command = [rouge.bin_path] + rouge_options(
+            rouge, configPath, extraOptions)
+        return subprocess.check_output(command).decode('utf-8')
+    finally:
+        os.remove(configPath)
+
+
+def evaluate_systems(rougeClass, systems, workers=1,
+                     chunkSize=DEFAULT_CHUNK_SIZE):
+    '''
+        input: Rouge155, list of the systems to score, each a list of
+        (summary file, model folder, model file names) per sample, and the
+        number of ROUGE-1.5.5 processes to run at once
+        output: list of the Rouge155.output_to_dict of every system
+        purpose: With a single worker, or at most chunkSize documents, every
+        system is scored by a single ROUGE-1.5.5 run. Otherwise the
+        documents are split in chunks of chunkSize scored by parallel runs,
+        see combine_document_scores.
+    '''
+    rouge = rougeClass()
+    evaluations = document_evaluations(systems)
+
+    if workers <= 1 or len(evaluations) <= chunkSize:
+        output = run_rouge(rouge, evaluations)
+
+        linesBySystem = dict((systemId, []) for systemId in range(
+            1, len(systems) + 1))
+        for line in output.split('\n'):
+            match = SYSTEM_OUTPUT.match(line)
+            if match and int(match.group(1)) in linesBySystem:
+                linesBySystem[int(match.group(1))].append(line)
+
+        return [
+            rouge.output_to_dict('\n'.join(linesBySystem[systemId]))
+            for systemId in range(1, len(systems) + 1)
+        ]
+
+    # EVAL IDs are unique across chunks
+    chunks = [
+        (start + 1, evaluations[start:start + chunkSize])
+        for start in range(0, len(evaluations), chunkSize)
+    ]
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        outputs = list(executor.map(
+            lambda chunk: run_rouge(rouge, chunk[1], chunk[0], ['-d']),
+            chunks))
+
+    options = rouge_options(rouge, '')
+    return combine_document_scores(
+        outputs, len(systems),
+        confidence=_option(options, '-c', 95),
+        resamples=_option(options, '-r', 1000))
+
+
+def combine_document_scores(outputs, numSystems, confidence=95,
+                            resamples=1000, seed=0):
+    '''
+        input: ROUGE-1.5.5 outputs with per document scores (-d) of
+        disjoint sets of documents
+        output: list of the output_to_dict of every system over all the
+        documents
+        purpose: ROUGE-1.5.5 averages the recall, precision and F score of
+        every document, so the average over all documents is computed from
+        the per document scores of every chunk. ROUGE-1.5.5 prints them
+        with 5 decimals, so the averages are within 0.00001 of those of a
+        single run. The confidence intervals are ROUGE-1.5.5's percentile
+        bootstrap of the averages, drawn again over all documents.
+    '''
+    scores = {}  # dict(system: dict(rougeType: list of (R, P, F)))
+    for output in outputs:
+        for line in output.split('\n'):
+            match = DOCUMENT_OUTPUT.match(line)
+            if match:
+                systemId, rougeType = int(match.group(1)), match.group(2)
+                scores.setdefault(systemId, OrderedDict()).setdefault(
+                    rougeType, []).append(
+                        [float(match.group(i)) for i in (3, 4, 5)])
+
+    results = []
+    for systemId in range(1, numSystems + 1):
+        systemScores = scores.get(systemId, {})
+        rougeTypes = list(systemScores)
+        if not rougeTypes:
+            results.append({})
+            continue
+
+        # (documents, rougeTypes * 3) matrix, resampled all at once
+        matrix = np.hstack([
+            np.asarray(systemScores[rougeType]) for rougeType in rougeTypes])
+        averages, low, high = bootstrap_averages(
+            matrix, confidence, resamples, seed)
+        results.append(scores_to_dict(rougeTypes, averages, low, high))
+    return results
+
+
+def bootstrap_averages(matrix, confidence=95, resamples=1000, seed=0):
+    '''
+        input: (documents, scores) matrix
+        output: tuple(averages, low, high) of every score over the
+        documents, with the percentile bootstrap confidence interval
+        ROUGE-1.5.5 computes
+    '''
+    alpha = (100.0 - confidence) / 200.0
+    random = np.random.RandomState(seed)
+    numDocuments = len(matrix)
+    averages = matrix.mean(axis=0)
+
+    # Batches of resamples keep the count matrices small
+    batchSize = max(1, BOOTSTRAP_CELLS // numDocuments)
+    resampled = []
+    for start in range(0, resamples, batchSize):
+        counts = random.multinomial(
+            numDocuments, np.full(numDocuments, 1.0 / numDocuments),
+            size=min(batchSize, resamples - start))
+        resampled.append(counts.dot(matrix) / numDocuments)
+    low, high = np.percentile(
+        np.vstack(resampled), [100 * alpha, 100 * (1 - alpha)], axis=0)
+    return averages, low, high
+
+
+def scores_to_dict(rougeTypes, averages, low, high):
+    '''
+        input: ROUGE types (e.g. ROUGE-1) and the bootstrap_averages of
+        their recall, precision and F score columns
+        output: dict with the keys of Rouge155.output_to_dict, with 5
+        decimals like ROUGE-1.5.5 prints them
+    '''
+    result = {}
+    for i, rougeType in enumerate(rougeTypes):
+        rougeType = rougeType.lower().replace('-', '_')
+        for j, measure in enumerate(['recall', 'precision', 'f_score']):
+            key = '{0}_{1}'.format(rougeType, measure)
+            column = 3 * i + j
+            result[key] = round(float(averages[column]), 5)
+            result['{0}_cb'.format(key)] = round(float(low[column]), 5)
+            result['{0}_ce'.format(key)] = round(float(high[column]), 5)
+    return result
@@ -0,0 +1,557 @@
+'''
+    ROUGE-1.5.5 scores computed in Python, without perl, temporary files or
+    a subprocess, so samples can be scored in parallel worker processes.
+    It follows ROUGE-1.5.5.pl:
+        - text is lowercased and every character other than a-z and 0-9
+          splits words. With -s, words of the SMART stopword list are
+          removed. With -m, words of more than 3 characters are stemmed with
+          the WordNet exceptions of ROUGE-1.5.5 and otherwise Porter's
+          original algorithm.
+        - -l limits the summaries to their first words and -b to their
+          first bytes.
+        - ROUGE-N counts clipped hits of the n-gram keys of ngrams.py.
+          ROUGE-L is the summary level union LCS of every model sentence
+          with the peer sentences, each word counted at most as often as it
+          is in both summaries.
+          ROUGE-W weighs consecutive hits of the union LCS with k ** w.
+          ROUGE-S counts skip bigrams of at most -2 skipped words, and
+          ROUGE-SU also unigrams.
+        - with -f A the hits and counts of all models are summed, with -f B
+          the model with the best recall is used. With several models the
+          scores are jackknifed: averaged over every set of all but one
+          model.
+        - recall and precision are rounded to 5 decimals as ROUGE-1.5.5
+          prints them, and the F score (-p alpha) is computed from them.
+        - averages are over the EVALs (documents) and their confidence
+          intervals are a percentile bootstrap (-c, -r).
+    The stopwords and WordNet exceptions are read from the data folder of
+    ROUGE-1.5.5 (-e, or the home_dir of pyrouge's settings). Without it
+    stemming only uses Porter's algorithm.
+    validate() scores the same SEE files with both implementations.
+'''
+import io
+import os
+import re
+import glob
+
+try:
+    import configparser
+except ImportError:  # Python 2
+    import ConfigParser as configparser
+
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from .ngrams import count_ngrams, clipped_matches
+from .pyrouge_runner import (
+    bootstrap_averages,
+    scores_to_dict,
+    evaluate_systems
+)
+
+# Options pyrouge runs ROUGE-1.5.5 with, without -e
+DEFAULT_OPTIONS = '-c 95 -2 -1 -U -r 1000 -n 4 -w 1.2 -a -m'
+OPTIONS_WITH_VALUES = set(
+    ['-n', '-2', '-l', '-b', '-w', '-c', '-r', '-p', '-f', '-e', '-z'])
+OPTION_FLAGS = set(['-m', '-s', '-u', '-U', '-x', '-a', '-d', '-v', '-t'])
+
+STOPWORDS_FILE = 'smart_common_words.txt'
+EXCEPTIONS_FOLDER = 'WordNet-2.0-Exceptions'
+SEE_SENTENCE = re.compile(
+    r'^<a (?:size="[0-9]+" )?name="[0-9]+">\[[0-9]+\]</a>\s+'
+    r'<a href="#[0-9]+" id=[0-9]+>([^<]+)')
+NOT_ALPHANUMERIC = re.compile(r'[^A-Za-z0-9]+')
+
+
+def parse_options(options):
+    '''
+        input: ROUGE-1.5.5 command line options, a string or list
+        output: dict(option: value), True for flags
+    '''
+    if not isinstance(options, (list, tuple)):
+        options = options.split()
+
+    parsed = {}
+    i = 0
+    while i < len(options):
+        option = options[i]
+        if option in OPTIONS_WITH_VALUES and i + 1 < len(options):
+            parsed[option] = options[i + 1]
+            i += 2
+        elif option in OPTION_FLAGS:
+            parsed[option] = True
+            i += 1
+        else:
+            raise ValueError(
+                '{0}: Is not a supported ROUGE-1.5.5 option'.format(option))
+    return parsed
+
+
+def find_data_dir():
+    '''
+        output: data folder of the ROUGE-1.5.5 installation pyrouge is
+        configured with, or None.
+    '''
+    settingsPath = os.path.join(
+        os.getenv('APPDATA') if os.name == 'nt' else os.path.expanduser('~'),
+        'pyrouge' if os.name == 'nt' else '.pyrouge', 'settings.ini')
+    config = configparser.ConfigParser()
+    try:
+        config.read(settingsPath)
+        dataDir = os.path.join(
+            config.get('pyrouge settings', 'home_dir'), 'data')
+    except (configparser.Error, OSError):
+        return None
+    return dataDir if os.path.isdir(dataDir) else None
+
+
+def read_stopwords(dataDir):
+    with io.open(os.path.join(dataDir, STOPWORDS_FILE),
+                 encoding='latin-1') as f:
+        return set(line.strip() for line in f if line.strip())
+
+
+def read_exceptions(dataDir):
+    '''
+        output: dict(inflected word: base form) of the WordNet exception
+        lists ROUGE-1.5.5 builds WordNet-2.0.exc.db from. Like
+        buildExeptionDB.pl, the first base form is kept and later files
+        override earlier ones.
+    '''
+    exceptions = {}
+    for path in sorted(glob.glob(
+            os.path.join(dataDir, EXCEPTIONS_FOLDER, '*.exc'))):
+        with io.open(path, encoding='latin-1') as f:
+            for line in f:
+                words = line.split()
+                if len(words) > 1:
+                    exceptions[words[0]] = words[1]
+    return exceptions
+
+
+def read_see(path):
+    '''
+        output: list of the sentences of a SEE file, as ROUGE-1.5.5 reads
+        them.
+    '''
+    with io.open(path, encoding='utf-8') as f:
+        return [
+            match.group(1)
+            for match in (SEE_SENTENCE.match(line) for line in f)
+            if match
+        ]
+
+
+def see_sentences(text):
+    '''
+        output: list of the sentences of a summary (one sentence per line)
+        ROUGE-1.5.5 reads from the SEE file pyrouge writes of it. Empty
+        sentences are skipped and sentences end at the first '<'.
+    '''
+    sentences = []
+    for sentence in text.split('\n'):
+        sentence = sentence.split('<', 1)[0]
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def _round(value):
+    # ROUGE-1.5.5 keeps recall and precision as sprintf("%7.5f")
+    return float('{0:.5f}'.format(value))
+
+
+class Rouge155Text(object):
+    '''
+        Tokens of a summary and the grams ROUGE-1.5.5 counts in them.
+    '''
+    __slots__ = ['sentences', 'numTokens', 'ngrams', 'skipBigrams',
+                 'unigrams']
+
+    def __init__(self, sentences, maxN, skipDistance, skipUnigrams):
+        self.sentences = sentences
+        tokens = [token for sentence in sentences for token in sentence]
+        self.numTokens = len(tokens)
+        self.ngrams = count_ngrams(tokens, maxN)
+        self.unigrams = Counter(tokens)
+
+        self.skipBigrams = None
+        if skipDistance is not None:
+            self.skipBigrams = Counter()
+            for i in range(len(tokens)):
+                end = len(tokens) if skipDistance < 0 else \
+                    min(len(tokens), i + skipDistance + 2)
+                for j in range(i + 1, end):
+                    self.skipBigrams[tokens[i] + ' ' + tokens[j]] += 1
+            if skipUnigrams:
+                self.skipBigrams.update(self.unigrams)
+
+
+class NativeRouge155(object):
+    '''
+        input: ROUGE-1.5.5 options (DEFAULT_OPTIONS are those of pyrouge)
+        and the ROUGE-1.5.5 data folder
+        purpose: prepare() the summaries once, then score(peer, models)
+        gives the (recall, precision, F score) of every rougeTypes of an
+        EVAL, and evaluate(rows) the averages of a corpus like
+        Rouge155.output_to_dict.
+    '''
+    def __init__(self, options=DEFAULT_OPTIONS, dataDir=None):
+        self.options = parse_options(options)
+        self.maxN = int(self.options.get('-n', 0))
+        self.lengthLimit = int(self.options.get('-l', 0))
+        self.byteLimit = int(self.options.get('-b', 0))
+        self.alpha = float(self.options.get('-p', 0.5))
+        self.scoreMode = self.options.get('-f', 'A')
+        self.confidence = float(self.options.get('-c', 95))
+        self.resamples = int(self.options.get('-r', 1000))
+        self.stemming = '-m' in self.options
+        self.lcs = '-x' not in self.options
+        self.weight = float(self.options['-w']) if '-w' in self.options \
+            else None
+        if self.scoreMode not in ('A', 'B'):
+            raise ValueError('{0}: Is not a supported scoring formula'.format(
+                self.scoreMode))
+
+        # ROUGE-S and ROUGE-SU with skip distance -2 (-1 is unlimited)
+        self.skipDistance = int(self.options['-2']) if '-2' in self.options \
+            else None
+        self.skipBigrams = self.skipDistance is not None and (
+            '-u' not in self.options or '-U' in self.options)
+        self.skipUnigrams = self.skipDistance is not None and (
+            '-u' in self.options or '-U' in self.options)
+
+        self.dataDir = dataDir or self.options.get('-e') or find_data_dir()
+        self.stopwords = set()
+        if '-s' in self.options:
+            if not self.dataDir:
+                raise ValueError(
+                    'Removing stopwords (-s) needs the ROUGE-1.5.5 data '
+                    'folder')
+            self.stopwords = read_stopwords(self.dataDir)
+        self.exceptions = read_exceptions(self.dataDir) \
+            if self.stemming and self.dataDir else {}
+
+        self.stemmer = None
+        if self.stemming:
+            from nltk.stem.porter import PorterStemmer
+            self.stemmer = PorterStemmer(PorterStemmer.ORIGINAL_ALGORITHM)
+        self.stems = {}
+
+        self.rougeTypes = self._rougeTypes()
+
+    def _rougeTypes(self):
+        rougeTypes = ['ROUGE-{0}'.format(n) for n in range(1, self.maxN + 1)]
+        if self.lcs:
+            rougeTypes.append('ROUGE-L')
+        if self.weight is not None:
+            rougeTypes.append('ROUGE-W-{0}'.format(
+                self.options['-w']))
+        distance = '*' if self.skipDistance is not None and \
+            self.skipDistance < 0 else str(self.skipDistance)
+        if self.skipBigrams:
+            rougeTypes.append('ROUGE-S{0}'.format(distance))
+        if self.skipUnigrams:
+            rougeTypes.append('ROUGE-SU{0}'.format(distance))
+        return rougeTypes
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['stems'] = {}  # Rebuilt by every worker
+        return state
+
+    def preparation_key(self):
+        '''
+            output: string of the options that change prepare()
+        '''
+        return 'n{0}-l{1}-b{2}-m{3}-s{4}-2{5}-u{6}-e{7}'.format(
+            self.maxN, self.lengthLimit, self.byteLimit, int(self.stemming),
+            int(bool(self.stopwords)), self.skipDistance,
+            int(self.skipUnigrams), len(self.exceptions))
+
+    def stem(self, word):
+        if word not in self.stems:
+            self.stems[word] = self.exceptions.get(word) or \
+                self.stemmer.stem(word)
+        return self.stems[word]
+
+    def tokenize(self, sentences):
+        '''
+            input: list of the sentences of a summary
+            output: list of the tokens of every sentence, within the length
+            limits
+        '''
+        tokenized = []
+        words, size = 0, 0
+        for sentence in sentences:
+            if self.byteLimit:
+                sentence = sentence.strip()
+                sentence = sentence[:max(self.byteLimit - size, 0)]
+                size += len(sentence) + 1
+            sentenceWords = NOT_ALPHANUMERIC.sub(' ', sentence).lower().split()
+            if self.lengthLimit:
+                sentenceWords = sentenceWords[
+                    :max(self.lengthLimit - words, 0)]
+                words += len(sentenceWords)
+
+            tokens = []
+            for word in sentenceWords:
+                if word in self.stopwords:
+                    continue
+                if self.stemming and len(word) > 3:
+                    word = self.stem(word)
+                tokens.append(word)
+            tokenized.append(tokens)
+        return tokenized
+
+    def prepare(self, sentences):
+        '''
+            input: list of the sentences of a summary (see_sentences or
+            read_see)
+            output: Rouge155Text
+        '''
+        return Rouge155Text(
+            self.tokenize(sentences), self.maxN,
+            self.skipDistance if self.skipBigrams or self.skipUnigrams
+            else None,
+            self.skipUnigrams)
+
+    def _measures(self, hit, count, peerCount, inverse=None):
+        recall = hit / count if count else 0.0
+        precision = hit / peerCount if peerCount else 0.0
+        if inverse is not None:
+            recall, precision = inverse(recall), inverse(precision)
+        recall, precision = _round(recall), _round(precision)
+        denominator = (1 - self.alpha) * precision + self.alpha * recall
+        fScore = precision * recall / denominator if denominator > 0 else 0.0
+        return recall, precision, fScore
+
+    def _gramHits(self, modelGrams, peerGrams):
+        return sum(
+            min(count, peerGrams[gram])
+            for gram, count in modelGrams.items() if gram in peerGrams)
+
+    def _unionHits(self, model, peer, weight=None):
+        '''
+            output: (hits, model base) of the union LCS (WLCS with weight)
+            of every model sentence with the peer sentences
+        '''
+        modelUnigrams = Counter(model.unigrams)
+        peerUnigrams = Counter(peer.unigrams)
+        hits, base = 0.0, 0.0
+        for sentence in model.sentences:
+            hitMask = [False] * len(sentence)
+            for peerSentence in peer.sentences:
+                _markLCS(sentence, peerSentence, hitMask, weight)
+
+            base += len(sentence) if weight is None else \
+                len(sentence) ** weight
+            run = 0
+            for j, word in enumerate(sentence):
+                counted = hitMask[j] and modelUnigrams[word] > 0 and \
+                    peerUnigrams[word] > 0
+                if counted:
+                    modelUnigrams[word] -= 1
+                    peerUnigrams[word] -= 1
+                    run += 1
+                if run and (not counted or j == len(sentence) - 1):
+                    hits += run if weight is None else run ** weight
+                    run = 0
+        return hits, base
+
+    def _typeCounts(self, models, peer):
+        '''
+            output: list of (hit, model count, peer count) of every model,
+            for every rougeTypes
+        '''
+        counts = []
+        modelHits = [
+            (clipped_matches(model.ngrams, peer.ngrams), model.ngrams.totals())
+            for model in models]
+        peerTotals = peer.ngrams.totals()
+        for n in range(self.maxN):
+            counts.append([
+                (int(hits[n]), int(totals[n]), int(peerTotals[n]))
+                for hits, totals in modelHits])
+        if self.lcs:
+            counts.append([
+                self._unionHits(model, peer) + (peer.numTokens,)
+                for model in models])
+        if self.weight is not None:
+            peerBase = sum(
+                len(sentence) ** self.weight for sentence in peer.sentences)
+            counts.append([
+                self._unionHits(model, peer, self.weight) + (peerBase,)
+                for model in models])
+        if self.skipBigrams:
+            counts.append(self._skipCounts(models, peer, unigrams=False))
+        if self.skipUnigrams:
+            counts.append(self._skipCounts(models, peer, unigrams=True))
+        return counts
+
+    def _skipCounts(self, models, peer, unigrams):
+        if unigrams or not self.skipUnigrams:
+            peerGrams = peer.skipBigrams
+        else:  # -U: ROUGE-S without the unigrams of ROUGE-SU
+            peerGrams = peer.skipBigrams - peer.unigrams
+        counts = []
+        for model in models:
+            modelGrams = model.skipBigrams if unigrams or \
+                not self.skipUnigrams else model.skipBigrams - model.unigrams
+            counts.append((
+                self._gramHits(modelGrams, peerGrams),
+                sum(modelGrams.values()), sum(peerGrams.values())))
+        return counts
+
+    def _combine(self, modelCounts, rougeType):
+        inverse = None
+        if rougeType.startswith('ROUGE-W'):
+            def inverse(score):
+                return score ** (1.0 / self.weight)
+
+        if self.scoreMode == 'B':
+            return max(
+                (self._measures(hit, count, peerCount, inverse)
+                 for hit, count, peerCount in modelCounts),
+                key=lambda measures: measures[0])
+        return self._measures(
+            sum(hit for hit, count, peerCount in modelCounts),
+            sum(count for hit, count, peerCount in modelCounts),
+            sum(peerCount for hit, count, peerCount in modelCounts),
+            inverse)
+
+    def score(self, peer, models):
+        '''
+            input: prepared peer summary and list of prepared models
+            output: list of [recall, precision, F score] of every rougeTypes
+        '''
+        row = []
+        for rougeType, modelCounts in zip(
+                self.rougeTypes, self._typeCounts(models, peer)):
+            if len(modelCounts) > 1:  # Jackknifing
+                subsets = [
+                    self._combine(
+                        modelCounts[:i] + modelCounts[i + 1:], rougeType)
+                    for i in range(len(modelCounts))]
+                row.extend(
+                    sum(measure) / len(subsets) for measure in zip(*subsets))
+            elif modelCounts:
+                row.extend(self._combine(modelCounts, rougeType))
+            else:
+                row.extend([0.0, 0.0, 0.0])
+        return row
+
+    def score_texts(self, peer, models):
+        '''
+            input: summary and list of models, one sentence per line
+            output: score() of the texts
+        '''
+        return self.score(
+            self.prepare(see_sentences(peer)),
+            [self.prepare(see_sentences(model)) for model in models])
+
+    def evaluate(self, rows, seed=0):
+        '''
+            input: list of the score() of every EVAL
+            output: dict like Rouge155.output_to_dict of the averages and
+            their confidence intervals
+        '''
+        if not len(rows):
+            return {}
+        averages, low, high = bootstrap_averages(
+            np.asarray(rows, dtype=np.float64), self.confidence,
+            self.resamples, seed)
+        return scores_to_dict(self.rougeTypes, averages, low, high)
+
+
+def _markLCS(model, peer, hitMask, weight=None):
+    '''
+        Marks in hitMask the words of model in the LCS (WLCS with weight)
+        of model and peer, backtracked like ROUGE-1.5.5's markLCS.
+    '''
+    m, n = len(model), len(peer)
+    if not m or not n:
+        return
+    c = [[0.0] * (n + 1) for _ in range(m + 1)]
+    run = [[0] * (n + 1) for _ in range(m + 1)]
+    for i in range(1, m + 1):
+        word, previous, row = model[i - 1], c[i - 1], c[i]
+        for j in range(1, n + 1):
+            if word == peer[j - 1]:
+                if weight is None:
+                    row[j] = previous[j - 1] + 1
+                else:
+                    k = run[i - 1][j - 1]
+                    row[j] = previous[j - 1] + (k + 1) ** weight - \
+                        k ** weight
+                    run[i][j] = k + 1
+            elif previous[j] >= row[j - 1]:
+                row[j] = previous[j]
+            else:
+                row[j] = row[j - 1]
+
+    i, j = m, n
+    while i and j:
+        if model[i - 1] == peer[j - 1]:
+            i -= 1
+            j -= 1
+            hitMask[i] = True
+        elif c[i - 1][j] >= c[i][j - 1]:
+            i -= 1
+        else:
+            j -= 1
+
+
+def validate(rougeClass, systems, options=None, dataDir=None):
+    '''
+        input: Rouge155, list of the systems to score, each a list of
+        (summary file, model folder, model file names) of SEE files (e.g.
+        DUC-2004 converted by pyrouge), and ROUGE-1.5.5 options
+        output: OrderedDict(key: largest difference over the systems)
+        between the scores of ROUGE-1.5.5.pl and NativeRouge155
+        purpose: Checks the native scores against the installed perl
+        ROUGE-1.5.5.
+    '''
+    class Rouge(rougeClass):
+        def __init__(self):
+            super(Rouge, self).__init__()
+            if options:
+                self.args = '-e {0} {1}'.format(self.data_dir, options)
+
+    perlOutputs = evaluate_systems(Rouge, systems)
+    native = NativeRouge155(
+        options or DEFAULT_OPTIONS, dataDir or Rouge().data_dir)
+
+    differences = OrderedDict()
+    for samples, perlOutput in zip(systems, perlOutputs):
+        rows = [
+            native.score(
+                native.prepare(read_see(peerPath)),
+                [native.prepare(read_see(os.path.join(modelRoot, filename)))
+                 for filename in sorted(modelFilenames)])
+            for peerPath, modelRoot, modelFilenames in samples]
+        nativeOutput = native.evaluate(rows)
+        for key, value in nativeOutput.items():
+            if key.endswith('_cb') or key.endswith('_ce'):
+                continue  # Different random resamples
+            difference = abs(value - float(perlOutput.get(key, np.nan)))
+            differences[key] = max(differences.get(key, 0.0), difference)
+    return differences
+
+
+_WORKER_ROUGE = None  # NativeRouge155 of a pool worker process
+
+
+def init_worker(rouge):
+    global _WORKER_ROUGE
+    _WORKER_ROUGE = rouge
+
+
+def score_in_worker(sample):
+    '''
+        input: (prepared peer, prepared models)
+        output: score() of the sample by the NativeRouge155 of the worker
+    '''
+    peer, models = sample
+    return _WORKER_ROUGE.score(peer, models)
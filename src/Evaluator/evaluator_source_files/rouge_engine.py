@@ -0,0 +1,335 @@
+'''
+    Batch ROUGE-1, ROUGE-2 and ROUGE-L (summary level) engine.
+
+    Scores are the same as rouge.Rouge().get_scores(hypothesis, reference)
+    with the default exclusive=True: text is split into sentences on '.',
+    words on ' ', and n-grams and LCS words are counted as sets.
+
+    Words are interned to integer ids. The vocabulary is built from the
+    references of a gold file by prepare_references and shared by all of
+    them, hypothesis words that no reference contains get ids local to the
+    hypothesis. ROUGE-N overlaps of a whole batch of (hypothesis, reference)
+    pairs are computed with NumPy set operations on the n-gram keys of
+    ngrams.py. ROUGE-L uses a bit-parallel LCS, one Python integer bit
+    vector per row.
+'''
+import numpy as np
+
+from .ngrams import count_ngrams_many
+
+ROUGE_TYPES = ['rouge-1', 'rouge-2', 'rouge-l']
+MULTI_REFERENCE_MODES = ['pairs', 'mean', 'max']
+ROUGE_ORDER = 2
+
+
+def split_sentences(text):
+    '''
+        Sentence splitting and whitespace normalization of the rouge package.
+    '''
+    return [' '.join(_.split()) for _ in text.split('.') if len(_) > 0]
+
+
+def split_words(text):
+    '''
+        output: the words of text in the order ROUGE-N counts them. N-grams
+        span sentence boundaries, like the rouge package.
+    '''
+    return [
+        word for sentence in split_sentences(text)
+        for word in sentence.split(' ')
+    ]
+
+
+def _intern(sentences, vocabulary, local=None):
+    '''
+        input: list of the words of every sentence
+        output: list of the word ids of every sentence. Words missing from
+        vocabulary are added to local (if given) or to vocabulary.
+    '''
+    if local is None:
+        local = vocabulary
+    offset = len(vocabulary) if local is not vocabulary else 0
+
+    internedSentences = []
+    for sentence in sentences:
+        ids = []
+        for word in sentence:
+            wordId = vocabulary.get(word)
+            if wordId is None:
+                wordId = local.get(word)
+                if wordId is None:
+                    wordId = local[word] = len(local) + offset
+            ids.append(wordId)
+        internedSentences.append(ids)
+    return internedSentences
+
+
+def _ngram_keys(ngrams):
+    '''
+        input: NgramCounts of order ROUGE_ORDER or more
+        output: dict(n: sorted unique uint64 keys of the n-grams) for n in
+        1, 2
+    '''
+    return dict(
+        (n, ngrams.order_keys(n)) for n in range(1, ROUGE_ORDER + 1))
+
+
+class _Hypothesis(object):
+    '''
+        Everything the engine needs from a hypothesis, computed once for
+        all its references.
+    '''
+    def __init__(self, hypothesis, vocabulary, ngrams):
+        sentences = split_sentences(hypothesis)
+        if not sentences:
+            raise ValueError('Hypothesis is empty.')
+
+        self.sentences = _intern(
+            [sentence.split(' ') for sentence in sentences], vocabulary, {})
+        self.ngrams = _ngram_keys(ngrams)
+        self.words = len(self.ngrams[1])
+
+        # Bit j of masks[s][wordId] is set if word j of sentence s is wordId
+        self.masks = []
+        for sentence in self.sentences:
+            masks = {}
+            for j, wordId in enumerate(sentence):
+                masks[wordId] = masks.get(wordId, 0) | (1 << j)
+            self.masks.append(masks)
+
+
+def _lcs_words(x, y, masks):
+    '''
+        input: word ids x (reference sentence) and y (hypothesis sentence),
+        masks of y
+        output: set of the words of the longest common subsequence,
+        reconstructed with the tie breaking of the rouge package.
+        Row i of the LCS table is encoded in a bit vector: entry (i, j) is
+        the number of zero bits among the low j bits of rows[i].
+    '''
+    m = len(y)
+    full = (1 << m) - 1
+    rows = [full]
+    V = full
+    for wordId in x:
+        U = V & masks.get(wordId, 0)
+        V = ((V + U) | (V - U)) & full
+        rows.append(V)
+
+    if rows[-1] == full:  # No common word
+        return set()
+
+    def table(i, j):
+        return j - bin(rows[i] & ((1 << j) - 1)).count('1')
+
+    words = set()
+    i, j = len(x), m
+    while i > 0 and j > 0:
+        if x[i - 1] == y[j - 1]:
+            words.add(x[i - 1])
+            i, j = i - 1, j - 1
+        elif table(i - 1, j) > table(i, j - 1):
+            i -= 1
+        else:
+            j -= 1
+    return words
+
+
+def _f_r_p(evaluated, reference, overlapping):
+    '''
+        Vectorized f_r_p_rouge_n of the rouge package.
+    '''
+    evaluated = evaluated.astype(np.float64)
+    reference = reference.astype(np.float64)
+    precision = np.divide(
+        overlapping, evaluated, out=np.zeros_like(evaluated),
+        where=evaluated > 0)
+    recall = np.divide(
+        overlapping, reference, out=np.zeros_like(reference),
+        where=reference > 0)
+    f1_score = 2.0 * ((precision * recall) / (precision + recall + 1e-8))
+    return {'f': f1_score, 'p': precision, 'r': recall}
+
+
+class RougeEngine(object):
+    '''
+        engine.prepare_references(references) -> prepared references
+        engine.prepare_all_references(referencesList) -> prepared references
+            of every document, sharing one vocabulary
+        engine.score_batch(hypotheses, preparedReferencesList,
+                           hypothesisNgrams=None)
+            -> {rougeType: {'f', 'p', 'r': array}} with one entry per
+               (hypothesis, reference) pair, in order, the array of the
+               hypothesis index of every pair and the counts the scores are
+               computed from:
+               {rougeType: {'evaluated', 'reference', 'overlapping': array}}
+        engine.get_scores(hypothesis, reference) -> the rouge package output
+    '''
+    def prepare_references(self, references, vocabulary=None):
+        '''
+            input: list of reference Strings, optionally the vocabulary to
+            intern them with (shared by the references of a gold file).
+            output: list of the prepared references, None for empty ones.
+        '''
+        return self.prepare_all_references([references], vocabulary)[0]
+
+    def prepare_all_references(self, referencesList, vocabulary=None,
+                               wordsList=None):
+        '''
+            input: list of the references of every document, optionally the
+            vocabulary to intern them with and the words of every sentence of
+            every reference of every document, when already split (e.g. by
+            a compiled gold file, tools/corpus.py).
+            output: list of the prepare_references of every document. The
+            n-grams of all the references are counted at once.
+        '''
+        if vocabulary is None:
+            vocabulary = {}
+        if wordsList is None:
+            wordsList = [
+                [
+                    [sentence.split(' ')
+                     for sentence in split_sentences(reference)]
+                    for reference in references
+                ]
+                for references in referencesList
+            ]
+
+        allNgrams = iter(count_ngrams_many([
+            [word for sentence in sentences for word in sentence]
+            for referencesWords in wordsList
+            for sentences in referencesWords], ROUGE_ORDER))
+
+        preparedList = []
+        for referencesWords in wordsList:
+            prepared = []
+            for sentences in referencesWords:
+                counts = next(allNgrams)
+                if not sentences:
+                    prepared.append(None)  # Scoring raises, like rouge
+                    continue
+
+                interned = _intern(sentences, vocabulary)
+                ngrams = _ngram_keys(counts)
+                prepared.append({
+                    'vocabulary': vocabulary,
+                    'ngrams': ngrams,
+                    'sentences': interned,
+                    'words': len(ngrams[1])
+                })
+            preparedList.append(prepared)
+        return preparedList
+
+    def score_batch(self, hypotheses, preparedReferencesList,
+                    hypothesisNgrams=None):
+        '''
+            hypothesisNgrams optionally gives the NgramCounts of the
+            split_words of every hypothesis, counted once for every metric.
+        '''
+        if hypothesisNgrams is None:
+            hypothesisNgrams = [None] * len(hypotheses)
+        counted = iter(count_ngrams_many([
+            split_words(hypothesis)
+            for hypothesis, ngrams in zip(hypotheses, hypothesisNgrams)
+            if ngrams is None], ROUGE_ORDER))
+        hypothesisNgrams = [
+            ngrams if ngrams is not None else next(counted)
+            for ngrams in hypothesisNgrams]
+
+        pairHypotheses, pairReferences = [], []
+        for h, (hypothesis, preparedReferences, ngrams) in enumerate(
+                zip(hypotheses, preparedReferencesList, hypothesisNgrams)):
+            if not preparedReferences:
+                continue
+            if any(reference is None for reference in preparedReferences):
+                raise ValueError('Reference is empty.')
+
+            vocabulary = preparedReferences[0]['vocabulary']
+            interned = _Hypothesis(hypothesis, vocabulary, ngrams)
+            for reference in preparedReferences:
+                pairHypotheses.append((h, interned))
+                pairReferences.append(reference)
+
+        pairs = len(pairReferences)
+        scores, counts = {}, {}
+        for n in (1, 2):
+            hypothesisCodes = [hyp.ngrams[n] for h, hyp in pairHypotheses]
+            referenceCodes = [ref['ngrams'][n] for ref in pairReferences]
+            rougeType = 'rouge-{0}'.format(n)
+            counts[rougeType] = self._rouge_n(
+                hypothesisCodes, referenceCodes, pairs)
+            scores[rougeType] = _f_r_p(**counts[rougeType])
+
+        overlapping = np.zeros(pairs)
+        for p, ((h, hyp), ref) in enumerate(
+                zip(pairHypotheses, pairReferences)):
+            union = set()
+            for x in ref['sentences']:
+                for y, masks in zip(hyp.sentences, hyp.masks):
+                    union |= _lcs_words(x, y, masks)
+            overlapping[p] = len(union)
+
+        counts['rouge-l'] = {
+            'evaluated': np.array(
+                [hyp.words for h, hyp in pairHypotheses], dtype=np.int64),
+            'reference': np.array(
+                [ref['words'] for ref in pairReferences], dtype=np.int64),
+            'overlapping': overlapping
+        }
+        scores['rouge-l'] = self._rouge_l(**counts['rouge-l'])
+
+        hypothesisIndex = np.array(
+            [h for h, hyp in pairHypotheses], dtype=np.int64)
+        return scores, hypothesisIndex, counts
+
+    def _rouge_n(self, hypothesisCodes, referenceCodes, pairs):
+        hypothesisCounts = np.array(
+            [len(codes) for codes in hypothesisCodes], dtype=np.int64)
+        referenceCounts = np.array(
+            [len(codes) for codes in referenceCodes], dtype=np.int64)
+        if not pairs:
+            return {'evaluated': hypothesisCounts,
+                    'reference': referenceCounts,
+                    'overlapping': np.zeros(0)}
+
+        # Codes are made dense so they can be tagged with their pair
+        allCodes = np.concatenate(hypothesisCodes + referenceCodes)
+        denseCodes = np.unique(allCodes, return_inverse=True)[1]
+        denseCodes = denseCodes.reshape(-1).astype(np.int64)
+        numCodes = int(denseCodes.max()) + 1 if len(denseCodes) else 1
+
+        numHypothesisCodes = int(hypothesisCounts.sum())
+        pairIds = np.arange(pairs, dtype=np.int64)
+        hypothesisPairs = np.repeat(pairIds, hypothesisCounts)
+        referencePairs = np.repeat(pairIds, referenceCounts)
+
+        hypothesisKeys = hypothesisPairs * numCodes + \
+            denseCodes[:numHypothesisCodes]
+        referenceKeys = referencePairs * numCodes + \
+            denseCodes[numHypothesisCodes:]
+
+        shared = np.isin(hypothesisKeys, referenceKeys, assume_unique=True)
+        overlapping = np.bincount(
+            hypothesisPairs[shared], minlength=pairs).astype(np.float64)
+
+        return {'evaluated': hypothesisCounts,
+                'reference': referenceCounts,
+                'overlapping': overlapping}
+
+    def _rouge_l(self, evaluated, reference, overlapping):
+        r_lcs = overlapping / reference.astype(np.float64)
+        p_lcs = overlapping / evaluated.astype(np.float64)
+        f_lcs = 2.0 * ((p_lcs * r_lcs) / (p_lcs + r_lcs + 1e-8))
+        return {'f': f_lcs, 'p': p_lcs, 'r': r_lcs}
+
+    def get_scores(self, hypothesis, reference):
+        '''
+            Same output as rouge.Rouge().get_scores(hypothesis, reference)
+        '''
+        scores, hypothesisIndex, counts = self.score_batch(
+            [hypothesis], [self.prepare_references([reference])])
+        return [dict(
+            (rougeType, dict(
+                (k, float(v[0])) for k, v in scores[rougeType].items()))
+            for rougeType in ROUGE_TYPES
+        )]
@@ -1,7 +1,4 @@
-from .summarizer_source_files.smmrRE.smmrRE import smmrRE
-from .summarizer_source_files.sumy_wrapper import sumyWrapper
-from .summarizer_source_files.Sedona import Sedona
-from .summarizer_source_files.Recollect import Recollect
+from tools.registry import PluginRegistry
 
 sumyKeys = [
     'sumylsa', 'sumyluhn', 'sumykl', 'sumylexrank',
@@ -10,6 +7,47 @@ sumyKeys = [
     'sumysumbasic', 'sumytextrank'
 ]
 
+SUMMARIZER_ENTRY_POINT_GROUP = 'text_generation_benchmark.summarizers'
+'''
+    Third party summarizers register a callable under this entry point
+    group. It is called as summarize(text, sentenceCount) and returns the
+    summary (String).
+'''
+
+SUMMARIZERS = PluginRegistry(SUMMARIZER_ENTRY_POINT_GROUP)
+SUMMARIZERS.registerModule(
+    'smmrre', '.summarizer_source_files.smmrRE.smmrRE', 'smmrRE',
+    __package__)
+SUMMARIZERS.registerModule(
+    'sedona', '.summarizer_source_files.Sedona', 'Sedona', __package__)
+SUMMARIZERS.registerModule(
+    'recollect', '.summarizer_source_files.Recollect', 'Recollect',
+    __package__)
+
+_sumyWrapper = []  # One wrapper, created when a sumy key is first fetched
+
+
+def _fetchSumyWrapper():
+    if not _sumyWrapper:
+        from .summarizer_source_files.sumy_wrapper import sumyWrapper
+        _sumyWrapper.append(sumyWrapper())
+    return _sumyWrapper[0]
+
+
+def _sumyLoader(sumyKey):
+    return lambda: _fetchSumyWrapper().summarize(sumyKey)
+
+
+for _sumyKey in sumyKeys:
+    SUMMARIZERS.register(_sumyKey, _sumyLoader(_sumyKey))
+
+
+def supportedSummarizers():
+    '''
+        output: set of the keys of the built in and installed summarizers.
+    '''
+    return SUMMARIZERS.keys()
+
 
 def fetchSummarizers(enabledSummarizers):
     '''
@@ -20,30 +58,32 @@ def fetchSummarizers(enabledSummarizers):
         purpose: Onload of summarizer switch the output of this function
         is provided to prevent cluttering the file with library
         imports. The output dictionary can be interfaced to
-        fetch the summarizer function desired.
+        fetch the summarizer function desired. Only the libraries of the
+        enabled summarizers are imported.
 
         If no library is specified this will return a None type.
         It is then the responsibility of the user to load their library in
         presumably directly in the SummarizerSwitch.
     '''
-    sumyWrap = sumyWrapper()
-    SUMMARIZERS = {
-        'smmrre': smmrRE,
-        'sedona': Sedona,
-        'recollect': Recollect
-    }
-
-    sumySummarizers = {
-        k: sumyWrap.summarize(k)
-        for k in sumyKeys
-    }
-
-    SUMMARIZERS.update(sumySummarizers)
-
     desiredSummarizers = dict(
-        (k.lower(), SUMMARIZERS[k.lower()])
+        (k.lower(), SUMMARIZERS.fetch(k))
         if k.lower() in SUMMARIZERS else (k, None)
         for k in enabledSummarizers
     )
 
     return desiredSummarizers
+
+
+def fetchSummarizerParameters(summarizerKey):
+    '''
+        input: summarizer key
+        output: dict of the library level parameters (weights, endpoints)
+        that change the summaries produced by the summarizer. Summaries
+        are cached by these parameters.
+    '''
+    if summarizerKey in sumyKeys:
+        return _fetchSumyWrapper().parameters(summarizerKey)
+    if summarizerKey in ('sedona', 'recollect'):
+        return SUMMARIZERS.fetch(summarizerKey)().parameters()
+
+    return {}
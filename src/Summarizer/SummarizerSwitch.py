@@ -1,4 +1,9 @@
+import inspect
+import os
+
 from .SummarizerLibrary import sumyKeys as SUMY_KEYS
+from .SummarizerLibrary import fetchSummarizerParameters
+from .SummarizerLibrary import SUMMARIZERS
 from tools.logger import Logger
 LOGGER = Logger.getInstance()
 
@@ -30,6 +35,21 @@ class SummarizerSwitch(object):
             for k, v in self.functionMap.items()
         )
 
+        # Summarizers installed through entry points
+        for k in self.summarizerLibrary:
+            if k not in self.functionMap and not SUMMARIZERS.isBuiltIn(k) \
+                    and self.summarizerLibrary[k] is not None:
+                self.functionMap[k] = self._pluginSwap(k)
+
+        self.summaryWordLimit = 100
+
+        self.languages = dict((k, 'english') for k in sumyKeys)
+        self.languages['recollect'] = 'en'
+
+        # Summarizers that take the sentences of the text, and the
+        # tokenizer that splits them the way the summarizer does
+        self.sentenceTokenizers = {'smmrre': 'nltk'}
+
     def joinTokenizedSentences(self, text):
         benchmark = self.benchmark
         sentenceSeperator = benchmark.sentenceSeperator
@@ -42,7 +62,22 @@ class SummarizerSwitch(object):
         newText = text.split(sentenceSeperator)
         return newText
 
-    def toggleAndExecuteSummarizer(self, summarizerKey, text):
+    def usesCompiledSentences(self, summarizerKey):
+        '''
+            output: True if the summarizer is given the sentence spans of
+            the compiled corpus (tools/corpus.py) instead of splitting the
+            text itself. Only sentences split with the tokenizer the
+            summarizer would use are given.
+        '''
+        return bool(getattr(self.benchmark, 'compiledCorpora', False)) and \
+            self.sentenceTokenizers.get(summarizerKey) == \
+            self.tokenizer.targetTokenizer.lower()
+
+    def toggleAndExecuteSummarizer(self, summarizerKey, text, spans=None):
+        '''
+            spans optionally gives the (start, end) of every sentence of the
+            text, for summarizers that usesCompiledSentences.
+        '''
         functions = self.functionMap
 
         if summarizerKey in functions:
@@ -50,7 +85,11 @@ class SummarizerSwitch(object):
             try:
                 method = functions[summarizerKey]
                 # Method should return a summary
-                summary = method(text)
+                if spans is not None and \
+                        self.usesCompiledSentences(summarizerKey):
+                    summary = method(text, spans)
+                else:
+                    summary = method(text)
             except Exception as err:
                 # Failed summaries are logged so they can be investigated.
                 LOGGER.error(str(err))
@@ -60,9 +99,51 @@ class SummarizerSwitch(object):
         error = '{0}: Is not an available summarizer'.format(summarizerKey)
         raise ValueError(error)
 
+    def summarizerParameters(self, summarizerKey):
+        '''
+            input: summarizer key
+            output: dict of every setting that affects the summaries
+            returned by toggleAndExecuteSummarizer for that summarizer.
+        '''
+        benchmark = self.benchmark
+
+        parameters = {
+            'sentence_count': benchmark.sentenceCount,
+            'pre_tokenized': benchmark.preTokenized,
+            'sentence_seperator': benchmark.sentenceSeperator,
+            'tokenizer': self.tokenizer.targetTokenizer.lower(),
+            'summary_word_limit': self.summaryWordLimit,
+            'language': self.languages.get(summarizerKey)
+        }
+        if self.usesCompiledSentences(summarizerKey):
+            parameters['compiled_sentences'] = True
+        parameters.update(fetchSummarizerParameters(summarizerKey))
+
+        return parameters
+
+    def summarizerSourceFiles(self, summarizerKey):
+        '''
+            input: summarizer key
+            output: list of the source files whose code produces the
+            summaries of that summarizer. Used to notice code changes.
+        '''
+        tokenizerModule = inspect.getmodule(self.tokenizer)
+        sourceFiles = [
+            os.path.abspath(__file__),
+            inspect.getsourcefile(tokenizerModule)
+        ]
+
+        summarizer = self.summarizerLibrary.get(summarizerKey)
+        try:
+            sourceFiles.append(inspect.getsourcefile(summarizer))
+        except TypeError:  # No library method, or a builtin
+            pass
+
+        return sourceFiles
+
     def _truncateSummary(self, summary):
         summaryWordTokens = self.tokenizer.word_tokenize(summary)
-        numWords = min(100, len(summaryWordTokens))
+        numWords = min(self.summaryWordLimit, len(summaryWordTokens))
         summaryTokenSubset = summaryWordTokens[0:numWords]
 
         truncatedSummary = ''.join(summaryTokenSubset)
@@ -78,7 +159,7 @@ class SummarizerSwitch(object):
             text = self.joinTokenizedSentences(text)
 
         RecollectClass = self.summarizerLibrary['recollect']
-        LANGUAGE = 'en'
+        LANGUAGE = self.languages['recollect']
         recollect = RecollectClass(LANGUAGE)
 
         summary = recollect.summarize(text, numSentences)
@@ -100,7 +181,7 @@ class SummarizerSwitch(object):
 
         return summary
 
-    def _smmrre(self, text):
+    def _smmrre(self, text, spans=None):
         benchmark = self.benchmark
         numSentences = benchmark.sentenceCount
 
@@ -108,13 +189,32 @@ class SummarizerSwitch(object):
             # smmrRE expects text to not be pretokenized
             text = self.joinTokenizedSentences(text)
 
+        # The spans of a compiled corpus are those of the joined text
+        sentences = None
+        if spans is not None:
+            sentences = [text[start:end] for start, end in spans.tolist()]
+
         smmrREClass = self.summarizerLibrary['smmrre']
-        smmrRE = smmrREClass(text)
+        smmrRE = smmrREClass(text, sentences)
 
         summary = smmrRE.summarize(numSentences)
 
         return summary
 
+    def _pluginSwap(self, pluginKey):
+        def pluginFunc(text):
+            benchmark = self.benchmark
+            numSentences = benchmark.sentenceCount
+
+            if benchmark.preTokenized:
+                text = self.joinTokenizedSentences(text)
+
+            summarize = self.summarizerLibrary[pluginKey]
+            summary = summarize(text, numSentences)
+
+            return summary
+        return pluginFunc
+
     def _sumySwap(self, sumyMethodKey):
         def sumyFunc(text):
             benchmark = self.benchmark
@@ -125,7 +225,8 @@ class SummarizerSwitch(object):
                 text = self.joinTokenizedSentences(text)
 
             summarizer = self.summarizerLibrary[sumyMethodKey]
-            summary = summarizer(text, numSentences, 'english')
+            summary = summarizer(
+                text, numSentences, self.languages[sumyMethodKey])
 
             return summary
         return sumyFunc
@@ -14,6 +14,16 @@ class Recollect:
         recollectResponseBody = r.text
         return recollectResponseBody
 
+    def parameters(self):
+        '''
+            Settings that change the returned summary, excluding the text.
+        '''
+        return {
+            'URL': self.URL,
+            'language': self.language,
+            'summarizationUnit': 'sentence'
+        }
+
     def createRequestBody(self, text, numSentences):
 
         return {
@@ -12,6 +12,18 @@ class Sedona:
         self.charsPerWord = 6
         self.numSummaries = 1
 
+    def parameters(self):
+        '''
+            Settings that change the returned summary, excluding the text.
+        '''
+        return {
+            'URL': self.URL,
+            'highlightCoverage': self.highlightCoverage,
+            'charsPerSentence': self.charsPerSentence,
+            'charsPerWord': self.charsPerWord,
+            'numSummaries': self.numSummaries
+        }
+
     def processText(self, text):
         '''
             Input: Text
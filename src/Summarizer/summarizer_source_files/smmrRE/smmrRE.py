@@ -6,39 +6,56 @@ from collections import defaultdict
 from math import log
 
 
+import heapq
 import re
 
-from .ll import *  # import ListNode, LinkedList
 from nltk.corpus import stopwords
-import string
 
 stemmer = PorterStemmer()
 
 STOP_WORDS_SET = set(stopwords.words('english'))
-LOWERCASE = set(string.ascii_lowercase).union(
-    set(["0", "1", "2", "3", "4", "5", "6", "7", "8", "9"])
-)
 
-UPPERCASE = set(string.ascii_uppercase)
+MULTIPLE_SPACES = re.compile(' +')
+# Words only keep ASCII letters and digits. Spaces are kept so a sentence is
+# pruned at once and then split into its words.
+NON_ALPHANUMERIC = re.compile('[^a-zA-Z0-9 ]+')
 
 
 class smmrRE:
-    def __init__(self, rawText):
-        rawText = re.sub(' +', ' ', rawText)  # Removes double spaces
+    '''
+        Ranks the sentences of a text by the sum of the points of their
+        words, log(occurrences) of the stem of every word that is not a stop
+        word, and summarizes it with the best ones in text order.
+        Every distinct word is stemmed once, the stems of all the words are
+        kept in one list (self.stems, with the offsets of every sentence in
+        self.sentenceOffsets) and the best sentences are selected with a
+        heap. Ties go to the earlier sentence.
+    '''
+    def __init__(self, rawText, sentences=None):
+        '''
+            sentences optionally gives the sentences of rawText, already
+            split with NLTK (e.g. by a compiled corpus, tools/corpus.py).
+        '''
+        rawText = MULTIPLE_SPACES.sub(' ', rawText)  # Removes double spaces
         self.stemSet = defaultdict(set)
-        self.sentences = tokenize.sent_tokenize(rawText)
+        if sentences is None:
+            self.sentences = tokenize.sent_tokenize(rawText)
+        else:
+            self.sentences = [
+                MULTIPLE_SPACES.sub(' ', sentence) for sentence in sentences]
         self.prunedSentences = self.pruneSentences()
         self.occurences = defaultdict(lambda: 0)
-        self.maxHeap = LinkedList()
         self.totalWords = 0
 
     def summarize(self, numSentences=5):
         numSentences = min(numSentences, len(self.sentences))
         self.associateGrammarCounterParts()
         self.assignPointsToStems()
-        self.rankSentences()
+        popularities = self.rankSentences()
 
-        topSentencesIndicies = self.maxHeap.topIndices(numSentences)
+        topSentencesIndicies = heapq.nlargest(
+            numSentences, range(len(popularities)),
+            key=popularities.__getitem__)
 
         topSentencesIndicies.sort()
 
@@ -55,72 +72,61 @@ class smmrRE:
         return summary
 
     def pruneSentences(self):
-        sentences = self.sentences
-        prunedSentences = [
-            [self.pruneWord(word) for word in sentence.split(" ")]
-            for sentence in sentences
+        '''
+            output: list of the words of every sentence, split on spaces and
+            stripped of everything but ASCII letters and digits. Empty words
+            are dropped.
+        '''
+        return [
+            [word for word in NON_ALPHANUMERIC.sub('', sentence).split(' ')
+             if word]
+            for sentence in self.sentences
         ]
 
-        strippedPrunedSentences = [  # Strip sentences of empty strings
-            list(filter(None, sentence_word_list))
-            for sentence_word_list in prunedSentences]
-
-        return strippedPrunedSentences
-
-    def pruneWord(self, word):
-        prunedWord = ''.join(char for char in word if self.isAlpha(char))
-        return prunedWord
-
-    def isAlpha(self, char):
-        return (char in LOWERCASE) or (char in UPPERCASE)
-
     def associateGrammarCounterParts(self):
+        '''
+            Stems every distinct lowercased word once and fills self.stems,
+            the stem of every word that is not a stop word, sentence after
+            sentence, with the occurrences of every stem.
+        '''
+        stems = {}  # Lowercased word: stem, None for stop words
+        self.stems = []
+        self.sentenceOffsets = [0]
         for sentence in self.prunedSentences:
-            self.associateGrammarCounterPartsForSentence(sentence)
+            for word in sentence:
+                wordLower = word.lower()
+                if wordLower not in stems:
+                    stems[wordLower] = None \
+                        if wordLower in STOP_WORDS_SET \
+                        else stemmer.stem(wordLower)
+
+                stem = stems[wordLower]
+                if stem is not None:
+                    self.stemSet[stem].add(wordLower)
+                    self.occurences[stem] += 1
+                    self.stems.append(stem)
+            self.sentenceOffsets.append(len(self.stems))
+        self.totalWords = len(self.stems)
 
         return self.stemSet
 
-    def associateGrammarCounterPartsForSentence(self, sentence):
-        for word in sentence:
-            wordLower = word.lower()
-            if wordLower not in STOP_WORDS_SET:
-                stem = stemmer.stem(wordLower)
-                self.stemSet[stem].add(wordLower)
-                self.occurences[stem] += 1
-                self.totalWords += 1
-
     def assignPointsToStems(self):
         self.points = {
-            stem: log(self.fetchCount(stem))
-            for stem in self.stemSet
+            stem: log(count)
+            for stem, count in self.occurences.items()
         }
-        # { stem: log(self.fetchCount(stem)) for stem in self.stemSet }
         return self.points
 
-    def fetchCount(self, stem):
-        return self.occurences[stem]
-
     def rankSentences(self):
-        sentences = self.prunedSentences
-
-        for index in range(len(sentences)):
-            sentence = sentences[index]
-            popularity = self.calculateSentencePopularity(sentence)
-            self.maxHeap.insertVal(popularity, index)
-
-    def calculateSentencePopularity(self, sentence):
-        wordPoints = []
-        for word in sentence:
-            wordLower = word.lower()
-            if wordLower not in STOP_WORDS_SET:
-                stem = stemmer.stem(wordLower)
-                points = self.points[stem]
-                wordPoints.append(points)
-
-        if not wordPoints:
-            return 0
-
-        popularity = float(sum(wordPoints))
-        # / float(len(wordPoints))
-
-        return popularity
+        '''
+            output: list of the popularity of every sentence, the sum of the
+            points of its words in order (0 without any).
+        '''
+        points = self.points
+        stems = self.stems
+        offsets = self.sentenceOffsets
+        return [
+            float(sum(points[stem] for stem in stems[start:end]))
+            if end > start else 0
+            for start, end in zip(offsets, offsets[1:])
+        ]
@@ -49,6 +49,34 @@ class sumyWrapper:
             these weights to your needs. They will result in varied
             evaluation scores.
         '''
+        self.edmundsonKeyWeight = 1.0
+
+        self.edmundsonLocationWeights = {
+            'w_h': 1,
+            'w_p1': 1,
+            'w_p2': 1,
+            'w_s1': 1,
+            'w_s2': 1
+        }
+
+        self.edmundsonCueWeights = {
+            'bunus_word_weight': 1,
+            'stigma_word_weight': 1
+        }
+
+    def parameters(self, target):
+        '''
+            input: sumy summarizer key
+            output: dict of the weights that change the output of the
+            summarizer. Used to key cached summaries.
+        '''
+        if target == 'sumyedmundsonkey':
+            return {'weight': self.edmundsonKeyWeight}
+        if target == 'sumyedmundsonlocation':
+            return dict(self.edmundsonLocationWeights)
+        if target == 'sumyedmundsoncue':
+            return dict(self.edmundsonCueWeights)
+        return {}
 
     def summarize(self, target):
         if target in self.specialMethods:
@@ -86,7 +114,7 @@ class sumyWrapper:
         summarizer = EdmundsonKeyMethod(stemmer, bonusWords)
         summarizer.stop_words = get_stop_words(LANGUAGE)
 
-        weight = 1.0
+        weight = self.edmundsonKeyWeight
         summaryList = summarizer(parser.document, SENTENCES_COUNT, weight)
         summary = ''.join([str(sentence) for sentence in summaryList])
 
@@ -101,11 +129,12 @@ class sumyWrapper:
         summarizer = EdmundsonLocationMethod(stemmer, nullWords)
         summarizer.stop_words = get_stop_words(LANGUAGE)
 
-        w_h = 1
-        w_p1 = 1
-        w_p2 = 1
-        w_s1 = 1
-        w_s2 = 1
+        weights = self.edmundsonLocationWeights
+        w_h = weights['w_h']
+        w_p1 = weights['w_p1']
+        w_p2 = weights['w_p2']
+        w_s1 = weights['w_s1']
+        w_s2 = weights['w_s2']
         summaryList = summarizer(
             parser.document, SENTENCES_COUNT, w_h, w_p1, w_p2, w_s1, w_s2)
         summary = ''.join([str(sentence) for sentence in summaryList])
@@ -121,8 +150,9 @@ class sumyWrapper:
         summarizer = EdmundsonCueMethod(stemmer, bonusWords, stigmaWords)
         summarizer.stop_words = get_stop_words(LANGUAGE)
 
-        bunus_word_weight = 1
-        stigma_word_weight = 1
+        weights = self.edmundsonCueWeights
+        bunus_word_weight = weights['bunus_word_weight']
+        stigma_word_weight = weights['stigma_word_weight']
         summaryList = summarizer(
             parser.document, SENTENCES_COUNT,
             bunus_word_weight, stigma_word_weight)
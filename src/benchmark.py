@@ -4,10 +4,16 @@ import json
 import glob
 import os
 import codecs
+import itertools
+import multiprocessing
+import threading
 from tools.SRO import SummaryReaderObject
+from tools.corpus import openCompiledCorpus, compileDataSet
+from tools.checkpoint import SummaryCheckpoint
+from tools.cache import SummaryCache
+from tools.manifest import RunManifest
 
 from tqdm import tqdm
-from tools.plot import plotFormatter, csvPlotter
 from tools.utils import (
     fileLen,
     createFolderIfNotExists,
@@ -16,11 +22,16 @@ from tools.utils import (
 
 from collections import defaultdict
 from datetime import datetime
+from functools import partial
 
-from Summarizer.SummarizerLibrary import fetchSummarizers
+from Summarizer.SummarizerLibrary import (
+    fetchSummarizers,
+    supportedSummarizers
+)
 from Summarizer.SummarizerSwitch import SummarizerSwitch
 
 from Evaluator.EvaluatorSwitch import EvaluatorSwitch
+from Evaluator.EvaluatorLibrary import supportedEvaluators
 
 from tools.defaults import (
     SUPPORTED_EVAL_SYSTEMS,
@@ -29,11 +40,39 @@ from tools.defaults import (
     DEFAULT_TOKENIZER,
     DEFAULT_TEXT_SEPERATOR,
     DEFAULT_SENTENCE_SEPERATOR,
-    DEFAULT_SENTENCE_COUNT
+    DEFAULT_SENTENCE_COUNT,
+    DEFAULT_WORKERS,
+    DEFAULT_CACHE_MAX_SIZE_MB,
+    NON_CACHEABLE_SUMMARIZERS,
+    DEFAULT_STREAMING_WINDOW,
+    DEFAULT_TOKENIZER_BATCH_SIZE,
+    DEFAULT_TOKENIZER_PROCESSES,
+    DEFAULT_ROUGE_MULTI_REFERENCE,
+    ROUGE_MULTI_REFERENCE_MODES,
+    DEFAULT_METRIC_LEVEL,
+    DEFAULT_METEOR_WORKERS,
+    DEFAULT_METEOR_MEMORY,
+    DEFAULT_METEOR_BULK,
+    DEFAULT_METEOR_BULK_MIN_SAMPLES,
+    DEFAULT_CIDER_VARIANT,
+    CIDER_VARIANTS,
+    DEFAULT_PYROUGE_WORKERS,
+    DEFAULT_PYROUGE_CHUNK_SIZE,
+    DEFAULT_PYROUGE_ENGINE,
+    PYROUGE_ENGINES,
+    DEFAULT_PYROUGE_OPTIONS,
+    METRIC_LEVELS,
+    DEFAULT_SIGNIFICANCE_RESAMPLES,
+    DEFAULT_SIGNIFICANCE_CONFIDENCE,
+    DEFAULT_SIGNIFICANCE_SEED,
+    DEFAULT_RESOURCE_CLASS,
+    DEFAULT_RESOURCE_LIMITS,
+    SUMMARIZER_RESOURCE_CLASSES
 )
 
 from tools.logger import Logger
 from tools.tokenizer import Tokenizer
+from tools.scheduler import Job, JobScheduler
 
 dirname, filename = os.path.split(os.path.abspath(__file__))
 os.chdir(dirname)  # Change the current working directory
@@ -42,6 +81,19 @@ os.chdir(dirname)  # Change the current working directory
 
 LOGGER = Logger.getInstance()
 
+PLOT_OUTPUT_FOLDERS = [
+    os.path.join('..', 'figs'),
+    os.path.join('..', 'results')
+]
+
+_WORKER_SUMMARIZER_SWITCH = None  # Set by the parent process right before
+# the summarization pool forks. Workers inherit it copy-on-write.
+
+try:  # Python 3
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
 try:  # Used for Python 2 compatibility
     import sys
     reload(sys)
@@ -50,6 +102,33 @@ except NameError:
     pass
 
 
+def _summarizeJob(summarizerSwitch, job):
+    '''
+        input: summarizer switch and
+            tuple(index, summarizerKey, text, cacheKey, cachedSummary,
+                  sentence spans of the compiled corpus or None)
+        output: tuple(index, cacheKey, summary, cached)
+            summary is None on failure. cached is True when the summary
+            came from the summary cache and the summarizer was not called.
+    '''
+    index, summarizerKey, text, cacheKey, summary, spans = job
+    if summary is not None:
+        return index, cacheKey, summary, True
+
+    summary = summarizerSwitch.toggleAndExecuteSummarizer(
+        summarizerKey, text, spans)
+    return index, cacheKey, summary, False
+
+
+def _summarizeInWorker(job):
+    '''
+        Entry point for summarization pool workers. The summarizer
+        switch, and with it the spaCy, NLTK and sumy state, is inherited
+        from the parent at fork time instead of being loaded again.
+    '''
+    return _summarizeJob(_WORKER_SUMMARIZER_SWITCH, job)
+
+
 class benchmark:
     def __init__(self):
         # Generate Benchmark Tool Folders
@@ -81,28 +160,39 @@ class benchmark:
             'summarizers',
             expect_list=True)
 
-        self.validateOptions(summarizers, SUPPORTED_SUMMARIZERS)
+        self.validateOptions(
+            summarizers, SUPPORTED_SUMMARIZERS | supportedSummarizers())
         self.summarizers = summarizers
         # Load Evaluatos
         evaluators = self.fetchSettingByKey(
             'evaluation_systems',
             expect_list=True)
 
-        self.validateOptions(evaluators, SUPPORTED_EVAL_SYSTEMS)
+        self.validateOptions(
+            evaluators, SUPPORTED_EVAL_SYSTEMS | supportedEvaluators())
         self.evaluators = evaluators
 
         # Load Tokenizer
         tokenizer = self.fetchSettingByKey('tokenizer')
         self.validateOption(tokenizer, SUPPORTED_TOKENIZERS)
         self.tokenizer = tokenizer if tokenizer else DEFAULT_TOKENIZER
-        self.tokenizer = Tokenizer(self.tokenizer)
+        tokenizerBatchSize = self.fetchSettingByKey(
+            'tokenizer_batch_size', default=DEFAULT_TOKENIZER_BATCH_SIZE)
+        tokenizerProcesses = self.fetchSettingByKey(
+            'tokenizer_processes', default=DEFAULT_TOKENIZER_PROCESSES)
+        self.tokenizer = Tokenizer(
+            self.tokenizer,
+            batchSize=max(int(tokenizerBatchSize), 1),
+            nProcess=max(int(tokenizerProcesses), 1))
 
         # Load Evaluation Systems
         evaluationSystems = self.fetchSettingByKey(
             'evaluation_systems',
             expect_list=True)
 
-        self.validateOptions(evaluationSystems, SUPPORTED_EVAL_SYSTEMS)
+        self.validateOptions(
+            evaluationSystems,
+            SUPPORTED_EVAL_SYSTEMS | supportedEvaluators())
         self.evaluationSystems = evaluationSystems
 
         # Load States
@@ -115,17 +205,151 @@ class benchmark:
         preTokenized = self.evaluateBoolean(preTokenized)
         self.preTokenized = preTokenized if preTokenized else False
 
+        # Load Compiled Corpora
+        compiledCorpora = self.fetchSettingByKey(
+            'compiled', section='corpus', default=None)
+        self.compiledCorpora = self.evaluateBoolean(compiledCorpora)
+
         # load summarizers
         self.summarizerLibrary = fetchSummarizers(summarizers)
         self.summarizerSwitch = SummarizerSwitch(self)
 
         # load evaluators
-        self.evaluatorSwitch = EvaluatorSwitch(evaluators, self.tokenizer)
+        goldCacheEnabled = self.fetchSettingByKey(
+            'gold_references', section='cache', default=None)
+        goldCacheFolder = os.path.join('..', 'cache', 'gold') \
+            if self.evaluateBoolean(goldCacheEnabled) else None
+
+        rougeMultiReference = self.fetchSettingByKey(
+            'multi_reference', section='rouge',
+            default=DEFAULT_ROUGE_MULTI_REFERENCE).lower()
+        self.validateOption(rougeMultiReference, ROUGE_MULTI_REFERENCE_MODES)
+
+        evaluatorOptions = {
+            'rouge': {'multiReference': rougeMultiReference}
+        }
+        for evaluatorKey in ['rouge', 'bleu', 'meteor', 'nist']:
+            level = self.fetchSettingByKey(
+                'level', section=evaluatorKey,
+                default=DEFAULT_METRIC_LEVEL).lower()
+            self.validateOption(level, METRIC_LEVELS)
+            evaluatorOptions.setdefault(evaluatorKey, {})['level'] = level
+
+        meteorBulk = self.fetchSettingByKey(
+            'bulk', section='meteor', default=str(DEFAULT_METEOR_BULK))
+        evaluatorOptions['meteor']['bulk'] = self.evaluateBoolean(meteorBulk)
+        evaluatorOptions['meteor']['bulkMinSamples'] = int(
+            self.fetchSettingByKey(
+                'bulk_min_samples', section='meteor',
+                default=DEFAULT_METEOR_BULK_MIN_SAMPLES))
+
+        evaluatorOptions['pyrouge'] = {
+            'workers': max(int(self.fetchSettingByKey(
+                'workers', section='pyrouge',
+                default=DEFAULT_PYROUGE_WORKERS)), 1),
+            'chunkSize': max(int(self.fetchSettingByKey(
+                'chunk_size', section='pyrouge',
+                default=DEFAULT_PYROUGE_CHUNK_SIZE)), 1)
+        }
+        ciderVariant = self.fetchSettingByKey(
+            'variant', section='cider',
+            default=DEFAULT_CIDER_VARIANT).lower()
+        self.validateOption(ciderVariant, CIDER_VARIANTS)
+        evaluatorOptions['cider'] = {'variant': ciderVariant}
+
+        pyRougeEngine = self.fetchSettingByKey(
+            'engine', section='pyrouge',
+            default=DEFAULT_PYROUGE_ENGINE).lower()
+        self.validateOption(pyRougeEngine, PYROUGE_ENGINES)
+        if pyRougeEngine == 'native':
+            evaluatorOptions['pyrouge']['options'] = self.fetchSettingByKey(
+                'options', section='pyrouge',
+                default=DEFAULT_PYROUGE_OPTIONS)
+            evaluatorOptions['pyrouge']['dataDir'] = self.fetchSettingByKey(
+                'data_dir', section='pyrouge', default=None) or None
+
+        storeSampleScores = self.evaluateBoolean(self.fetchSettingByKey(
+            'enabled', section='scores', default=None))
+
+        meteorWorkers = self.fetchSettingByKey(
+            'workers', section='meteor', default=DEFAULT_METEOR_WORKERS)
+        meteorDaemon = self.fetchSettingByKey(
+            'daemon', section='meteor', default=None)
+        libraryOptions = {
+            'meteor': {
+                'workers': max(int(meteorWorkers), 1),
+                'memory': self.fetchSettingByKey(
+                    'memory', section='meteor',
+                    default=DEFAULT_METEOR_MEMORY),
+                'daemon': self.evaluateBoolean(meteorDaemon),
+                'socket': self.fetchSettingByKey(
+                    'socket', section='meteor',
+                    default=os.path.join('..', 'cache', 'meteor.sock'))
+            },
+            'pyrouge': {'engine': pyRougeEngine}
+        }
+
+        self.evaluatorSwitch = EvaluatorSwitch(
+            evaluators, self.tokenizer, goldCacheFolder=goldCacheFolder,
+            evaluatorOptions=evaluatorOptions,
+            storeSampleScores=storeSampleScores,
+            libraryOptions=libraryOptions,
+            compiledCorpora=self.compiledCorpora)
 
         sentenceCount = self.fetchSettingByKey('sentence_count')
         self.sentenceCount = int(sentenceCount) if sentenceCount \
             else DEFAULT_SENTENCE_COUNT
 
+        workers = self.fetchSettingByKey('workers', default=DEFAULT_WORKERS)
+        self.workers = max(int(workers), 1) if workers else DEFAULT_WORKERS
+        self.summarizationPool = None  # Shared by the scheduled jobs
+
+        # Load Summary Cache
+        self.summaryCache = self.initSummaryCache()
+
+        # Load Run Manifest
+        self.manifest = self.initManifest()
+
+        # Load Streaming Pipeline
+        streamingEnabled = self.fetchSettingByKey(
+            'enabled', section='streaming', default=None)
+        self.streamingEnabled = self.evaluateBoolean(streamingEnabled)
+
+        writeSummaries = self.fetchSettingByKey(
+            'write_summaries', section='streaming', default='true')
+        self.streamingWritesSummaries = self.evaluateBoolean(writeSummaries)
+
+        streamingWindow = self.fetchSettingByKey(
+            'window', section='streaming', default=DEFAULT_STREAMING_WINDOW)
+        self.streamingWindow = max(int(streamingWindow), 1)
+
+        # Load Significance Tests
+        significanceEnabled = self.fetchSettingByKey(
+            'enabled', section='significance', default=None)
+        self.significanceEnabled = self.evaluateBoolean(significanceEnabled)
+
+        self.significanceResamples = int(self.fetchSettingByKey(
+            'resamples', section='significance',
+            default=DEFAULT_SIGNIFICANCE_RESAMPLES))
+        self.significanceConfidence = float(self.fetchSettingByKey(
+            'confidence', section='significance',
+            default=DEFAULT_SIGNIFICANCE_CONFIDENCE))
+        self.significanceSeed = int(self.fetchSettingByKey(
+            'seed', section='significance',
+            default=DEFAULT_SIGNIFICANCE_SEED))
+        self.significanceTree = {}
+
+        # Load Scheduler
+        schedulerEnabled = self.fetchSettingByKey(
+            'enabled', section='scheduler', default=None)
+        self.schedulerEnabled = self.evaluateBoolean(schedulerEnabled)
+
+        self.resourceLimits = dict(
+            (resourceClass, int(self.fetchSettingByKey(
+                resourceClass, section='scheduler', default=limit)))
+            for resourceClass, limit in DEFAULT_RESOURCE_LIMITS.items()
+        )
+
         self.failedIndicies = defaultdict(dict)  # Dict of sampleFilePaths
         # And the indices unsuccesfully summarized, grouped by summarizer
         # This is used for evaluations. If the summarization of a specific
@@ -185,6 +409,34 @@ class benchmark:
         settings.read(settingsFilepath)
         return settings
 
+    def initSummaryCache(self):
+        cacheEnabled = self.fetchSettingByKey(
+            'enabled', section='cache', default=None)
+        if not self.evaluateBoolean(cacheEnabled):
+            return None
+
+        maxSizeMB = self.fetchSettingByKey(
+            'max_size_mb', section='cache',
+            default=DEFAULT_CACHE_MAX_SIZE_MB)
+
+        cacheFolder = os.path.join('..', 'cache')
+        createFolderIfNotExists(cacheFolder)
+
+        return SummaryCache(
+            os.path.join(cacheFolder, 'summaries.sqlite'),
+            int(float(maxSizeMB) * 1024 * 1024))
+
+    def initManifest(self):
+        manifestEnabled = self.fetchSettingByKey(
+            'enabled', section='manifest', default=None)
+        if not self.evaluateBoolean(manifestEnabled):
+            return None
+
+        cacheFolder = os.path.join('..', 'cache')
+        createFolderIfNotExists(cacheFolder)
+
+        return RunManifest(os.path.join(cacheFolder, 'manifest.json'))
+
     def validateOption(self, suppliedOption, validOptionsSet):
         suppliedOption = suppliedOption.lower()
         if suppliedOption not in validOptionsSet:
@@ -227,6 +479,12 @@ class benchmark:
 
         settings = self.settings
 
+        if 'default' in kwargs:
+            # Optional settings fall back to their default when the
+            # section or key is missing from settings.ini
+            if not settings.has_option(section, key):
+                return kwargs['default']
+
         if expectList:
             targetedSetting = settings.get(section, key)
             targetedSettingList = targetedSetting.replace(' ', '').split(',')
@@ -275,7 +533,18 @@ class benchmark:
         return summaryFileName
 
     def skipSummaryGen(self, generatedSummariesFilePath,
-                       corpusFilePath, summarizerKey):
+                       corpusFilePath, summarizerKey, checkpoint=None):
+        if checkpoint is not None and checkpoint.exists():
+            if checkpoint.isComplete(fileLen(corpusFilePath)):
+                LOGGER.info(
+                    'Skipping Summary Generation. Summaries Aready Exist for '
+                    'Corpus: {0} using summarizer: {1} with {2} failed '
+                    'summaries.'
+                    .format(corpusFilePath, summarizerKey,
+                            len(checkpoint.failedIndicies)))
+                return True
+            return False
+
         if fileExists(generatedSummariesFilePath):
             if fileLen(corpusFilePath) == fileLen(generatedSummariesFilePath):
                 LOGGER.info(
@@ -287,6 +556,164 @@ class benchmark:
 
         return False
 
+    def summaryFingerprint(self, corpusFilePath, summarizerKey):
+        '''
+            input: path to corpus and summarizer key
+            output: everything the summaries of the corpus are built from:
+            the corpus contents, the effective summarizer configuration and
+            the summarizer source code.
+        '''
+        manifest = self.manifest
+        summarizerSwitch = self.summarizerSwitch
+        return {
+            'corpus': manifest.fileHash(corpusFilePath),
+            'summarizer': summarizerKey,
+            'parameters': summarizerSwitch.summarizerParameters(
+                summarizerKey),
+            'source': manifest.sourceHash(
+                summarizerSwitch.summarizerSourceFiles(summarizerKey))
+        }
+
+    def generateSummaries(self, summarizerKey, samples, startIndex=0,
+                          corpus=None):
+        '''
+            input: summarizer key, an iterable of corpus lines and optionally
+            the TokenizedCorpus of the compiled corpus
+            output: generator of tuple(index, summary) in corpus order.
+            summary is None (or empty) when summarization failed.
+        '''
+        summarizerSwitch = self.summarizerSwitch
+        jobs = self._summarizationJobs(
+            summarizerKey, samples, startIndex, corpus)
+
+        if self.summarizationPool is not None:
+            # Shared by every job, see startSummarizationPool
+            for result in self.summarizationPool.imap(
+                    _summarizeInWorker, jobs):
+                yield self._storeSummary(result)
+            return
+
+        if self.workers > 1:
+            # The first document is summarized in this process so that any
+            # lazily loaded models are warm before the pool forks. Workers
+            # then share that state copy-on-write.
+            for job in jobs:
+                yield self._storeSummary(
+                    _summarizeJob(summarizerSwitch, job))
+                break
+
+            pool = self._createSummarizationPool()
+            if pool is not None:
+                try:  # imap keeps the results in corpus order
+                    for result in pool.imap(_summarizeInWorker, jobs):
+                        yield self._storeSummary(result)
+                finally:
+                    pool.terminate()
+                    pool.join()
+                return
+
+        for job in jobs:
+            yield self._storeSummary(_summarizeJob(summarizerSwitch, job))
+
+    def _summarizationJobs(self, summarizerKey, samples, startIndex,
+                           corpus=None):
+        '''
+            Generates the jobs for _summarizeJob. Documents already in the
+            summary cache carry their cached summary and no text, so they
+            are never sent to a summarizer or a worker. With a compiled
+            corpus, the others carry the spans of their sentences.
+            Summarizers in NON_CACHEABLE_SUMMARIZERS bypass the cache.
+        '''
+        cache = self.summaryCache
+        if summarizerKey in NON_CACHEABLE_SUMMARIZERS:
+            cache = None
+        parameters = None
+        if cache is not None:
+            parameters = self.summarizerSwitch.summarizerParameters(
+                summarizerKey)
+
+        for index, text in enumerate(samples, startIndex):
+            cacheKey, summary = None, None
+            if cache is not None:
+                cacheKey = cache.makeKey(summarizerKey, parameters, text)
+                summary = cache.get(cacheKey)
+                if summary is not None:
+                    text = None
+            spans = None
+            if corpus is not None and text is not None and \
+                    index < len(corpus):
+                spans = corpus.spans('sentences', index)[0]
+            yield index, summarizerKey, text, cacheKey, summary, spans
+
+    def _storeSummary(self, result):
+        '''
+            Adds newly generated summaries to the summary cache.
+            output: tuple(index, summary)
+        '''
+        index, cacheKey, summary, cached = result
+        if summary and not cached and cacheKey is not None:
+            self.summaryCache.put(cacheKey, summary)
+        return index, summary
+
+    def warmSummarizers(self):
+        '''
+            Summarizes the first document of the first corpus with every
+            local summarizer in this process, so the models and data they
+            load lazily are loaded once, before a pool forks, and shared
+            copy-on-write by its workers. Remote summarizers only hold a
+            client and are not called.
+        '''
+        if not self.corpusFilepaths:
+            return
+        with codecs.open(self.corpusFilepaths[0], 'rb+', 'utf-8') as f:
+            text = f.readline()
+
+        for summarizerKey in self.summarizerLibrary:
+            if SUMMARIZER_RESOURCE_CLASSES.get(
+                    summarizerKey, DEFAULT_RESOURCE_CLASS) != \
+                    DEFAULT_RESOURCE_CLASS:
+                continue
+            LOGGER.info('Loading summarizer: {0}'.format(summarizerKey))
+            self.summarizerSwitch.toggleAndExecuteSummarizer(
+                summarizerKey, text)
+
+    def startSummarizationPool(self):
+        '''
+            With self.workers > 1, warms the summarizers and forks
+            self.summarizationPool, used by generateSummaries until
+            stopSummarizationPool. Runs that summarize outside of the main
+            thread start it first, so no thread is running when it forks.
+        '''
+        if self.workers > 1:
+            self.warmSummarizers()
+            self.summarizationPool = self._createSummarizationPool()
+
+    def stopSummarizationPool(self):
+        if self.summarizationPool is not None:
+            self.summarizationPool.terminate()
+            self.summarizationPool.join()
+            self.summarizationPool = None
+
+    def _createSummarizationPool(self):
+        '''
+            Returns a forking process pool of self.workers processes, or
+            None when the platform cannot fork (workers would have to
+            reload every model).
+        '''
+        global _WORKER_SUMMARIZER_SWITCH
+        try:
+            context = multiprocessing.get_context('fork')
+        except AttributeError:  # Python 2 always forks on POSIX
+            context = multiprocessing
+        except ValueError:
+            LOGGER.warning(
+                'Process forking is unavailable on this platform. '
+                'Summarizing with a single process.')
+            return None
+
+        _WORKER_SUMMARIZER_SWITCH = self.summarizerSwitch
+        return context.Pool(self.workers)
+
     def runSummarizationsForCorpus(self, corpusFilePath, summarizerKey):
         generatedSummariesFilePath = self.generateSummaryFilePath(
             corpusFilePath, summarizerKey
@@ -300,43 +727,106 @@ class benchmark:
         self.corpusToSummaryMap[summarizerKey][corpusFilePath] = \
             generatedSummariesFilePath
 
-        if self.skipSummaryGen(generatedSummariesFilePath,
-                               corpusFilePath, summarizerKey):
+        checkpoint = SummaryCheckpoint(generatedSummariesFilePath)
+        manifest = self.manifest
+        if manifest is not None:
+            fingerprint = self.summaryFingerprint(
+                corpusFilePath, summarizerKey)
+            record = manifest.summaryRecord(generatedSummariesFilePath)
+
+            if manifest.isSummaryFresh(
+                    generatedSummariesFilePath, fingerprint):
+                LOGGER.info(
+                    'Skipping Summary Generation. Inputs are unchanged for '
+                    'Corpus: {0} using summarizer: {1}'
+                    .format(corpusFilePath, summarizerKey))
+                failedIndicies.update(record['failedIndicies'])
+                return
+
+            if record is None and self.skipSummaryGen(
+                    generatedSummariesFilePath, corpusFilePath,
+                    summarizerKey, checkpoint):
+                # Summaries from before the manifest existed are adopted
+                failedIndicies.update(checkpoint.failedIndicies)
+                manifest.startSummary(generatedSummariesFilePath, fingerprint)
+                manifest.finishSummary(
+                    generatedSummariesFilePath, failedIndicies)
+                return
+
+            if not manifest.startSummary(
+                    generatedSummariesFilePath, fingerprint):
+                LOGGER.info(
+                    'Inputs changed for Corpus: {0} using summarizer: {1}. '
+                    'Regenerating summaries.'
+                    .format(corpusFilePath, summarizerKey))
+                checkpoint.reset()
+            elif checkpoint.exists() and \
+                    checkpoint.isComplete(fileLen(corpusFilePath)):
+                # Finished by an earlier run that died before recording it
+                failedIndicies.update(checkpoint.failedIndicies)
+                manifest.finishSummary(
+                    generatedSummariesFilePath, failedIndicies)
+                return
+        elif self.skipSummaryGen(generatedSummariesFilePath,
+                                 corpusFilePath, summarizerKey, checkpoint):
+            failedIndicies.update(checkpoint.failedIndicies)
             return
 
         # Fetching and Running Summarizations
-        summarizerSwitch = self.summarizerSwitch
-
         fileLength = fileLen(corpusFilePath)
-        results = codecs.open(generatedSummariesFilePath, 'w', 'utf-8')
+        if checkpoint.completed > fileLength:  # The corpus has shrunk
+            checkpoint.reset()
+
+        # Resume after the last checkpointed document, keeping its failures
+        failedIndicies.update(checkpoint.failedIndicies)
+        startIndex = checkpoint.completed
+        results = checkpoint.openSummaries()
         samples = codecs.open(corpusFilePath, 'rb+', 'utf-8')
 
-        LOGGER.info(
-            'Generating summaries for corpus: {0} using summarizer: {1}'
-            .format(corpusFilePath, summarizerKey))
+        if startIndex:
+            LOGGER.info(
+                'Resuming summary generation for corpus: {0} using '
+                'summarizer: {1} at document {2}'
+                .format(corpusFilePath, summarizerKey, startIndex))
+        else:
+            LOGGER.info(
+                'Generating summaries for corpus: {0} using summarizer: {1}'
+                .format(corpusFilePath, summarizerKey))
 
-        for index, text in tqdm(enumerate(samples), total=fileLength):
-            generatedSummary = summarizerSwitch.toggleAndExecuteSummarizer(
-                summarizerKey, text)
+        summaries = self.generateSummaries(
+            summarizerKey,
+            itertools.islice(samples, startIndex, None),
+            startIndex, self.compiledSamples(corpusFilePath, summarizerKey))
 
+        for index, generatedSummary in tqdm(
+                summaries, total=fileLength, initial=startIndex):
             if not generatedSummary:
                 failedIndicies.add(index)
-                if index == fileLength - 1:  # Delete the extra \n(newline)
-                    try:
-                        results.seek(-1, os.SEEK_END)
-                        results.truncate()
-                    except IOError:  # Fails if file is completely empty
-                        pass
-                continue
-
-            if index < (fileLength - 1):
-                results.write('{0}\n'.format(generatedSummary))
-            else:
-                results.write('{0}'.format(generatedSummary))
+            self.writeSummary(results, checkpoint, index, generatedSummary)
 
         samples.close()  # Close the corpora file.
         results.close()  # Close the results file.
 
+        if manifest is not None:
+            manifest.finishSummary(generatedSummariesFilePath, failedIndicies)
+
+    def writeSummary(self, results, checkpoint, index, generatedSummary):
+        '''
+            Appends a summary to the results file opened by the checkpoint
+            and records the document in the checkpoint. Failed summaries
+            are only recorded.
+        '''
+        if not generatedSummary:
+            checkpoint.record(index, True, results.tell())
+            return
+
+        # Summaries are newline seperated without a trailing newline
+        if checkpoint.numWritten:
+            results.write(b'\n')
+        results.write(u'{0}'.format(generatedSummary).encode('utf-8'))
+        results.flush()
+        checkpoint.record(index, False, results.tell())
+
     def generateCorpusGoldFilePath(self, corpusFilePath):
         '''
             input: path to corpus within a dataset
@@ -355,6 +845,34 @@ class benchmark:
 
         return corpusGoldFilePath
 
+    # Compiled Corpora Methods
+    def compileDataSets(self):
+        '''
+            Compiles the samples and gold files of every dataset whose
+            compiled corpus (tools/corpus.py) is missing or stale.
+        '''
+        sentenceSeperator = self.sentenceSeperator if self.preTokenized \
+            else None
+        for folder in self.dataFolders:
+            compiled = compileDataSet(
+                folder, self.tokenizer, sentenceSeperator)
+            if compiled:
+                LOGGER.info(
+                    'Compiled {0} files of dataset: {1}'
+                    .format(compiled, folder))
+
+    def compiledSamples(self, corpusFilePath, summarizerKey):
+        '''
+            output: TokenizedCorpus of the corpus if the summarizer uses its
+            sentences, otherwise None
+        '''
+        if not self.summarizerSwitch.usesCompiledSentences(summarizerKey):
+            return None
+        return openCompiledCorpus(
+            corpusFilePath, self.tokenizer.targetTokenizer,
+            self.sentenceSeperator if self.preTokenized else None,
+            isGold=False)
+
     # Evaluation Methods #
     def runEvaluations(self):
         corporaReports = {}
@@ -372,53 +890,256 @@ class benchmark:
             corpusReports[corpus] = report
         return corpusReports
 
-    def evaluateCorpusPerSummarizer(self, corpusFilepath):
+    def createSummaryReader(self, corpusFilepath, summarizerKey):
+        '''
+            input: path to corpus and summarizer key
+            output: SummaryReaderObject pairing the generated summaries
+            with the gold references of the corpus.
+        '''
         goldPath = self.generateCorpusGoldFilePath(corpusFilepath)
 
-        summarizerReports = {}
-        for summarizerKey in self.summarizers:
-            LOGGER.info(
-                'Evaluating Results for Corpus: %s using summarizer: %s',
-                corpusFilepath,
-                summarizerKey
-            )
+        summaryPath = self.\
+            corpusToSummaryMap[summarizerKey.lower()][corpusFilepath]
 
-            summaryPath = self.\
-                corpusToSummaryMap[summarizerKey.lower()][corpusFilepath]
+        failedIndicies = self.\
+            failedIndicies[summarizerKey.lower()][corpusFilepath]
+
+        kwargs = {'failedIndicies': failedIndicies}
+        if self.compiledCorpora:
+            kwargs['goldCorpus'] = openCompiledCorpus(
+                goldPath, self.tokenizer.targetTokenizer)
+
+        return SummaryReaderObject(summaryPath, goldPath, **kwargs)
+
+    def evaluateCorpusPerSummarizer(self, corpusFilepath):
+        evaluatorSwitch = self.evaluatorSwitch
+        evaluatorKeys = list(evaluatorSwitch.evaluationLibrary)
+        jointEvaluatorKeys = [
+            evaluatorKey for evaluatorKey in evaluatorKeys
+            if evaluatorSwitch.scoresSystemsJointly(evaluatorKey)]
+
+        summarizerReports = self.evaluateSummarizersJointly(
+            corpusFilepath, self.summarizers, jointEvaluatorKeys)
+        for summarizerKey in self.summarizers:
+            summarizerReports[summarizerKey].update(
+                self.evaluateSummarizerOnCorpus(
+                    corpusFilepath, summarizerKey,
+                    [evaluatorKey for evaluatorKey in evaluatorKeys
+                     if evaluatorKey not in jointEvaluatorKeys]))
 
-            failedIndicies = self.\
-                failedIndicies[summarizerKey.lower()][corpusFilepath]
+        return summarizerReports
 
-            SRO = SummaryReaderObject(
-                summaryPath, goldPath, failedIndicies=failedIndicies)
+    def evaluateSummarizersJointly(self, corpusFilepath, summarizerKeys,
+                                   evaluatorKeys):
+        '''
+            input: path to corpus, summarizer keys and evaluator keys that
+            scoresSystemsJointly
+            output: dict(summarizerKey: dict(evaluatorKey: report))
+            purpose: Scores the summaries of every summarizer whose report
+            is stale together, e.g. with a single ROUGE-1.5.5 run for
+            pyRouge.
+        '''
+        summarizerReports = dict(
+            (summarizerKey, {}) for summarizerKey in summarizerKeys)
+        for evaluatorKey in evaluatorKeys:
+            SROs = {}
+            for summarizerKey in summarizerKeys:
+                reports, staleEvaluatorKeys = self.fetchFreshReports(
+                    corpusFilepath, summarizerKey, [evaluatorKey])
+                summarizerReports[summarizerKey].update(reports)
+                if staleEvaluatorKeys:
+                    SROs[summarizerKey] = self.createSummaryReader(
+                        corpusFilepath, summarizerKey)
+            if not SROs:
+                continue
 
-            corpusReport = ''
-            corpusReport = self.evaluatorSwitch\
-                .executeAndReportEvaluatorsOnCorpus(SRO)
-            summarizerReports[summarizerKey] = corpusReport
+            try:
+                newReports = self.evaluatorSwitch\
+                    .executeAndReportEvaluatorOnSystems(evaluatorKey, SROs)
+            finally:
+                for SRO in SROs.values():
+                    SRO.close()
+            for summarizerKey, report in newReports.items():
+                reports = {evaluatorKey: report}
+                self.recordReports(corpusFilepath, summarizerKey, reports)
+                summarizerReports[summarizerKey].update(reports)
 
         return summarizerReports
 
+    def reportFingerprint(self, corpusFilepath, summarizerKey, evaluatorKey):
+        '''
+            input: path to corpus, summarizer key and evaluator key
+            output: everything the report of the evaluator is built from:
+            the summaries, the gold references, the failed summaries, the
+            evaluator configuration and its source code.
+        '''
+        manifest = self.manifest
+        evaluatorSwitch = self.evaluatorSwitch
+        summarizerKey = summarizerKey.lower()
+
+        summaryPath = self.corpusToSummaryMap[summarizerKey][corpusFilepath]
+        goldPath = self.generateCorpusGoldFilePath(corpusFilepath)
+        failedIndicies = self.failedIndicies[summarizerKey][corpusFilepath]
+
+        return {
+            'summaries': manifest.fileHash(summaryPath),
+            'gold': manifest.fileHash(goldPath),
+            'failedIndicies': sorted(failedIndicies),
+            'metric': evaluatorKey,
+            'parameters': evaluatorSwitch.evaluatorParameters(evaluatorKey),
+            'sampleScores': evaluatorSwitch.storeSampleScores,
+            'source': manifest.sourceHash(
+                evaluatorSwitch.evaluatorSourceFiles(evaluatorKey))
+        }
+
+    def fetchFreshReports(self, corpusFilepath, summarizerKey,
+                          evaluatorKeys):
+        '''
+            output: tuple(dict(evaluatorKey: report) of the reports recorded
+            in the manifest whose inputs are unchanged, list of the
+            evaluatorKeys that must be recomputed)
+        '''
+        if self.manifest is None:
+            return {}, list(evaluatorKeys)
+
+        summaryPath = self.\
+            corpusToSummaryMap[summarizerKey.lower()][corpusFilepath]
+        goldPath = self.generateCorpusGoldFilePath(corpusFilepath)
+
+        reports, staleEvaluatorKeys = {}, []
+        for evaluatorKey in evaluatorKeys:
+            found, report = self.manifest.fetchReport(
+                summaryPath, goldPath, evaluatorKey,
+                self.reportFingerprint(
+                    corpusFilepath, summarizerKey, evaluatorKey))
+            if found:
+                reports[evaluatorKey] = report
+            else:
+                staleEvaluatorKeys.append(evaluatorKey)
+
+        return reports, staleEvaluatorKeys
+
+    def recordReports(self, corpusFilepath, summarizerKey, reports):
+        if self.manifest is None:
+            return
+
+        summaryPath = self.\
+            corpusToSummaryMap[summarizerKey.lower()][corpusFilepath]
+        goldPath = self.generateCorpusGoldFilePath(corpusFilepath)
+
+        for evaluatorKey, report in reports.items():
+            self.manifest.recordReport(
+                summaryPath, goldPath, evaluatorKey,
+                self.reportFingerprint(
+                    corpusFilepath, summarizerKey, evaluatorKey),
+                report)
+
     #  Plotting Methods
+    def plotFingerprint(self):
+        manifest = self.manifest
+        return {
+            'reportTree': self.reportTree,
+            'summarizers': self.summarizers,
+            'evaluators': self.evaluators,
+            'significance': [
+                self.significanceEnabled, self.significanceResamples,
+                self.significanceConfidence, self.significanceSeed],
+            'source': manifest.sourceHash([
+                os.path.join(dirname, 'tools', 'plot.py'),
+                os.path.join(dirname, 'tools', 'significance.py')])
+        }
+
     def generatePlots(self):
+        fingerprint = None
+        if self.manifest is not None:
+            fingerprint = self.plotFingerprint()
+            if self.manifest.arePlotsFresh(fingerprint):
+                LOGGER.info('Skipping Plots. No report has changed.')
+                return
+
+        before = self.plotOutputs()
+        self.significanceTree = self.computeSignificance()
         self.drawCSVs()
         self.drawFigs()
 
+        if fingerprint is not None:
+            after = self.plotOutputs()
+            self.manifest.recordPlots(fingerprint, [
+                path for path in after if before.get(path) != after[path]])
+
+    def plotOutputs(self):
+        '''
+            output: dict(path: modification time) of the files in the plot
+            output folders, ../figs and ../results.
+        '''
+        outputs = {}
+        for folder in PLOT_OUTPUT_FOLDERS:
+            for path in glob.glob(os.path.join(folder, '*')):
+                if os.path.isfile(path):
+                    outputs[path] = os.stat(path).st_mtime
+        return outputs
+
+    def computeSignificance(self):
+        '''
+            output: dict(corpusFilePath: dict(metric: confidence intervals
+            of every summarizer and paired tests between every pair of
+            summarizers)), see tools/significance.py. Computed from the per
+            document score stores.
+        '''
+        if not self.significanceEnabled:
+            return {}
+        if not self.evaluatorSwitch.storeSampleScores:
+            LOGGER.warning(
+                'Skipping significance tests. They need the per document '
+                'scores of scores -> enabled.')
+            return {}
+
+        from tools.significance import Resampler, significanceForCorpus
+
+        resampler = Resampler(
+            self.significanceResamples, self.significanceConfidence,
+            self.significanceSeed)
+
+        significanceTree = {}
+        for dataset in self.reportTree:
+            for corpus in self.reportTree[dataset]:
+                summaryPaths = dict(
+                    (summarizerKey, self.corpusToSummaryMap[
+                        summarizerKey.lower()][corpus])
+                    for summarizerKey in self.reportTree[dataset][corpus]
+                    if corpus in self.corpusToSummaryMap[
+                        summarizerKey.lower()]
+                )
+                LOGGER.info('Testing significance for corpus: %s', corpus)
+                significanceTree[corpus] = significanceForCorpus(
+                    summaryPaths, self.evaluators, resampler,
+                    fileLen(corpus))
+
+        return significanceTree
+
     def drawCSVs(self):
+        # Plotting libraries are heavy, only import them when plotting
+        from tools.plot import csvPlotter
+
         evaluators = self.evaluators
         reportTree = self.reportTree
         summarizers = self.summarizers
 
-        cP = csvPlotter(summarizers, evaluators, reportTree)
+        cP = csvPlotter(
+            summarizers, evaluators, reportTree, self.significanceTree)
         cP.plot()
         cP.plotMetrics()
+        cP.plotSignificance()
 
     def drawFigs(self):
+        from tools.plot import plotFormatter
+
         reportTree = self.reportTree
         summarizers = self.summarizers
         metrics = self.evaluators
 
-        pF = plotFormatter(summarizers, metrics, reportTree)
+        pF = plotFormatter(
+            summarizers, metrics, reportTree, self.significanceTree)
         pF.draw()
 
     # Cache Methods
@@ -437,17 +1158,387 @@ class benchmark:
                          'w', 'utf-8') as f:
             f.write('{0}'.format(json.dumps(reportTree)))
 
+    # Streaming Methods
+    def _throttle(self, iterable, window, stopped):
+        '''
+            Yields from iterable while fewer than window items are in flight.
+            The consumer releases window once it is done with an item, and
+            sets stopped (releasing window once more) to end the iteration.
+        '''
+        for item in iterable:
+            window.acquire()
+            if stopped.is_set():
+                return
+            yield item
+
+    def checkpointedSummaries(self, checkpoint):
+        '''
+            output: generator of tuple(index, summary) of the documents
+            recorded in the checkpoint, read back from its summaries file.
+            summary is None for failed documents.
+        '''
+        with open(checkpoint.summaryFilePath, 'rb') as f:
+            for index in range(checkpoint.completed):
+                if index in checkpoint.failedIndicies:
+                    yield index, None
+                else:
+                    yield index, f.readline().rstrip(b'\n').decode('utf-8')
+
+    def streamCorpus(self, corpusFilepath, summarizerKey):
+        '''
+            input: path to corpus and summarizer key
+            output: dict(evaluatorKey: report)
+            purpose: Summarizes, truncates and scores every document of the
+            corpus in a single pass. Summarization runs in a producer thread
+            (and the pool of startSummarizationPool, forked on this thread)
+            while this thread scores finished summaries against the gold
+            references, so at most self.streamingWindow documents are held
+            in memory. The summaries
+            file is written only if streaming -> write_summaries is set.
+            Its checkpoint is then resumed like runSummarizationsForCorpus:
+            the summaries written by an interrupted run are read back and
+            scored again, and only the remaining documents are summarized.
+        '''
+        summarizerKey = summarizerKey.lower()
+        goldPath = self.generateCorpusGoldFilePath(corpusFilepath)
+        generatedSummariesFilePath = self.generateSummaryFilePath(
+            corpusFilepath, summarizerKey)
+
+        failedIndicies = set()
+        self.failedIndicies[summarizerKey][corpusFilepath] = failedIndicies
+        self.corpusToSummaryMap[summarizerKey][corpusFilepath] = \
+            generatedSummariesFilePath
+
+        evaluatorSwitch = self.evaluatorSwitch
+        manifest = self.manifest
+        fingerprint = None
+        if manifest is not None and self.streamingWritesSummaries:
+            fingerprint = self.summaryFingerprint(
+                corpusFilepath, summarizerKey)
+            if manifest.isSummaryFresh(
+                    generatedSummariesFilePath, fingerprint):
+                record = manifest.summaryRecord(generatedSummariesFilePath)
+                failedIndicies.update(record['failedIndicies'])
+
+                reports, staleEvaluatorKeys = self.fetchFreshReports(
+                    corpusFilepath, summarizerKey,
+                    list(evaluatorSwitch.evaluationLibrary))
+                if not staleEvaluatorKeys:
+                    LOGGER.info(
+                        'Skipping corpus: {0} using summarizer: {1}. '
+                        'Summaries and reports are unchanged.'
+                        .format(corpusFilepath, summarizerKey))
+                    return reports
+
+        accumulators = evaluatorSwitch.createAccumulators()
+        prepared = evaluatorSwitch.preparedReferences(goldPath, accumulators)
+
+        def scoreSummary(index, generatedSummary):
+            if not generatedSummary:
+                failedIndicies.add(index)
+                return
+            for evaluatorKey, accumulator in accumulators.items():
+                accumulator.addDocument(
+                    index, generatedSummary, prepared[evaluatorKey][index])
+
+        fileLength = fileLen(corpusFilepath)
+        checkpoint, results, startIndex = None, None, 0
+        if self.streamingWritesSummaries:
+            checkpoint = SummaryCheckpoint(generatedSummariesFilePath)
+            if fingerprint is not None and not manifest.startSummary(
+                    generatedSummariesFilePath, fingerprint):
+                checkpoint.reset()  # Built from other inputs
+            if checkpoint.completed > fileLength:  # The corpus has shrunk
+                checkpoint.reset()
+
+            startIndex = checkpoint.completed
+            if startIndex:
+                LOGGER.info(
+                    'Resuming corpus: {0} using summarizer: {1} at document '
+                    '{2}. Scoring the checkpointed summaries again.'
+                    .format(corpusFilepath, summarizerKey, startIndex))
+                for index, generatedSummary in \
+                        self.checkpointedSummaries(checkpoint):
+                    scoreSummary(index, generatedSummary)
+            results = checkpoint.openSummaries()
+        else:
+            LOGGER.info(
+                'Streaming without writing summaries. An interrupted run '
+                'cannot be resumed and starts over from the first document.')
+
+        LOGGER.info(
+            'Streaming summaries for corpus: {0} using summarizer: {1}'
+            .format(corpusFilepath, summarizerKey))
+
+        # The producer must never fork a pool itself
+        ownsPool = self.workers > 1 and self.summarizationPool is None
+        if ownsPool:
+            self.startSummarizationPool()
+
+        window = threading.BoundedSemaphore(self.streamingWindow)
+        stopped = threading.Event()
+        finishedSummaries = queue.Queue()
+        endOfSummaries = object()
+
+        samples = codecs.open(corpusFilepath, 'rb+', 'utf-8')
+
+        def produceSummaries():
+            summaries = None
+            try:
+                summaries = self.generateSummaries(
+                    summarizerKey, self._throttle(
+                        itertools.islice(samples, startIndex, None),
+                        window, stopped),
+                    startIndex, self.compiledSamples(
+                        corpusFilepath, summarizerKey))
+                for result in summaries:
+                    if stopped.is_set():
+                        break
+                    finishedSummaries.put(result)
+            except Exception as err:
+                finishedSummaries.put(err)
+            finally:
+                if summaries is not None:
+                    summaries.close()
+                finishedSummaries.put(endOfSummaries)
+
+        producer = threading.Thread(target=produceSummaries)
+        producer.daemon = True
+        producer.start()
+
+        progress = tqdm(total=fileLength, initial=startIndex)
+        try:
+            while True:
+                result = finishedSummaries.get()
+                if result is endOfSummaries:
+                    break
+                if isinstance(result, Exception):
+                    raise result
+
+                index, generatedSummary = result
+                scoreSummary(index, generatedSummary)
+                if results is not None:
+                    self.writeSummary(
+                        results, checkpoint, index, generatedSummary)
+
+                window.release()
+                progress.update(1)
+        finally:
+            # Stops the producer when scoring raised. It is woken up if it
+            # is waiting on the window.
+            stopped.set()
+            try:
+                window.release()
+            except ValueError:
+                pass  # Nothing is in flight
+            producer.join()
+            progress.close()
+            samples.close()
+            if results is not None:
+                results.close()
+            if ownsPool:
+                self.stopSummarizationPool()
+
+        corpusReport = dict(
+            (evaluatorKey, accumulator.report())
+            for evaluatorKey, accumulator in accumulators.items()
+        )
+        evaluatorSwitch.saveSampleScores(
+            generatedSummariesFilePath, accumulators)
+
+        for evaluatorKey in evaluatorSwitch.evaluationLibrary:
+            if evaluatorKey in corpusReport:
+                continue
+            # Evaluators without a per sample hook read the summaries file
+            if results is None:
+                LOGGER.warning(
+                    'Skipping %s. It cannot be streamed and summaries are '
+                    'not being written.', evaluatorKey)
+                continue
+            with self.createSummaryReader(
+                    corpusFilepath, summarizerKey) as SRO:
+                corpusReport[evaluatorKey] = evaluatorSwitch\
+                    .executeAndReportEvaluatorOnCorpus(evaluatorKey, SRO)
+
+        if fingerprint is not None:
+            manifest.finishSummary(generatedSummariesFilePath, failedIndicies)
+            self.recordReports(corpusFilepath, summarizerKey, corpusReport)
+
+        return corpusReport
+
+    def runStreamingBenchmarking(self):
+        # The producer threads of streamCorpus only use the pool, forked
+        # here on the main thread
+        self.startSummarizationPool()
+        reportTree = {}
+        try:
+            for dataset in self.dataSetToCorpusFilesMap:
+                corpusReports = reportTree.setdefault(dataset, {})
+                for corpus in self.dataSetToCorpusFilesMap[dataset]:
+                    summarizerReports = corpusReports.setdefault(corpus, {})
+                    for summarizerKey in self.summarizers:
+                        summarizerReports[summarizerKey] = \
+                            self.streamCorpus(corpus, summarizerKey)
+        finally:
+            self.stopSummarizationPool()
+
+        self.reportTree = reportTree
+        self.cacheReportTree()
+        self.generatePlots()
+
+    def evaluateSummarizerOnCorpus(self, corpusFilepath, summarizerKey,
+                                   evaluatorKeys):
+        if not evaluatorKeys:
+            return {}
+
+        LOGGER.info(
+            'Evaluating Results for Corpus: %s using summarizer: %s '
+            'and metrics: %s', corpusFilepath, summarizerKey,
+            ', '.join(evaluatorKeys))
+
+        reports, staleEvaluatorKeys = self.fetchFreshReports(
+            corpusFilepath, summarizerKey, evaluatorKeys)
+        if reports:
+            LOGGER.info(
+                'Reusing unchanged reports for metrics: %s',
+                ', '.join(reports))
+        if not staleEvaluatorKeys:
+            return reports
+
+        with self.createSummaryReader(corpusFilepath, summarizerKey) as SRO:
+            newReports = self.evaluatorSwitch\
+                .executeAndReportEvaluatorsOnCorpus(SRO, staleEvaluatorKeys)
+        self.recordReports(corpusFilepath, summarizerKey, newReports)
+
+        reports.update(newReports)
+        return reports
+
+    # Scheduling Methods
+    def buildJobGraph(self, scheduler):
+        '''
+            Adds a summarization job for every (summarizer, corpus) pair.
+            Each pair also gets one evaluation job per resource class, which
+            scores all metrics of that class in a single pass. Evaluation
+            jobs depend only on the summaries they read.
+            output: list of tuple(dataset, corpus, summarizer, job) for the
+            evaluation jobs. job.result is dict(metric: report). Metrics
+            that score summarizers jointly (pyRouge) get one job per corpus
+            instead, depending on the summaries of every summarizer. Its
+            summarizer is None and job.result is dict(summarizer:
+            dict(metric: report)).
+        '''
+        summaryJobs = {}
+        for summarizerKey in self.summarizerLibrary:
+            resourceClass = SUMMARIZER_RESOURCE_CLASSES.get(
+                summarizerKey, DEFAULT_RESOURCE_CLASS)
+            for corpus in self.corpusFilepaths:
+                summaryJobs[(summarizerKey, corpus)] = scheduler.addJob(Job(
+                    'summarize {0} with {1}'.format(corpus, summarizerKey),
+                    resourceClass,
+                    partial(self.runSummarizationsForCorpus,
+                            corpus, summarizerKey)
+                ))
+
+        evaluationJobs = []
+        if not self.evaluationEnabled:
+            return evaluationJobs
+
+        evaluatorsByResourceClass = defaultdict(list)
+        jointEvaluatorsByResourceClass = defaultdict(list)
+        for evaluatorKey in self.evaluatorSwitch.evaluationLibrary:
+            resourceClass = self.evaluatorSwitch.resourceClass(evaluatorKey)
+            if self.evaluatorSwitch.scoresSystemsJointly(evaluatorKey):
+                jointEvaluatorsByResourceClass[resourceClass].append(
+                    evaluatorKey)
+            else:
+                evaluatorsByResourceClass[resourceClass].append(evaluatorKey)
+
+        for dataset in self.dataSetToCorpusFilesMap:
+            for corpus in self.dataSetToCorpusFilesMap[dataset]:
+                for resourceClass, evaluatorKeys in \
+                        jointEvaluatorsByResourceClass.items():
+                    job = scheduler.addJob(Job(
+                        'evaluate {0} with {1} using {2}'.format(
+                            corpus, ', '.join(self.summarizers),
+                            ', '.join(evaluatorKeys)),
+                        resourceClass,
+                        partial(self.evaluateSummarizersJointly,
+                                corpus, self.summarizers, evaluatorKeys),
+                        dependencies=[
+                            summaryJobs[(summarizerKey.lower(), corpus)]
+                            for summarizerKey in self.summarizers]
+                    ))
+                    evaluationJobs.append((dataset, corpus, None, job))
+
+                for summarizerKey in self.summarizers:
+                    summaryJob = summaryJobs[(summarizerKey.lower(), corpus)]
+                    for resourceClass, evaluatorKeys in \
+                            evaluatorsByResourceClass.items():
+                        job = scheduler.addJob(Job(
+                            'evaluate {0} with {1} using {2}'.format(
+                                corpus, summarizerKey,
+                                ', '.join(evaluatorKeys)),
+                            resourceClass,
+                            partial(self.evaluateSummarizerOnCorpus,
+                                    corpus, summarizerKey, evaluatorKeys),
+                            dependencies=[summaryJob]
+                        ))
+                        evaluationJobs.append(
+                            (dataset, corpus, summarizerKey, job))
+
+        return evaluationJobs
+
+    def runScheduledBenchmarking(self):
+        scheduler = JobScheduler(self.resourceLimits)
+        evaluationJobs = self.buildJobGraph(scheduler)
+
+        # Concurrent summarization jobs share one pool instead of forking a
+        # pool each, forked before the scheduler starts its threads
+        self.startSummarizationPool()
+        try:
+            scheduler.run()
+        finally:
+            self.stopSummarizationPool()
+
+        if not self.evaluationEnabled:
+            return
+
+        reportTree = {}
+        for dataset, corpus, summarizerKey, job in evaluationJobs:
+            corpusReports = reportTree.setdefault(dataset, {})
+            summarizerReports = corpusReports.setdefault(corpus, {})
+            jobReports = job.result if summarizerKey is None \
+                else {summarizerKey: job.result}
+            for summarizerKey, result in jobReports.items():
+                reports = summarizerReports.setdefault(summarizerKey, {})
+                reports.update(result)
+
+        self.reportTree = reportTree
+        self.cacheReportTree()
+        self.generatePlots()
+
     # Main Function
     def runBenchmarking(self):
-        summarizerLibrary = self.summarizerLibrary
+        if self.compiledCorpora:
+            self.compileDataSets()
+
+        if self.streamingEnabled and self.evaluationEnabled:
+            self.runStreamingBenchmarking()
+        elif self.schedulerEnabled:
+            self.runScheduledBenchmarking()
+        else:
+            summarizerLibrary = self.summarizerLibrary
+
+            for key in summarizerLibrary:
+                self.runSummarizations(key)
 
-        for key in summarizerLibrary:
-            self.runSummarizations(key)
+            if self.evaluationEnabled:
+                self.runEvaluations()
+                self.cacheReportTree()
+                self.generatePlots()
 
-        if self.evaluationEnabled:
-            self.runEvaluations()
-            self.cacheReportTree()
-            self.generatePlots()
+        if self.summaryCache is not None:
+            self.summaryCache.logStats()
 
 
 if __name__ == "__main__":
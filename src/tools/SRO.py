@@ -1,5 +1,11 @@
-import codecs
+import bisect
+import hashlib
 import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
 '''
 import xml.parsers.expat
 parser = xml.parsers.expat.ParserCreate()
@@ -7,14 +13,178 @@ parser.ParseFile(open('path.xml', 'r'))
 '''
 
 
+def inferGoldFormat(line):
+    '''
+        input: first line of a gold file
+        output: 'XML', 'JSON' or 'text'
+    '''
+    try:
+        line = line.strip()
+
+        firstChar = line[0]
+        if firstChar == '<':
+            return 'XML'
+        elif firstChar == '{':
+            return 'JSON'
+
+        return 'text'
+    except Exception as err:
+        raise Exception('Unable to Infer Gold File Format', err)
+
+
+def parseReferences(line, goldFormat):
+    '''
+        input: line of a gold file and its format
+        output: list(String) of references
+    '''
+    if goldFormat == 'JSON':
+        refrencesJSON = json.loads(line)
+        references = refrencesJSON['references']
+        return references
+    elif goldFormat == 'XML':
+        raise Exception("Unable to Handle XML at this Time.\
+            Please Elect to Use JSON Format")
+    elif goldFormat == 'text':
+        return [line]
+
+
+# Line indices are kept with the other caches of the benchmark (../cache)
+LINE_INDEX_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)))), 'cache', 'line_index')
+
+
+class LineIndex(object):
+    '''
+        Memory maps a text file and indexes the byte offset of every line.
+        The index is persisted in LINE_INDEX_FOLDER, keyed by the absolute
+        path of the file, together with the size and modification time of
+        the file, so it is only rebuilt when the file changes.
+            len(index) -> number of lines, same count as utils.fileLen
+            index.line(i) -> i-th line (String) including its newline
+    '''
+    HEADER = struct.Struct('<8sqq')
+    MAGIC = b'SROIDX01'
+
+    def __init__(self, filePath):
+        self.filePath = filePath
+        self.indexFilePath = os.path.join(
+            LINE_INDEX_FOLDER, '{0}.idx'.format(hashlib.sha256(
+                os.path.abspath(filePath).encode('utf-8')).hexdigest()))
+
+        self.file = open(filePath, 'rb')
+        stat = os.fstat(self.file.fileno())
+        self.size = stat.st_size
+        self.mtime = getattr(stat, 'st_mtime_ns', int(stat.st_mtime * 1e9))
+
+        # mmap cannot map empty files
+        self.map = mmap.mmap(
+            self.file.fileno(), 0, access=mmap.ACCESS_READ) \
+            if self.size else b''
+
+        self.offsets = self._loadOffsets()
+        if self.offsets is None:
+            self.offsets = self._buildOffsets()
+            self._saveOffsets()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def line(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.map[start:end].decode('utf-8')
+
+    def _buildOffsets(self):
+        offsets = array('q', [0])
+        data = self.map
+        position = data.find(b'\n')
+        while position != -1:
+            offsets.append(position + 1)
+            position = data.find(b'\n', position + 1)
+
+        if offsets[-1] != self.size:  # Last line has no trailing newline
+            offsets.append(self.size)
+
+        return offsets
+
+    def _loadOffsets(self):
+        try:
+            with open(self.indexFilePath, 'rb') as f:
+                header = f.read(self.HEADER.size)
+                if len(header) != self.HEADER.size:
+                    return None
+
+                magic, size, mtime = self.HEADER.unpack(header)
+                if (magic, size, mtime) != (self.MAGIC, self.size, self.mtime):
+                    return None  # Stale index
+
+                offsets = array('q')
+                offsets.frombytes(f.read())
+        except (IOError, OSError, ValueError):
+            return None
+
+        # Rejects indices cut short, e.g. by a writer that died
+        if not offsets or offsets[0] != 0 or offsets[-1] != self.size:
+            return None
+        return offsets
+
+    def _saveOffsets(self):
+        '''
+            Readers of the same file may run at the same time (scheduled
+            jobs), so the index is written to a file of its own and moved
+            in place at once.
+        '''
+        temporaryPath = None
+        try:
+            if not os.path.isdir(LINE_INDEX_FOLDER):
+                os.makedirs(LINE_INDEX_FOLDER)
+            with tempfile.NamedTemporaryFile(
+                    dir=LINE_INDEX_FOLDER, suffix='.tmp',
+                    delete=False) as f:
+                temporaryPath = f.name
+                f.write(self.HEADER.pack(self.MAGIC, self.size, self.mtime))
+                f.write(self.offsets.tobytes())
+            try:
+                os.replace(temporaryPath, self.indexFilePath)
+            except AttributeError:  # Python 2
+                os.rename(temporaryPath, self.indexFilePath)
+        except (IOError, OSError):
+            # The index is only an optimization
+            if temporaryPath is not None and os.path.exists(temporaryPath):
+                os.remove(temporaryPath)
+
+    def close(self):
+        if self.size:
+            self.map.close()
+        self.file.close()
+
+
 class SummaryReaderObject:
+    '''
+        Pairs every generated summary with the references of its document.
+        Sample i is the i-th successful summary. Its document index skips
+        the failedIndicies, which have no summary. Both files are memory
+        mapped through a LineIndex, so len(), read(i), slicing and copies
+        never rescan the files. With goldCorpus, the TokenizedCorpus of the
+        compiled gold file (tools/corpus.py), readReferenceTokens(i)
+        gives the tokens of the references without tokenizing them.
+        close() (or a with statement) releases the line indices. Copies
+        share them with the reader they were made from, which closes them.
+    '''
     def __init__(self, summaryFilePath, goldFilePath, **kwargs):
         self.kwargs = kwargs
         self.summaryFilePath = summaryFilePath
         self.goldFilePath = goldFilePath
 
-        self.summariesFile = codecs.open(summaryFilePath, 'rb+', 'utf-8')
-        self.goldFile = codecs.open(goldFilePath, 'rb+', 'utf-8')
+        # Copies share the line indices of the original reader
+        self.ownsIndices = 'summaryIndex' not in kwargs
+        self.summaryIndex = kwargs['summaryIndex'] \
+            if ('summaryIndex' in kwargs) else LineIndex(summaryFilePath)
+        self.goldIndex = kwargs['goldIndex'] \
+            if ('goldIndex' in kwargs) else LineIndex(goldFilePath)
+        self.kwargs['summaryIndex'] = self.summaryIndex
+        self.kwargs['goldIndex'] = self.goldIndex
+        self.goldCorpus = kwargs.get('goldCorpus')
 
         self.goldFormat = kwargs['goldFormat'] if ('goldFormat' in kwargs) \
             else self._inferFormat()
@@ -23,38 +193,42 @@ class SummaryReaderObject:
         self.failedIndicies = kwargs['failedIndicies']\
             if ('failedIndicies' in kwargs) else set()
         self.kwargs['failedIndicies'] = self.failedIndicies
+        self.sortedFailedIndicies = sorted(self.failedIndicies)
 
-        self.goldLength = self._fileLen(goldFilePath)
-        self.length = self._fileLen(summaryFilePath)
+        self.goldLength = len(self.goldIndex)
+        self.length = len(self.summaryIndex)
         self.indexOfFileReader = 0
 
     def __len__(self):
         return self.length
 
-    def _fileLen(self, fname):
-        i = -1
-        with open(fname) as f:
-            for i, l in enumerate(f):
-                pass
-            f.seek(0)
-        return i + 1
+    def __enter__(self):
+        return self
 
-    def _inferFormat(self):
-        try:
-            goldFile = self.goldFile
-            line = goldFile.readline()
-            goldFile.seek(0)
-            line = line.strip()
+    def __exit__(self, *exc):
+        self.close()
 
-            firstChar = line[0]
-            if firstChar == '<':
-                return 'XML'
-            elif firstChar == '{':
-                return 'JSON'
+    def close(self):
+        if self.ownsIndices:
+            self.summaryIndex.close()
+            self.goldIndex.close()
+            self.ownsIndices = False
 
-            return 'text'
-        except Exception as err:
-            raise Exception('Unable to Infer Gold File Format', err)
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.read(i) for i in range(*key.indices(self.length))]
+
+        if key < 0:
+            key += self.length
+        if not 0 <= key < self.length:
+            raise IndexError('SummaryReaderObject index out of range')
+        return self.read(key)
+
+    def _inferFormat(self):
+        if not len(self.goldIndex):
+            raise Exception('Unable to Infer Gold File Format',
+                            'Gold file is empty')
+        return inferGoldFormat(self.goldIndex.line(0))
 
     def copy(self):
         '''
@@ -64,65 +238,79 @@ class SummaryReaderObject:
             self.summaryFilePath, self.goldFilePath, **self.kwargs
         )
 
+    def documentIndex(self, i):
+        '''
+            input: sample index
+            output: index of the document (gold line) the sample belongs to
+        '''
+        failed = self.sortedFailedIndicies
+        documentIndex = i
+        while True:  # Smallest d with d - (failures <= d) == i
+            nextIndex = i + bisect.bisect_right(failed, documentIndex)
+            if nextIndex == documentIndex:
+                return documentIndex
+            documentIndex = nextIndex
+
+    def read(self, i):
+        '''
+            input: sample index
+            output: tuple(summary, references)
+        '''
+        documentIndex = self.documentIndex(i)
+        if documentIndex >= self.goldLength:
+            return None
+
+        references = parseReferences(
+            self.goldIndex.line(documentIndex), self.goldFormat)
+        summary = self.summaryIndex.line(i)
+        return (summary, references)
+
+    def readHypothesis(self, i):
+        '''
+            input: sample index
+            output: tuple(documentIndex, summary), without reading the
+            references.
+        '''
+        documentIndex = self.documentIndex(i)
+        if documentIndex >= self.goldLength:
+            return None
+        return (documentIndex, self.summaryIndex.line(i))
+
+    def readReferenceTokens(self, i, tokenization='words'):
+        '''
+            input: sample index and a tokenization of the compiled gold file
+            output: tuple(documentIndex, list of the tokens of every
+            reference), None without a compiled gold file.
+        '''
+        documentIndex = self.documentIndex(i)
+        if self.goldCorpus is None or documentIndex >= self.goldLength:
+            return None
+        return (
+            documentIndex,
+            self.goldCorpus.words(tokenization, documentIndex))
+
     def readOne(self):
-        if self.indexOfFileReader > self.goldLength - 1:
+        if self.indexOfFileReader >= self.length:
             return None
-        try:
-            references = self._readReferences()
-
-            if self.indexOfFileReader in self.failedIndicies:
-                # If the summary failed then skip to the next step.
-                # References always need to be read first as the file
-                # reader needs to advance to the next reference to match
-                # the next succesful summary
-                self.indexOfFileReader += 1
-                return self.readOne()  # Recurse until you can read a summary
-                # that has not failed
-
-            summary = self.summariesFile.readline()
-            self.indexOfFileReader += 1
-            return (summary, references)
-        except ValueError as err:
-            if str(err)=='I/O operation on closed file':
-                raise IndexError('File has been closed.\
-                Call Copy if you need to re-read this object.')
-
-    def _readReferences(self):
-        if self.goldFormat == 'JSON':
-            referencesJSONString = self.goldFile.readline()
-            refrencesJSON = json.loads(referencesJSONString)
-            references = refrencesJSON['references']
-            return references
-        elif self.goldFormat == 'XML':
-            raise Exception("Unable to Handle XML at this Time.\
-                Please Elect to Use JSON Format")
-        elif self.goldFormat == 'text':
-            reference = self.goldFile.readline()
-            return [reference]
+
+        sample = self.read(self.indexOfFileReader)
+        self.indexOfFileReader += 1
+        return sample
 
     def readAll(self):
         '''
             Reads all remaining lines. Will return an empty list if the
             reader object has reached the end of the gold file.
         '''
-        try:
-            allLines = []
-            for i in range(self.indexOfFileReader, self.length):
-                readerObj = self.readOne()
-                if not readerObj:
-                    return
-                allLines.append(readerObj)
-
-            self._closeFiles()
-            return allLines
-        except ValueError as err:
-            if str(err)=='I/O operation on closed file':
-                raise IndexError('File has been closed.\
-                Call Copy if you need to re-read this object.')
-
-    def _closeFiles(self):
-        self.summariesFile.close()
-        self.goldFile.close()
-
-    def __del__(self):
-        self._closeFiles()
+        allLines = self[self.indexOfFileReader:]
+        self.indexOfFileReader = self.length
+        return [sample for sample in allLines if sample is not None]
+
+    def iter_batches(self, n, start=0, stop=None):
+        '''
+            Yields lists of at most n samples from start up to stop. Workers
+            can each take a range of samples without rescanning the files.
+        '''
+        stop = self.length if stop is None else min(stop, self.length)
+        for batchStart in range(start, stop, n):
+            yield self[batchStart:min(batchStart + n, stop)]
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from tools.logger import Logger
+LOGGER = Logger.getInstance()
+
+
+class SummaryCache(object):
+    '''
+        Persistent content addressed store of generated summaries backed by
+        SQLite. Entries are keyed by the summarizer, its effective
+        parameters and a hash of the input text, so a document is never
+        summarized twice with the same configuration, whichever corpus or
+        run it comes from.
+
+        The least recently used entries are evicted once the stored
+        summaries exceed maxSizeBytes.
+    '''
+    def __init__(self, path, maxSizeBytes):
+        self.path = path
+        self.maxSizeBytes = maxSizeBytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # The cache is read from the summarization pool's task thread and
+        # the scheduler's threads. All access goes through this lock.
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS summaries ('
+            'key TEXT PRIMARY KEY, '
+            'summary TEXT NOT NULL, '
+            'size INTEGER NOT NULL, '
+            'accessed REAL NOT NULL)')
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS summaries_accessed '
+            'ON summaries (accessed)')
+        self.connection.commit()
+
+        self.size = self.connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM summaries').fetchone()[0]
+
+    @staticmethod
+    def makeKey(summarizerKey, parameters, text):
+        '''
+            input: summarizer key, dict of effective parameters, input text
+            output: hex digest identifying the summary of text.
+        '''
+        textHash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        configuration = json.dumps(
+            [summarizerKey, parameters, textHash], sort_keys=True)
+        return hashlib.sha256(configuration.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT summary FROM summaries WHERE key = ?',
+                (key,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.connection.execute(
+                'UPDATE summaries SET accessed = ? WHERE key = ?',
+                (time.time(), key))
+            self.connection.commit()
+            return row[0]
+
+    def put(self, key, summary):
+        size = len(summary.encode('utf-8')) + len(key)
+        with self.lock:
+            previous = self.connection.execute(
+                'SELECT size FROM summaries WHERE key = ?',
+                (key,)).fetchone()
+            if previous is not None:
+                self.size -= previous[0]
+
+            self.connection.execute(
+                'INSERT OR REPLACE INTO summaries '
+                '(key, summary, size, accessed) VALUES (?, ?, ?, ?)',
+                (key, summary, size, time.time()))
+            self.size += size
+
+            self._evict()
+            self.connection.commit()
+
+    def _evict(self):
+        '''
+            Drops least recently used summaries until the cache fits in
+            maxSizeBytes. Caller must hold self.lock.
+        '''
+        while self.size > self.maxSizeBytes:
+            rows = self.connection.execute(
+                'SELECT key, size FROM summaries '
+                'ORDER BY accessed ASC LIMIT 256').fetchall()
+            if not rows:
+                self.size = 0
+                return
+
+            for key, size in rows:
+                if self.size <= self.maxSizeBytes:
+                    break
+                self.connection.execute(
+                    'DELETE FROM summaries WHERE key = ?', (key,))
+                self.size -= size
+                self.evictions += 1
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': self.size
+        }
+
+    def logStats(self):
+        LOGGER.info(
+            'Summary cache: %d hits, %d misses, %d evictions, %.2f MB stored',
+            self.hits, self.misses, self.evictions,
+            self.size / (1024.0 * 1024.0))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
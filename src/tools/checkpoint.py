@@ -0,0 +1,95 @@
+import io
+import json
+import os
+
+
+class SummaryCheckpoint(object):
+    '''
+        Per document progress of a generated summaries file. Progress is
+        kept in a sidecar file next to the summaries
+        (<summaryFilePath>.progress) with one JSON line per processed
+        document:
+            {"index": 12, "failed": false, "offset": 3456}
+        offset is the byte length of the summaries file once the document
+        was handled, so a run that died half way through a write can be
+        truncated back to the last checkpointed summary.
+    '''
+    def __init__(self, summaryFilePath):
+        self.summaryFilePath = summaryFilePath
+        self.path = '{0}.progress'.format(summaryFilePath)
+
+        self.completed = 0  # Documents 0..completed-1 have been processed
+        self.numWritten = 0  # Number of successful summaries written
+        self.offset = 0
+        self.failedIndicies = set()
+
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path) or \
+                not os.path.exists(self.summaryFilePath):
+            return
+
+        with io.open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:  # Partially written last line
+                    break
+
+                if record['index'] != self.completed:
+                    break  # Progress must be contiguous to be trusted
+
+                self.completed += 1
+                self.offset = record['offset']
+                if record['failed']:
+                    self.failedIndicies.add(record['index'])
+                else:
+                    self.numWritten += 1
+
+        if os.path.getsize(self.summaryFilePath) < self.offset:
+            self.reset()  # Summaries file does not match its progress
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def isComplete(self, corpusLength):
+        return self.exists() and self.completed == corpusLength
+
+    def reset(self):
+        self.completed = 0
+        self.numWritten = 0
+        self.offset = 0
+        self.failedIndicies = set()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def openSummaries(self):
+        '''
+            Returns the summaries file opened for binary writing, positioned
+            after the last checkpointed summary.
+        '''
+        if not self.completed:
+            self.reset()
+            return io.open(self.summaryFilePath, 'wb')
+
+        summaries = io.open(self.summaryFilePath, 'r+b')
+        summaries.truncate(self.offset)
+        summaries.seek(self.offset)
+        return summaries
+
+    def record(self, index, failed, offset):
+        '''
+            Appends the outcome of document index. Must be called in corpus
+            order once the summary (if any) has been flushed to disk.
+        '''
+        line = json.dumps({'index': index, 'failed': failed, 'offset': offset})
+        with io.open(self.path, 'a', encoding='utf-8') as f:
+            f.write(u'{0}\n'.format(line))
+
+        self.completed = index + 1
+        self.offset = offset
+        if failed:
+            self.failedIndicies.add(index)
+        else:
+            self.numWritten += 1
@@ -0,0 +1,387 @@
+'''
+    Corpora and gold files compiled to token ids, so the tokenizers run once
+    per file instead of once per run.
+
+    A file of a dataset (samples/<name> or gold/<name>) is compiled to the
+    folder ../cache/compiled/<dataset>_<hash>/<samples or gold>/<name>,
+    hash being that of the absolute path of the dataset, containing
+        header.json: format version, size and modification time of the
+            file, tokenizer, sentence seperator and tokenizations
+        vocabulary.txt: one JSON encoded token per line, line i is token i
+        documents.int64: offsets of the texts of every document (one text
+            per sample, its references for a gold file), documents + 1
+        and for every tokenization:
+        <tokenization>.tokens.int32: token ids of every sentence
+        <tokenization>.sentences.int64: offsets of the tokens of every
+            sentence, sentences + 1
+        <tokenization>.texts.int64: offsets of the sentences of every text,
+            texts + 1
+        <tokenization>.spans.int64: (start, end) of every sentence in its
+            text, for the tokenizations that split sentences out of the text
+    The arrays are memory mapped, TokenizedCorpus reads them in place.
+    Tokenizations (corpusTokenizations):
+        words: tokenizer.tokenize_many of every text (BLEU, CIDEr)
+        sentences: the sentences of tokenizer.tokenize_many(sentences=True),
+            each word tokenized (sentence level BLEU, summarizers)
+        nist: nltk's NISTTokenizer (NIST)
+        rouge: the sentences and words of the rouge package (ROUGE)
+'''
+import codecs
+import hashlib
+import json
+import mmap
+import os
+import shutil
+
+import numpy as np
+
+from tools.SRO import inferGoldFormat, parseReferences
+from tools.utils import createFolderIfNotExists
+
+from tools.logger import Logger
+LOGGER = Logger.getInstance()
+
+CORPUS_FORMAT_VERSION = 1
+SAMPLE_TOKENIZATIONS = ['sentences']
+GOLD_TOKENIZATIONS = ['words', 'sentences', 'nist', 'rouge']
+COMPILED_CORPUS_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)))), 'cache', 'compiled')
+
+
+def _wordsTokenization(tokenizer):
+    def tokenize(texts):
+        return [
+            ([tokens], None) for tokens in tokenizer.tokenize_many(texts)
+        ]
+    return tokenize
+
+
+def _sentencesTokenization(tokenizer):
+    def tokenize(texts):
+        allSentences = tokenizer.tokenize_many(texts, sentences=True)
+        sentenceTokens = iter(tokenizer.tokenize_many(
+            sentence for sentences in allSentences
+            for sentence in sentences))
+
+        tokenized = []
+        for text, sentences in zip(texts, allSentences):
+            # The sentences are slices of the text, in order
+            spans, position = [], 0
+            for sentence in sentences:
+                start = text.find(sentence, position)
+                if start == -1:  # Not a slice, keep the previous end
+                    start = position
+                position = start + len(sentence)
+                spans.append((start, position))
+            tokenized.append(
+                ([next(sentenceTokens) for sentence in sentences], spans))
+        return tokenized
+    return tokenize
+
+
+def _nistTokenization(texts):
+    from Evaluator.evaluator_source_files.nist import tokenize
+    return [([tokenize(text)], None) for text in texts]
+
+
+def _rougeTokenization(texts):
+    from Evaluator.evaluator_source_files.rouge_engine import split_sentences
+    return [
+        ([sentence.split(' ') for sentence in split_sentences(text)], None)
+        for text in texts
+    ]
+
+
+def corpusTokenizations(tokenizer):
+    '''
+        input: benchmark Tokenizer (tools/tokenizer.py)
+        output: dict(tokenization: function), each function taking a list
+        of texts and returning for every text a tuple(list of the tokens of
+        every sentence, list of the (start, end) of every sentence or None)
+    '''
+    return {
+        'words': _wordsTokenization(tokenizer),
+        'sentences': _sentencesTokenization(tokenizer),
+        'nist': _nistTokenization,
+        'rouge': _rougeTokenization
+    }
+
+
+def compiledCorpusFolder(filePath):
+    '''
+        input: path to a samples or gold file of a dataset
+        output: folder the file is compiled to
+    '''
+    folder, fileName = os.path.split(os.path.abspath(filePath))
+    dataSetFolder, subDir = os.path.split(folder)
+    dataSetKey = '{0}_{1}'.format(
+        os.path.basename(dataSetFolder),
+        hashlib.sha256(dataSetFolder.encode('utf-8')).hexdigest()[:16])
+    return os.path.join(COMPILED_CORPUS_FOLDER, dataSetKey, subDir, fileName)
+
+
+def _sourceStat(filePath):
+    stat = os.stat(filePath)
+    return [
+        stat.st_size,
+        getattr(stat, 'st_mtime_ns', int(stat.st_mtime * 1e9))]
+
+
+def _readTexts(filePath, isGold, sentenceSeperator):
+    '''
+        output: list of the texts of every document of the file, read the
+        way the benchmark reads them (codecs lines, parseReferences)
+    '''
+    documents = []
+    goldFormat = None
+    with codecs.open(filePath, 'rb', 'utf-8') as f:
+        for line in f:
+            if not isGold:
+                if sentenceSeperator:
+                    line = line.replace(sentenceSeperator, '')
+                documents.append([line])
+                continue
+            if goldFormat is None:
+                goldFormat = inferGoldFormat(line)
+            documents.append(parseReferences(line, goldFormat))
+    return documents
+
+
+def compileCorpus(filePath, tokenizer, isGold, sentenceSeperator=None,
+                  tokenizations=None, folder=None):
+    '''
+        input: path to a samples or gold file, the benchmark Tokenizer,
+        whether it is a gold file and, for pre tokenized samples, the
+        sentence seperator removed before tokenizing (as the summarizers
+        get the text)
+        output: TokenizedCorpus of the file, written to folder (by default
+        compiledCorpusFolder(filePath))
+    '''
+    if tokenizations is None:
+        tokenizations = GOLD_TOKENIZATIONS if isGold \
+            else SAMPLE_TOKENIZATIONS
+    if folder is None:
+        folder = compiledCorpusFolder(filePath)
+    sentenceSeperator = None if isGold else sentenceSeperator
+
+    stat = _sourceStat(filePath)
+    documents = _readTexts(filePath, isGold, sentenceSeperator)
+    texts = [text for document in documents for text in document]
+
+    temporaryFolder = '{0}.tmp'.format(folder)
+    if os.path.exists(temporaryFolder):
+        shutil.rmtree(temporaryFolder)
+    createFolderIfNotExists(temporaryFolder)
+
+    def writeArray(name, values, dtype):
+        np.asarray(values, dtype=dtype).tofile(
+            os.path.join(temporaryFolder, name))
+
+    vocabulary = {}
+    tokenizationFunctions = corpusTokenizations(tokenizer)
+    for tokenization in tokenizations:
+        tokens, sentenceOffsets, textOffsets, spans = [], [0], [0], []
+        hasSpans = False
+        for sentences, sentenceSpans in tokenizationFunctions[tokenization](
+                texts):
+            for sentence in sentences:
+                for token in sentence:
+                    tokenId = vocabulary.get(token)
+                    if tokenId is None:
+                        tokenId = vocabulary[token] = len(vocabulary)
+                    tokens.append(tokenId)
+                sentenceOffsets.append(len(tokens))
+            textOffsets.append(len(sentenceOffsets) - 1)
+            if sentenceSpans is not None:
+                hasSpans = True
+                spans.extend(sentenceSpans)
+
+        writeArray('{0}.tokens.int32'.format(tokenization), tokens, np.int32)
+        writeArray('{0}.sentences.int64'.format(tokenization),
+                   sentenceOffsets, np.int64)
+        writeArray('{0}.texts.int64'.format(tokenization),
+                   textOffsets, np.int64)
+        if hasSpans:
+            writeArray('{0}.spans.int64'.format(tokenization),
+                       spans, np.int64)
+
+    writeArray(
+        'documents.int64',
+        np.cumsum([0] + [len(document) for document in documents]),
+        np.int64)
+
+    words = sorted(vocabulary, key=vocabulary.get)
+    with codecs.open(os.path.join(temporaryFolder, 'vocabulary.txt'), 'wb',
+                     'utf-8') as f:
+        for word in words:
+            f.write(u'{0}\n'.format(json.dumps(word)))
+
+    header = {
+        'version': CORPUS_FORMAT_VERSION,
+        'source': stat,
+        'tokenizer': tokenizer.targetTokenizer.lower(),
+        'sentenceSeperator': sentenceSeperator,
+        'tokenizations': list(tokenizations),
+        'documents': len(documents)
+    }
+    with open(os.path.join(temporaryFolder, 'header.json'), 'w') as f:
+        json.dump(header, f)
+
+    if os.path.exists(folder):
+        shutil.rmtree(folder)
+    os.rename(temporaryFolder, folder)
+    return TokenizedCorpus(folder)
+
+
+def openCompiledCorpus(filePath, tokenizerName, sentenceSeperator=None,
+                       isGold=True):
+    '''
+        output: TokenizedCorpus of the file, None if it was not compiled
+        or the file, tokenizer or sentence seperator changed since
+    '''
+    folder = compiledCorpusFolder(filePath)
+    try:
+        with open(os.path.join(folder, 'header.json')) as f:
+            header = json.load(f)
+        stat = _sourceStat(filePath)
+    except (IOError, OSError, ValueError):
+        return None
+
+    expected = {
+        'version': CORPUS_FORMAT_VERSION,
+        'source': stat,
+        'tokenizer': tokenizerName.lower(),
+        'sentenceSeperator': None if isGold else sentenceSeperator
+    }
+    for key, value in expected.items():
+        if header.get(key) != value:
+            return None  # Stale
+    return TokenizedCorpus(folder, header)
+
+
+def compileDataSet(dataSetFolder, tokenizer, sentenceSeperator=None):
+    '''
+        Compiles the samples and gold files of a dataset that are missing
+        or stale. sentenceSeperator is that of pre tokenized samples.
+        output: number of files compiled
+    '''
+    compiled = 0
+    for subDir, isGold in [('samples', False), ('gold', True)]:
+        folder = os.path.join(dataSetFolder, subDir)
+        if not os.path.isdir(folder):
+            continue
+        for fileName in sorted(os.listdir(folder)):
+            filePath = os.path.join(folder, fileName)
+            if not os.path.isfile(filePath) or openCompiledCorpus(
+                    filePath, tokenizer.targetTokenizer, sentenceSeperator,
+                    isGold) is not None:
+                continue
+            LOGGER.info('Compiling %s', filePath)
+            compileCorpus(filePath, tokenizer, isGold, sentenceSeperator)
+            compiled += 1
+    return compiled
+
+
+class TokenizedCorpus(object):
+    '''
+        Reads a compiled file (compileCorpus). Arrays are views of the
+        memory mapped files, nothing is copied until tokens are decoded.
+            len(corpus) -> number of documents
+            corpus.ids(tokenization, i) -> list of the int32 token id arrays
+                of the sentences of every text of document i
+            corpus.tokens(tokenization, i) -> the same, decoded to Strings
+            corpus.words(tokenization, i) -> list of the tokens of every
+                text of document i, its sentences concatenated
+            corpus.spans(tokenization, i) -> list of the (start, end) array
+                of the sentences of every text of document i
+    '''
+    def __init__(self, folder, header=None):
+        self.folder = folder
+        if header is None:
+            with open(os.path.join(folder, 'header.json')) as f:
+                header = json.load(f)
+        self.header = header
+        self.tokenizations = header['tokenizations']
+        self.arrays = {}
+        self._vocabulary = None
+
+        self.documents = self._array('documents.int64', np.int64)
+
+    def __len__(self):
+        return len(self.documents) - 1
+
+    def _array(self, name, dtype):
+        '''
+            output: read only array of the memory mapped file
+        '''
+        if name in self.arrays:
+            return self.arrays[name]
+
+        path = os.path.join(self.folder, name)
+        if not os.path.getsize(path):  # mmap cannot map empty files
+            array = np.zeros(0, dtype=dtype)
+        else:
+            # The map is closed once no array uses it
+            with open(path, 'rb') as f:
+                array = np.frombuffer(mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ), dtype=dtype)
+        self.arrays[name] = array
+        return array
+
+    def _arrays(self, tokenization):
+        if tokenization not in self.tokenizations:
+            raise ValueError(
+                '{0}: Is not a compiled tokenization. Expected {1}'.format(
+                    tokenization, ', '.join(self.tokenizations)))
+        return (
+            self._array('{0}.tokens.int32'.format(tokenization), np.int32),
+            self._array('{0}.sentences.int64'.format(tokenization), np.int64),
+            self._array('{0}.texts.int64'.format(tokenization), np.int64))
+
+    @property
+    def vocabulary(self):
+        '''
+            list of the tokens, indexed by id
+        '''
+        if self._vocabulary is None:
+            with codecs.open(os.path.join(self.folder, 'vocabulary.txt'),
+                             'rb', 'utf-8') as f:
+                self._vocabulary = [json.loads(line) for line in f]
+        return self._vocabulary
+
+    def decode(self, ids):
+        vocabulary = self.vocabulary
+        return [vocabulary[tokenId] for tokenId in ids.tolist()]
+
+    def ids(self, tokenization, i):
+        tokens, sentences, texts = self._arrays(tokenization)
+        start, end = self.documents[i], self.documents[i + 1]
+        return [
+            [
+                tokens[sentences[s]:sentences[s + 1]]
+                for s in range(texts[t], texts[t + 1])
+            ]
+            for t in range(start, end)
+        ]
+
+    def tokens(self, tokenization, i):
+        return [
+            [self.decode(sentence) for sentence in text]
+            for text in self.ids(tokenization, i)
+        ]
+
+    def words(self, tokenization, i):
+        tokens, sentences, texts = self._arrays(tokenization)
+        start, end = self.documents[i], self.documents[i + 1]
+        return [
+            self.decode(tokens[sentences[texts[t]]:sentences[texts[t + 1]]])
+            for t in range(start, end)
+        ]
+
+    def spans(self, tokenization, i):
+        spans = self._array(
+            '{0}.spans.int64'.format(tokenization), np.int64).reshape(-1, 2)
+        tokens, sentences, texts = self._arrays(tokenization)
+        start, end = self.documents[i], self.documents[i + 1]
+        return [spans[texts[t]:texts[t + 1]] for t in range(start, end)]
@@ -28,3 +28,56 @@ DEFAULT_TOKENIZER = 'NLTK'
 DEFAULT_TEXT_SEPERATOR = '\n'
 DEFAULT_SENTENCE_SEPERATOR = '[BREAK]'
 DEFAULT_SENTENCE_COUNT = 3
+DEFAULT_WORKERS = 1
+DEFAULT_CACHE_MAX_SIZE_MB = 512
+# Summarizers whose output is not a function of their input (the cache would
+# freeze a single random draw).
+NON_CACHEABLE_SUMMARIZERS = set(['sumyrandom'])
+DEFAULT_STREAMING_WINDOW = 64
+DEFAULT_SPACY_LANGUAGE = 'en'
+DEFAULT_TOKENIZER_BATCH_SIZE = 1000
+DEFAULT_TOKENIZER_PROCESSES = 1
+DEFAULT_ROUGE_MULTI_REFERENCE = 'pairs'
+DEFAULT_ROUGE_BATCH_SIZE = 1000
+ROUGE_MULTI_REFERENCE_MODES = set(['pairs', 'mean', 'max'])
+DEFAULT_METEOR_WORKERS = 1
+DEFAULT_METEOR_MEMORY = '2G'
+DEFAULT_METEOR_BATCH_SIZE = 64
+DEFAULT_METEOR_BULK = True
+DEFAULT_METEOR_BULK_MIN_SAMPLES = 1000
+DEFAULT_NIST_BATCH_SIZE = 256
+DEFAULT_CIDER_VARIANT = 'cider-d'
+CIDER_VARIANTS = set(['cider', 'cider-d'])
+DEFAULT_PYROUGE_WORKERS = 1
+DEFAULT_PYROUGE_CHUNK_SIZE = 500
+DEFAULT_PYROUGE_ENGINE = 'perl'
+PYROUGE_ENGINES = set(['perl', 'native'])
+DEFAULT_PYROUGE_OPTIONS = '-c 95 -2 -1 -U -r 1000 -n 4 -w 1.2 -a -m'
+DEFAULT_METRIC_LEVEL = 'sentence'
+METRIC_LEVELS = set(['sentence', 'corpus'])
+DEFAULT_SIGNIFICANCE_RESAMPLES = 10000
+DEFAULT_SIGNIFICANCE_CONFIDENCE = 0.95
+DEFAULT_SIGNIFICANCE_SEED = 0
+DEFAULT_SIGNIFICANCE_CHUNK_SIZE = 1000
+
+# Resource classes used by the job scheduler. Jobs that wait on a remote
+# service or an external process run on their own executors so they do not
+# hold up local CPU work.
+RESOURCE_CLASSES = ['cpu', 'remote', 'jvm', 'perl']
+DEFAULT_RESOURCE_CLASS = 'cpu'
+DEFAULT_RESOURCE_LIMITS = {
+    'cpu': 1,
+    'remote': 4,
+    'jvm': 1,
+    'perl': 1
+}
+
+SUMMARIZER_RESOURCE_CLASSES = {
+    'sedona': 'remote',
+    'recollect': 'remote'
+}
+
+EVALUATOR_RESOURCE_CLASSES = {
+    'meteor': 'jvm',
+    'pyrouge': 'perl'
+}
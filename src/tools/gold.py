@@ -0,0 +1,182 @@
+import atexit
+import codecs
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+
+from tools.SRO import inferGoldFormat, parseReferences
+from tools.corpus import openCompiledCorpus
+from tools.utils import createFolderIfNotExists
+
+from tools.logger import Logger
+LOGGER = Logger.getInstance()
+
+GOLD_ARTIFACT_VERSION = 3
+
+
+class GoldArtifact(object):
+    '''
+        The references of every document of a gold file, as prepared by
+        each metric (tokens, sentence splits, n-gram counts). A metric's
+        preparation is built the first time it is needed and then shared by
+        every summarizer evaluated against the gold file.
+            artifact.references() -> list(list(String)), per document
+            artifact.prepared(accumulator) -> list, per document, of
+                accumulator.prepareReferences(references)
+        Preparations of accumulators with a preparationKey() are also
+        pickled to cacheFolder and reused by later runs until the gold file
+        changes. Accumulators with preparesFiles are given a folder of their
+        own to write files to (e.g. the references in the format an external
+        scorer reads), kept in cacheFolder next to the pickle.
+        With compiled, accumulators with compiledTokenizations prepare the
+        references from the tokens of the compiled gold file
+        (tools/corpus.py), if it is up to date, instead of tokenizing them.
+    '''
+    def __init__(self, goldFilePath, cacheFolder=None, compiled=False):
+        self.goldFilePath = goldFilePath
+        self.cacheFolder = cacheFolder
+        self.compiled = compiled
+        self.lock = threading.Lock()
+        self._references = None
+        self.preparations = {}
+        self.corpora = {}  # dict(tokenizer: TokenizedCorpus or None)
+
+        stat = os.stat(goldFilePath)
+        self.goldStat = (
+            stat.st_size,
+            getattr(stat, 'st_mtime_ns', int(stat.st_mtime * 1e9)))
+
+    def references(self):
+        with self.lock:
+            if self._references is None:
+                self._references = self._readReferences()
+            return self._references
+
+    def _readReferences(self):
+        references = []
+        goldFormat = None
+        with codecs.open(self.goldFilePath, 'rb', 'utf-8') as goldFile:
+            for line in goldFile:
+                if goldFormat is None:
+                    goldFormat = inferGoldFormat(line)
+                references.append(parseReferences(line, goldFormat))
+        return references
+
+    def prepared(self, accumulator):
+        '''
+            input: MetricAccumulator
+            output: list of the prepared references of every document.
+        '''
+        key = accumulator.preparationKey()
+        if key is None:
+            return self.references()
+
+        references = self.references()
+        with self.lock:
+            if key in self.preparations:
+                return self.preparations[key]
+
+            preparesFiles = getattr(accumulator, 'preparesFiles', False)
+            prepared = self._loadPreparation(key, preparesFiles)
+            if prepared is None:
+                kwargs = {}
+                if preparesFiles:
+                    kwargs['folder'] = self._preparationFolder(key)
+                corpus = self._compiledCorpus(accumulator, len(references))
+                if corpus is not None:
+                    kwargs['corpus'] = corpus
+                prepared = accumulator.prepareAllReferences(
+                    references, **kwargs)
+                self._savePreparation(key, prepared)
+
+            self.preparations[key] = prepared
+            return prepared
+
+    def _compiledCorpus(self, accumulator, numDocuments):
+        '''
+            output: TokenizedCorpus of the gold file with the tokenizations
+            of the accumulator, None if there is none.
+        '''
+        tokenizations = getattr(accumulator, 'compiledTokenizations', ())
+        if not self.compiled or not tokenizations:
+            return None
+
+        tokenizerName = accumulator.tokenizer.targetTokenizer.lower()
+        if tokenizerName not in self.corpora:
+            self.corpora[tokenizerName] = openCompiledCorpus(
+                self.goldFilePath, tokenizerName)
+        corpus = self.corpora[tokenizerName]
+        if corpus is None or len(corpus) != numDocuments or any(
+                tokenization not in corpus.tokenizations
+                for tokenization in tokenizations):
+            return None
+        return corpus
+
+    def _preparationPath(self, key):
+        name = hashlib.sha1('{0}|{1}'.format(
+            os.path.abspath(self.goldFilePath), key).encode('utf-8'))
+        return os.path.join(
+            self.cacheFolder, '{0}.pickle'.format(name.hexdigest()))
+
+    def _filesPath(self, key):
+        return '{0}.files'.format(
+            os.path.splitext(self._preparationPath(key))[0])
+
+    def _preparationFolder(self, key):
+        '''
+            output: empty folder for the files of the preparation. Without
+            a cacheFolder it is removed when the run exits.
+        '''
+        if self.cacheFolder is None:
+            folder = tempfile.mkdtemp(prefix='gold-')
+            atexit.register(shutil.rmtree, folder, True)
+            return folder
+
+        folder = self._filesPath(key)
+        if os.path.exists(folder):
+            shutil.rmtree(folder)  # Files of a stale preparation
+        createFolderIfNotExists(folder)
+        return folder
+
+    def _header(self, key):
+        return (GOLD_ARTIFACT_VERSION, key) + self.goldStat
+
+    def _loadPreparation(self, key, preparesFiles=False):
+        if self.cacheFolder is None:
+            return None
+
+        path = self._preparationPath(key)
+        try:
+            with open(path, 'rb') as f:
+                if pickle.load(f) != self._header(key):
+                    return None  # Stale, the gold file has changed
+                prepared = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+        if preparesFiles and not os.path.isdir(self._filesPath(key)):
+            return None  # The files were removed from the cache
+        return prepared
+
+    def _savePreparation(self, key, prepared):
+        if self.cacheFolder is None:
+            return
+
+        createFolderIfNotExists(self.cacheFolder)
+        path = self._preparationPath(key)
+        temporaryPath = '{0}.tmp'.format(path)
+        try:
+            with open(temporaryPath, 'wb') as f:
+                pickle.dump(self._header(key), f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(prepared, f, pickle.HIGHEST_PROTOCOL)
+            try:
+                os.replace(temporaryPath, path)
+            except AttributeError:  # Python 2
+                os.rename(temporaryPath, path)
+        except (IOError, OSError) as err:
+            LOGGER.warning(
+                'Unable to cache references of %s: %s',
+                self.goldFilePath, err)
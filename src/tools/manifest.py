@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import threading
+
+
+class RunManifest(object):
+    '''
+        Records what every output of a benchmark run was built from, so the
+        next run only recomputes outputs whose inputs changed.
+        {
+            'files': {
+                'path': {'size': int, 'mtime': int, 'sha256': String}
+            },
+            'summaries': {
+                'summaryFilePath': {
+                    'inputs': digest, 'complete': bool,
+                    'output': String, 'failedIndicies': list(int)
+                }
+            },
+            'reports': {
+                'summaryFilePath|goldFilePath|metric': {
+                    'inputs': digest, 'report': report
+                }
+            },
+            'plots': {
+                'inputs': digest, 'outputs': {'path': sha256}
+            }
+        }
+        A fingerprint is a JSON serializable description of the inputs: file
+        content hashes, effective configuration and source code hashes. Only
+        its digest is stored. File hashes are memoized by size and
+        modification time, so unchanged files are never read again.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.manifest = {
+            'files': {},
+            'summaries': {},
+            'reports': {},
+            'plots': None
+        }
+
+        if os.path.exists(path):
+            with open(path) as f:
+                try:
+                    self.manifest.update(json.load(f))
+                except ValueError:
+                    pass  # Corrupt manifest, everything is recomputed
+
+    def save(self):
+        with self.lock:
+            temporaryPath = '{0}.tmp'.format(self.path)
+            with open(temporaryPath, 'w') as f:
+                json.dump(self.manifest, f, sort_keys=True)
+            try:
+                os.replace(temporaryPath, self.path)
+            except AttributeError:  # Python 2
+                os.rename(temporaryPath, self.path)
+
+    @staticmethod
+    def digest(fingerprint):
+        return hashlib.sha256(json.dumps(
+            fingerprint, sort_keys=True).encode('utf-8')).hexdigest()
+
+    # Fingerprints
+    def fileHash(self, filePath):
+        '''
+            output: sha256 of the file contents, or None if it is missing.
+        '''
+        if not os.path.exists(filePath):
+            return None
+
+        key = os.path.abspath(filePath)
+        stat = os.stat(filePath)
+        mtime = getattr(stat, 'st_mtime_ns', int(stat.st_mtime * 1e9))
+
+        with self.lock:
+            memo = self.manifest['files'].get(key)
+            if memo and memo['size'] == stat.st_size and \
+                    memo['mtime'] == mtime:
+                return memo['sha256']
+
+        digest = hashlib.sha256()
+        with open(filePath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+
+        sha256 = digest.hexdigest()
+        with self.lock:
+            self.manifest['files'][key] = {
+                'size': stat.st_size,
+                'mtime': mtime,
+                'sha256': sha256
+            }
+        return sha256
+
+    def sourceHash(self, filePaths):
+        '''
+            output: combined hash of a list of source files, used to notice
+            changes to the code that produced an output.
+        '''
+        hashes = [
+            self.fileHash(filePath)
+            for filePath in sorted(set(filePaths)) if filePath
+        ]
+        return hashlib.sha256(
+            json.dumps(hashes).encode('utf-8')).hexdigest()
+
+    # Summaries
+    def summaryRecord(self, summaryFilePath):
+        with self.lock:
+            return self.manifest['summaries'].get(summaryFilePath)
+
+    def isSummaryFresh(self, summaryFilePath, fingerprint):
+        record = self.summaryRecord(summaryFilePath)
+        if not record or record['inputs'] != self.digest(fingerprint) or \
+                not record['complete']:
+            return False
+
+        return self.fileHash(summaryFilePath) == record['output']
+
+    def startSummary(self, summaryFilePath, fingerprint):
+        '''
+            Marks the summaries as being built from fingerprint. Returns
+            False if a previous, unfinished build used other inputs, in which
+            case its partial progress must be discarded.
+        '''
+        digest = self.digest(fingerprint)
+        with self.lock:
+            record = self.manifest['summaries'].get(summaryFilePath)
+            sameInputs = record is None or record['inputs'] == digest
+            self.manifest['summaries'][summaryFilePath] = {
+                'inputs': digest,
+                'complete': False,
+                'output': None,
+                'failedIndicies': []
+            }
+            self.save()
+        return sameInputs
+
+    def finishSummary(self, summaryFilePath, failedIndicies):
+        with self.lock:
+            record = self.manifest['summaries'][summaryFilePath]
+            record['complete'] = True
+            record['output'] = self.fileHash(summaryFilePath)
+            record['failedIndicies'] = sorted(failedIndicies)
+            self.save()
+
+    # Reports
+    def _reportKey(self, summaryFilePath, goldFilePath, evaluatorKey):
+        return '|'.join([summaryFilePath, goldFilePath, evaluatorKey])
+
+    def fetchReport(self, summaryFilePath, goldFilePath, evaluatorKey,
+                    fingerprint):
+        '''
+            output: tuple(found, report) of a previous run with the same
+            inputs.
+        '''
+        key = self._reportKey(summaryFilePath, goldFilePath, evaluatorKey)
+        with self.lock:
+            record = self.manifest['reports'].get(key)
+        if record and record['inputs'] == self.digest(fingerprint):
+            return True, record['report']
+        return False, None
+
+    def recordReport(self, summaryFilePath, goldFilePath, evaluatorKey,
+                     fingerprint, report):
+        key = self._reportKey(summaryFilePath, goldFilePath, evaluatorKey)
+        with self.lock:
+            self.manifest['reports'][key] = {
+                'inputs': self.digest(fingerprint),
+                'report': report
+            }
+            self.save()
+
+    # Plots
+    def arePlotsFresh(self, fingerprint):
+        '''
+            Plots are fresh if they were drawn from the same inputs and every
+            file they wrote is still there, unchanged.
+        '''
+        with self.lock:
+            record = self.manifest['plots']
+        if not isinstance(record, dict) or not record['outputs'] or \
+                record['inputs'] != self.digest(fingerprint):
+            return False
+
+        return all(
+            self.fileHash(path) == sha256
+            for path, sha256 in record['outputs'].items())
+
+    def recordPlots(self, fingerprint, outputPaths):
+        '''
+            input: fingerprint of the plots, list of the files they wrote
+        '''
+        outputs = dict(
+            (os.path.abspath(path), self.fileHash(path))
+            for path in outputPaths)
+        with self.lock:
+            self.manifest['plots'] = {
+                'inputs': self.digest(fingerprint),
+                'outputs': outputs
+            }
+            self.save()
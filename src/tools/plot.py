@@ -111,8 +111,10 @@ class reportTreeReformatter:
 
 class csvPlotter:
 
-    def __init__(self, summarizers, evaluators, reportTree):
+    def __init__(self, summarizers, evaluators, reportTree,
+                 significance=None):
         self.reportTree = reportTree
+        self.significance = significance or {}
         self.summarizers = summarizers
         self.evaluators = evaluators
         self.reportTreeReformatter = reportTreeReformatter(
@@ -173,6 +175,56 @@ class csvPlotter:
         csvFilePaths = self.writeCSVs(allCSVLists)
         self.plotTables(csvFilePaths)
 
+    def plotSignificance(self):
+        '''
+            Writes the confidence intervals and the paired tests of every
+            corpus (tools/significance.py) to their own CSVs.
+        '''
+        for corpus in self.significance:
+            corpusFileName = os.path.split(corpus)[1]
+            intervals, tests = self.significanceToCSVFormat(
+                self.significance[corpus])
+
+            self.plotTable(self.writeToCSV(
+                intervals, '{0}_confidence_intervals'.format(corpusFileName)))
+            self.plotTable(self.writeToCSV(
+                tests, '{0}_significance'.format(corpusFileName)))
+
+    def significanceToCSVFormat(self, corpusSignificance):
+        '''
+            corpusSignificance
+            {
+                'metric': {
+                    'intervals': {'summarizer': {'field': (mean, low, high)}},
+                    'tests': [{'a', 'b', 'field', 'documents', 'difference',
+                               'low', 'high', 'bootstrapP', 'permutationP'}]
+                }
+            }
+        '''
+        intervals = [[
+            'Metric', 'Score', 'System', 'Mean', 'CI Low', 'CI High']]
+        tests = [[
+            'Metric', 'Score', 'System A', 'System B', 'Documents',
+            'Mean Difference (A - B)', 'CI Low', 'CI High', 'Bootstrap p',
+            'Permutation p']]
+
+        for metric in sorted(corpusSignificance):
+            metricSignificance = corpusSignificance[metric]
+            for summarizer in self.summarizers:
+                fields = metricSignificance['intervals'].get(summarizer, {})
+                for field in sorted(fields):
+                    intervals.append(
+                        [metric.upper(), field, summarizer] +
+                        list(fields[field]))
+
+            for test in metricSignificance['tests']:
+                tests.append([
+                    metric.upper(), test['field'], test['a'], test['b'],
+                    test['documents'], test['difference'], test['low'],
+                    test['high'], test['bootstrapP'], test['permutationP']])
+
+        return intervals, tests
+
     def writeCSVs(self, CSVs):
         csvFilePaths = []
         metrics = self.evaluators
@@ -374,8 +426,9 @@ class csvPlotter:
 
 
 class plotFormatter:
-    def __init__(self, summarizers, metrics, reportTree):
+    def __init__(self, summarizers, metrics, reportTree, significance=None):
         self.reportTree = reportTree
+        self.significance = significance or {}
         self.metrics = metrics
         self.summarizers = summarizers
         self.defaultFontSize = 12
@@ -411,6 +464,7 @@ class plotFormatter:
             'meteor': self.drawNumericPlot('meteor'),
             'bleu': self.drawNumericPlot('bleu'),
             'nist': self.drawNumericPlot('nist'),
+            'cider': self.drawNumericPlot('cider'),
             'rouge': self.drawRougePlot,
             'pyrouge': self.drawPyRougePlot
         }
@@ -464,7 +518,9 @@ class plotFormatter:
                     indexes + (barWidth * count),
                     values,
                     barWidth, align='center',
-                    label=summarizer, color=palette[count])
+                    label=summarizer, color=palette[count],
+                    xerr=self.errorBars(
+                        metricName.lower(), 'score', summarizer, values))
 
                 count += 1
 
@@ -780,10 +836,91 @@ class plotFormatter:
                 indexes + (barWidth * count),
                 reformValues,
                 barWidth, align='center',
-                label=summarizer, color=palette[count])
+                label=summarizer, color=palette[count],
+                xerr=self.errorBars(
+                    'rouge', '{0}.{1}'.format(targetRouge, scoreTarget),
+                    summarizer, reformValues))
 
             count += 1
 
+    def errorBars(self, metric, field, summarizer, values):
+        '''
+            output: (2, corpora) array of the distances from the bars to
+            both ends of the bootstrap confidence interval of the summarizer
+            in every corpus, or None if there are no intervals.
+        '''
+        errors = np.zeros((2, len(values)))
+        found = False
+        for i, (corpus, value) in enumerate(zip(self.corpora, values)):
+            interval = self.significance.get(corpus, {}).get(metric, {})\
+                .get('intervals', {}).get(summarizer, {}).get(field)
+            if interval is None:
+                continue
+            mean, low, high = interval
+            errors[0][i] = max(value - low, 0)
+            errors[1][i] = max(high - value, 0)
+            found = True
+
+        return errors if found else None
+
+    def drawSignificance(self, pdf):
+        '''
+            Draws the permutation test p-values between every pair of
+            summarizers as a heatmap per corpus, metric and F score.
+        '''
+        for corpus in self.significance:
+            corpusName = os.path.split(corpus)[1]
+            for metric in sorted(self.significance[corpus]):
+                tests = self.significance[corpus][metric]['tests']
+                fields = sorted(set(
+                    test['field'] for test in tests
+                    if test['field'] == 'score' or
+                    test['field'].endswith('.f')))
+                for field in fields:
+                    self.drawSignificanceHeatmap(
+                        corpusName, metric, field,
+                        [test for test in tests if test['field'] == field],
+                        pdf)
+
+    def drawSignificanceHeatmap(self, corpusName, metric, field, tests, pdf):
+        summarizers = sorted(set(
+            [test['a'] for test in tests] + [test['b'] for test in tests]))
+        position = dict(
+            (summarizer, i) for i, summarizer in enumerate(summarizers))
+
+        pValues = np.full((len(summarizers), len(summarizers)), np.nan)
+        for test in tests:
+            a, b = position[test['a']], position[test['b']]
+            pValues[a][b] = pValues[b][a] = test['permutationP']
+
+        plt.close('all')
+        fig, ax = plt.subplots(figsize=(12, 10))
+        sns.heatmap(
+            pValues, ax=ax, annot=True, fmt='.3f', vmin=0, vmax=1,
+            cmap='viridis', xticklabels=summarizers,
+            yticklabels=summarizers)
+
+        title = '{0} {1} {2}'.format(corpusName, metric.upper(), field)
+        ax.set_title(
+            '{0} paired permutation test p-values'.format(title),
+            fontsize=self.largeFontSize)
+
+        plt.savefig(
+            "../figs/" +
+            '{0}_{1}_{2}_significance'.format(
+                corpusName, metric.upper(), field) +
+            "_heatmap_" +
+            str(datetime.now()) +
+            '.pdf',
+            format='pdf',
+            bbox_inches='tight',
+            pad_inches=.1)
+
+        pdf.savefig(
+            plt.gcf(),
+            bbox_inches='tight',
+            pad_inches=.1)
+
     def draw(self):
         with PdfPages(self.pdfPath) as pdf:
             systemsCorpusFormatByMetric = self.systemsCorpusFormatByMetric
@@ -791,3 +928,5 @@ class plotFormatter:
                 method = self.plotMap[metric]
                 systemsCorpusFormat = systemsCorpusFormatByMetric[metric]
                 method(systemsCorpusFormat, pdf)
+
+            self.drawSignificance(pdf)
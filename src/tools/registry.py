@@ -0,0 +1,109 @@
+import importlib
+import threading
+
+from tools.logger import Logger
+LOGGER = Logger.getInstance()
+
+
+class PluginRegistry(object):
+    '''
+        Maps summarizer or evaluator keys to loaders. A loader is only
+        called, and so its libraries are only imported, the first time its
+        key is fetched. Nothing is imported for keys that are not enabled.
+
+        Built in plugins are declared with register(key, loader). Third
+        party packages declare theirs as entry points in entryPointGroup:
+            entry_points={
+                'text_generation_benchmark.summarizers': [
+                    'mySummarizer = my_package.module:summarize'
+                ]
+            }
+        Entry points are only scanned when a key is not declared in code.
+    '''
+    def __init__(self, entryPointGroup):
+        self.entryPointGroup = entryPointGroup
+        self.loaders = {}
+        self.loaded = {}
+        self.entryPoints = None
+        self.lock = threading.Lock()
+
+    def register(self, key, loader):
+        '''
+            input: key and a function returning the summarizer or
+            evaluator object. It is called with the keyword options given to
+            fetch, if any.
+        '''
+        self.loaders[key.lower()] = loader
+
+    def registerModule(self, key, moduleName, attribute, package=None):
+        '''
+            Declares a key whose object is attribute of moduleName. The
+            module is imported when the key is first fetched.
+        '''
+        def loader(**options):
+            module = importlib.import_module(moduleName, package)
+            return getattr(module, attribute)
+        self.register(key, loader)
+
+    def _loadEntryPoints(self):
+        if self.entryPoints is not None:
+            return self.entryPoints
+
+        entryPoints = {}
+        try:  # Python 3.8+
+            from importlib import metadata
+            allEntryPoints = metadata.entry_points()
+            if hasattr(allEntryPoints, 'select'):
+                group = allEntryPoints.select(group=self.entryPointGroup)
+            else:
+                group = allEntryPoints.get(self.entryPointGroup, [])
+        except ImportError:
+            try:
+                import pkg_resources
+                group = pkg_resources.iter_entry_points(self.entryPointGroup)
+            except ImportError:
+                group = []
+
+        for entryPoint in group:
+            entryPoints[entryPoint.name.lower()] = entryPoint
+
+        self.entryPoints = entryPoints
+        return entryPoints
+
+    def isBuiltIn(self, key):
+        return key.lower() in self.loaders
+
+    def keys(self):
+        '''
+            output: set of every declared key, including entry points.
+        '''
+        keys = set(self.loaders)
+        keys.update(self._loadEntryPoints())
+        return keys
+
+    def __contains__(self, key):
+        key = key.lower()
+        return key in self.loaders or key in self._loadEntryPoints()
+
+    def fetch(self, key, **options):
+        '''
+            input: key and keyword options of its loader (e.g. the number of
+            workers of an evaluator). Entry points take no options.
+            output: the object of the key, loaded once.
+        '''
+        key = key.lower()
+        with self.lock:
+            if key in self.loaded:
+                return self.loaded[key]
+
+            if key in self.loaders:
+                loaded = self.loaders[key](**options)
+            elif key in self._loadEntryPoints():
+                LOGGER.info('Loading plugin %s from %s', key,
+                            self.entryPointGroup)
+                loaded = self._loadEntryPoints()[key].load()
+            else:
+                raise KeyError(key)
+
+            self.loaded[key] = loaded
+            return loaded
@@ -0,0 +1,116 @@
+import concurrent.futures
+
+from tools.logger import Logger
+LOGGER = Logger.getInstance()
+
+
+class Job(object):
+    '''
+        A unit of work in the benchmark job graph.
+            name: (String) used in logs.
+            resourceClass: (String) the executor the job runs on.
+                Refer to RESOURCE_CLASSES in tools/defaults.py
+            function: callable taking no arguments. Its return value is
+                stored in job.result.
+            dependencies: list(Job) that must succeed before this job starts.
+    '''
+    def __init__(self, name, resourceClass, function, dependencies=None):
+        self.name = name
+        self.resourceClass = resourceClass
+        self.function = function
+        self.dependencies = list(dependencies) if dependencies else []
+
+        self.result = None
+        self.error = None
+        self.finished = False
+
+    def isReady(self):
+        return all(dependency.finished for dependency in self.dependencies)
+
+    def hasFailedDependency(self):
+        return any(
+            dependency.error is not None
+            for dependency in self.dependencies)
+
+    def __repr__(self):
+        return 'Job({0}, {1})'.format(self.name, self.resourceClass)
+
+
+class JobScheduler(object):
+    '''
+        Runs a graph of Jobs. Every resource class gets its own thread pool
+        sized by resourceLimits, so jobs that wait on a remote service or an
+        external process do not hold up local CPU work. A job is started as
+        soon as all of its dependencies have finished.
+    '''
+    def __init__(self, resourceLimits):
+        self.resourceLimits = resourceLimits
+        self.jobs = []
+
+    def addJob(self, job):
+        if job.resourceClass not in self.resourceLimits:
+            error = '{0}: Is not a known resource class. Expected {1}'.format(
+                job.resourceClass, ', '.join(self.resourceLimits))
+            raise ValueError(error)
+
+        self.jobs.append(job)
+        return job
+
+    def run(self):
+        '''
+            Runs every job and returns the list of jobs. Jobs whose
+            dependencies failed are skipped. The first error raised by a
+            job is re-raised once everything that could run has finished.
+        '''
+        executors = dict(
+            (resourceClass, concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(int(limit), 1)))
+            for resourceClass, limit in self.resourceLimits.items()
+        )
+
+        pending = list(self.jobs)
+        running = {}  # future -> job
+        errors = []
+        try:
+            while pending or running:
+                for job in [job for job in pending if job.isReady()]:
+                    pending.remove(job)
+                    if job.hasFailedDependency():
+                        LOGGER.error(
+                            'Skipping %s. A job it depends on failed.',
+                            job.name)
+                        job.error = RuntimeError('Dependency failed')
+                        job.finished = True
+                        continue
+
+                    executor = executors[job.resourceClass]
+                    running[executor.submit(job.function)] = job
+
+                if not running:
+                    if pending:
+                        raise RuntimeError(
+                            'Unable to schedule jobs with circular '
+                            'dependencies: {0}'.format(pending))
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    running,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        job.result = future.result()
+                    except Exception as err:
+                        LOGGER.error('Job %s failed: %s', job.name, err)
+                        job.error = err
+                        errors.append(err)
+                    job.finished = True
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+
+        if errors:
+            raise errors[0]
+
+        return self.jobs
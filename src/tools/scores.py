@@ -0,0 +1,161 @@
+import codecs
+import os
+
+from collections import OrderedDict
+
+import numpy as np
+
+DOCUMENT_INDEX = 'documentIndex'
+
+
+def scoreStorePath(summaryFilePath, evaluatorKey):
+    '''
+        input: path to a summaries file and evaluator key
+        output: path of the score store of the evaluator on those summaries
+    '''
+    return '{0}.{1}.scores.npz'.format(summaryFilePath, evaluatorKey.lower())
+
+
+def documentLengths(corpusFilePath, encoding='utf-8'):
+    '''
+        output: array of the number of words of every document of a corpus,
+        e.g. to bucket a ScoreStore by document length.
+    '''
+    with codecs.open(corpusFilePath, 'rb', encoding) as corpus:
+        return np.array(
+            [len(line.split()) for line in corpus], dtype=np.int64)
+
+
+class SampleScores(object):
+    '''
+        Per sample scores collected by a MetricAccumulator, one row per
+        scored sample: the index of its document in the corpus and a value
+        for every field (e.g. 'score' or 'rouge-1.f'). A document may have
+        several rows, e.g. one per reference.
+    '''
+    def __init__(self):
+        self.documentIndex = []
+        self.columns = OrderedDict()
+
+    def __len__(self):
+        return len(self.documentIndex)
+
+    def add(self, documentIndex, fields):
+        '''
+            input: document index and dict(field: value) of one sample
+        '''
+        self.extend([documentIndex], dict(
+            (field, [value]) for field, value in fields.items()))
+
+    def extend(self, documentIndicies, fields):
+        '''
+            input: document index of every row and dict(field: sequence of
+            the values of every row)
+        '''
+        numRows = len(self.documentIndex)
+        for field, values in fields.items():
+            column = self.columns.setdefault(field, [])
+            if len(column) != numRows:
+                raise ValueError(
+                    '{0}: Field missing from earlier samples'.format(field))
+            column.extend(values)
+        self.documentIndex.extend(documentIndicies)
+
+        for field, column in self.columns.items():
+            if len(column) != len(self.documentIndex):
+                raise ValueError(
+                    '{0}: Field missing from the sample'.format(field))
+
+    def save(self, path):
+        '''
+            Writes the rows as a ScoreStore to path. The file is replaced
+            atomically.
+        '''
+        arrays = dict(
+            (field, np.asarray(column, dtype=np.float64))
+            for field, column in self.columns.items()
+        )
+        arrays[DOCUMENT_INDEX] = np.asarray(
+            self.documentIndex, dtype=np.int64)
+
+        temporaryPath = '{0}.tmp'.format(path)
+        with open(temporaryPath, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        try:
+            os.replace(temporaryPath, path)
+        except AttributeError:  # Python 2
+            os.rename(temporaryPath, path)
+
+
+class ScoreStore(object):
+    '''
+        Columnar per sample scores of one metric on one corpus, as written
+        by SampleScores.save. Aggregates are computed from the stored
+        columns, so they can be changed without scoring the corpus again.
+            store = ScoreStore.load(scoreStorePath(summaryPath, 'rouge'))
+            store.aggregate('rouge-1.f')
+            store.buckets('rouge-1.f', documentLengths(corpusPath),
+                          [0, 200, 500, 1000])
+    '''
+    def __init__(self, documentIndex, columns):
+        self.documentIndex = documentIndex
+        self.columns = columns
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            columns = OrderedDict(
+                (field, arrays[field]) for field in sorted(arrays.files)
+                if field != DOCUMENT_INDEX)
+            return cls(arrays[DOCUMENT_INDEX], columns)
+
+    def __len__(self):
+        return len(self.documentIndex)
+
+    def fields(self):
+        return list(self.columns)
+
+    def column(self, field):
+        return self.columns[field]
+
+    def documents(self):
+        '''
+            output: sorted array of the indicies of the scored documents
+        '''
+        return np.unique(self.documentIndex)
+
+    def perDocument(self, documentValues):
+        '''
+            input: array with a value for every document of the corpus
+            output: array with the value of the document of every row
+        '''
+        return np.asarray(documentValues)[self.documentIndex]
+
+    def aggregate(self, field, statistic=np.mean, mask=None):
+        '''
+            input: field, function of an array (np.mean, np.median,
+            np.sum, ...) and optionally a boolean mask of the rows to use
+            output: statistic of the field over the rows
+        '''
+        values = self.columns[field]
+        if mask is not None:
+            values = values[mask]
+        return float(statistic(values)) if len(values) else None
+
+    def buckets(self, field, documentValues, edges, statistic=np.mean):
+        '''
+            input: field, array with a value for every document of the
+            corpus (e.g. documentLengths) and increasing bucket edges
+            output: list of (low, high, rows, statistic) for every bucket
+            low <= value < high.
+        '''
+        values = self.perDocument(documentValues)
+        bucketOfRow = np.digitize(values, edges)
+
+        buckets = []
+        for bucket, (low, high) in enumerate(zip(edges, edges[1:]), 1):
+            mask = bucketOfRow == bucket
+            buckets.append((
+                low, high, int(np.sum(mask)),
+                self.aggregate(field, statistic, mask)))
+        return buckets
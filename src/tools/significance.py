@@ -0,0 +1,254 @@
+import itertools
+
+import numpy as np
+
+from tools.scores import ScoreStore, scoreStorePath
+from tools.defaults import (
+    DEFAULT_SIGNIFICANCE_RESAMPLES,
+    DEFAULT_SIGNIFICANCE_CONFIDENCE,
+    DEFAULT_SIGNIFICANCE_SEED,
+    DEFAULT_SIGNIFICANCE_CHUNK_SIZE
+)
+
+from tools.logger import Logger
+LOGGER = Logger.getInstance()
+
+# Per document score fields of each metric and the factor between them and
+# the metric's report
+SIGNIFICANCE_FIELDS = {
+    'rouge': [
+        '{0}.{1}'.format(rougeType, k)
+        for rougeType in ['rouge-1', 'rouge-2', 'rouge-l']
+        for k in ['f', 'r', 'p']
+    ],
+    'bleu': ['score'],
+    'meteor': ['score'],
+    'nist': ['score'],
+    'cider': ['score']
+}
+REPORT_SCALES = {'rouge': 100.0, 'bleu': 100.0, 'meteor': 100.0}
+
+
+def documentScores(store, fields, numDocuments):
+    '''
+        input: ScoreStore, fields and the number of documents of the corpus
+        output: tuple((numDocuments, fields) matrix of the mean of every
+        field over the rows of every document, boolean matrix of the scored
+        documents)
+    '''
+    known = store.documentIndex >= 0  # Rows added without a document
+    rowDocument = store.documentIndex[known]
+    rows = np.bincount(rowDocument, minlength=numDocuments)
+
+    scores = np.zeros((numDocuments, len(fields)))
+    for i, field in enumerate(fields):
+        sums = np.bincount(
+            rowDocument, weights=store.column(field)[known],
+            minlength=numDocuments)
+        scores[:, i] = sums / np.maximum(rows, 1)
+
+    scored = np.repeat((rows > 0)[:, None], len(fields), axis=1)
+    return scores, scored
+
+
+class Resampler(object):
+    '''
+        Resamples of the documents of a corpus as NumPy matrices, so the
+        resamples of a statistic are computed with matrix products instead
+        of a loop per resample. The matrices are generated chunkSize
+        resamples at a time, so memory stays O(chunkSize * n) whatever the
+        number of resamples.
+            counts(n): chunks of the (resamples, n) matrix of the number of
+                times every document is drawn in each resample (Poisson
+                bootstrap)
+            signs(n): chunks of the (resamples, n) matrix of random +1/-1
+                that swap the two scores of a document
+        Scores are (n, k) matrices over all n documents of the corpus with a
+        boolean (n, k) matrix of the scored documents, so the k scores of
+        every summarizer (or pair of summarizers) are resampled together.
+        Resamples that draw none of the scored documents of a column have
+        no mean and are left out of its statistics.
+    '''
+    def __init__(self, resamples=DEFAULT_SIGNIFICANCE_RESAMPLES,
+                 confidence=DEFAULT_SIGNIFICANCE_CONFIDENCE,
+                 seed=DEFAULT_SIGNIFICANCE_SEED,
+                 chunkSize=DEFAULT_SIGNIFICANCE_CHUNK_SIZE):
+        self.resamples = resamples
+        self.confidence = confidence
+        self.seed = seed
+        self.chunkSize = max(int(chunkSize), 1)
+
+    def _chunks(self, n, salt):
+        '''
+            output: generator of tuple(RandomState, rows) of every chunk.
+            Chunks are seeded on their own, so the resamples only depend on
+            the seed, n and the chunk size.
+        '''
+        for chunk, start in enumerate(
+                range(0, self.resamples, self.chunkSize)):
+            yield (np.random.RandomState([self.seed, n, salt, chunk]),
+                   min(self.chunkSize, self.resamples - start))
+
+    def counts(self, n):
+        for random, rows in self._chunks(n, 0):
+            yield random.poisson(1.0, size=(rows, n)).astype(np.float64)
+
+    def signs(self, n):
+        for random, rows in self._chunks(n, 1):
+            yield random.randint(
+                0, 2, size=(rows, n)).astype(np.float64) * 2 - 1
+
+    def means(self, scores, scored):
+        '''
+            output: (resamples, k) matrix of the mean of the scored
+            documents in every resample, NaN where a resample draws none
+        '''
+        weights = scored.astype(np.float64)
+        values = np.where(scored, scores, 0.0)
+        means = []
+        for counts in self.counts(len(scored)):
+            drawn = counts.dot(weights)
+            means.append(np.where(
+                drawn > 0, counts.dot(values) / np.maximum(drawn, 1),
+                np.nan))
+        return np.vstack(means)
+
+    def _percentiles(self, means):
+        alpha = (1.0 - self.confidence) / 2.0
+        return np.nanpercentile(
+            means, [100 * alpha, 100 * (1 - alpha)], axis=0)
+
+    def interval(self, scores, scored):
+        '''
+            output: tuple(mean, low, high) arrays of the percentile bootstrap
+            confidence intervals of the mean of every column of scores
+        '''
+        low, high = self._percentiles(self.means(scores, scored))
+        mean = np.sum(np.where(scored, scores, 0.0), axis=0) / \
+            np.maximum(np.sum(scored, axis=0), 1)
+        return mean, low, high
+
+    def pairedTests(self, a, b, scored):
+        '''
+            input: (n, k) matrices of k scores of two systems and of the
+            documents scored by both
+            output: for every score, dict with the mean difference a - b,
+            its bootstrap confidence interval and the two sided p-values of
+            the paired bootstrap test and of the paired permutation test
+        '''
+        differences = np.where(scored, a - b, 0.0)
+        numScored = np.maximum(np.sum(scored, axis=0), 1).astype(np.float64)
+        difference = differences.sum(axis=0) / numScored
+
+        # Bootstrap: how often the resampled difference changes sign
+        resampled = self.means(differences, scored)
+        low, high = self._percentiles(resampled)
+        valid = np.maximum(np.sum(~np.isnan(resampled), axis=0), 1)
+        bootstrapP = np.minimum(2 * np.minimum(
+            np.sum(resampled <= 0, axis=0),
+            np.sum(resampled >= 0, axis=0)) / valid.astype(np.float64), 1.0)
+
+        # Permutation: how often swapping the scores of random documents
+        # gives a difference at least as large
+        threshold = np.abs(difference) - 1e-12
+        exceeding = np.zeros(differences.shape[1])
+        for signs in self.signs(len(scored)):
+            exceeding += np.sum(
+                np.abs(signs.dot(differences) / numScored) >= threshold,
+                axis=0)
+        permutationP = (exceeding + 1.0) / (self.resamples + 1.0)
+
+        return [
+            {
+                'difference': float(difference[i]),
+                'low': float(low[i]),
+                'high': float(high[i]),
+                'bootstrapP': float(bootstrapP[i]),
+                'permutationP': float(permutationP[i])
+            }
+            for i in range(differences.shape[1])
+        ]
+
+
+def significanceForCorpus(summaryPaths, metrics, resampler,
+                          numDocuments=0):
+    '''
+        input: dict(summarizer: summaries file) of one corpus, metric keys,
+        a Resampler and the number of documents of the corpus
+        output: dict(metric: {
+            'intervals': {summarizer: {field: (mean, low, high)}},
+            'tests': [{'a', 'b', 'field', 'documents', 'difference', 'low',
+                       'high', 'bootstrapP', 'permutationP'}]
+        }) for the metrics with per document scores. Scores are on the
+        scale of the metric's report. Paired tests use the documents scored
+        by both summarizers.
+    '''
+    significance = {}
+    for metric in metrics:
+        metric = metric.lower()
+        if metric not in SIGNIFICANCE_FIELDS:
+            continue
+
+        stores = {}
+        for summarizer, summaryPath in summaryPaths.items():
+            path = scoreStorePath(summaryPath, metric)
+            try:
+                store = ScoreStore.load(path)
+            except (IOError, OSError):
+                LOGGER.warning('No per document %s scores in %s',
+                               metric, path)
+                continue
+            if len(store):
+                stores[summarizer] = store
+        if not stores:
+            continue
+
+        scale = REPORT_SCALES.get(metric, 1.0)
+        fields = [
+            field for field in SIGNIFICANCE_FIELDS[metric]
+            if all(field in store.columns for store in stores.values())]
+        if not fields:
+            continue  # e.g. corpus level scores only keep statistics
+
+        numDocuments = max([numDocuments] + [
+            1 + int(np.max(store.documentIndex))
+            for store in stores.values()])
+        scores = {}  # dict(summarizer: (scores, scored))
+        for summarizer, store in stores.items():
+            documentScoreMatrix, scored = documentScores(
+                store, fields, numDocuments)
+            scores[summarizer] = (documentScoreMatrix * scale, scored)
+
+        # Every summarizer, and then every pair, is resampled at once
+        summarizers = sorted(scores)
+        mean, low, high = resampler.interval(
+            np.hstack([scores[summarizer][0] for summarizer in summarizers]),
+            np.hstack([scores[summarizer][1] for summarizer in summarizers]))
+        intervals = {}
+        for j, summarizer in enumerate(summarizers):
+            intervals[summarizer] = dict(
+                (field, tuple(float(v[j * len(fields) + i])
+                              for v in (mean, low, high)))
+                for i, field in enumerate(fields))
+
+        pairs = [
+            (a, b) for a, b in itertools.combinations(summarizers, 2)
+            if np.any(scores[a][1] & scores[b][1])]
+        tests = []
+        if pairs:
+            scoredByBoth = [scores[a][1] & scores[b][1] for a, b in pairs]
+            pairTests = resampler.pairedTests(
+                np.hstack([scores[a][0] for a, b in pairs]),
+                np.hstack([scores[b][0] for a, b in pairs]),
+                np.hstack(scoredByBoth))
+            for j, (a, b) in enumerate(pairs):
+                documents = int(np.sum(scoredByBoth[j][:, 0]))
+                for i, field in enumerate(fields):
+                    test = pairTests[j * len(fields) + i]
+                    test.update(
+                        {'a': a, 'b': b, 'field': field,
+                         'documents': documents})
+                    tests.append(test)
+
+        significance[metric] = {'intervals': intervals, 'tests': tests}
+    return significance
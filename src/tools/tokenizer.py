@@ -1,15 +1,29 @@
 from __future__ import unicode_literals, print_function
 from nltk import word_tokenize, sent_tokenize
-import spacy
 from tools.defaults import (
-    SUPPORTED_TOKENIZERS
+    SUPPORTED_TOKENIZERS,
+    DEFAULT_SPACY_LANGUAGE,
+    DEFAULT_TOKENIZER_BATCH_SIZE,
+    DEFAULT_TOKENIZER_PROCESSES
 )
 
 
 class Tokenizer:
-    def __init__(self, targetTokenizer):
+    '''
+        Word and sentence tokenization with NLTK or spaCy.
+        The spaCy pipeline is created on first use and contains only what
+        tokenization needs: the language's tokenizer for words, followed by
+        a rule based sentencizer for sentences. No tagger, parser or NER
+        model is loaded.
+    '''
+    def __init__(self, targetTokenizer, batchSize=DEFAULT_TOKENIZER_BATCH_SIZE,
+                 nProcess=DEFAULT_TOKENIZER_PROCESSES,
+                 language=DEFAULT_SPACY_LANGUAGE):
         self.validateTargetTokenizer(targetTokenizer)
         self.targetTokenizer = targetTokenizer
+        self.batchSize = batchSize
+        self.nProcess = nProcess
+        self.language = language
 
         self.sentenceTokenizerMap = {
             'nltk': self._nltk_sent_tokenize,
@@ -21,7 +35,30 @@ class Tokenizer:
             'spacy': self._spacy_word_tokenize
         }
 
-        self.nlp = spacy.load('en')
+        self.manyTokenizerMap = {
+            'nltk': self._nltk_tokenize_many,
+            'spacy': self._spacy_tokenize_many
+        }
+
+        self._nlp = None
+        self._sentencizer = None
+
+    @property
+    def nlp(self):
+        '''
+            Blank spaCy pipeline of self.language, it only tokenizes.
+        '''
+        if self._nlp is None:
+            import spacy
+            self._nlp = spacy.blank(self.language)
+        return self._nlp
+
+    @property
+    def sentencizer(self):
+        if self._sentencizer is None:
+            from spacy.pipeline import Sentencizer
+            self._sentencizer = Sentencizer()
+        return self._sentencizer
 
     def validateTargetTokenizer(self, targetTokenizer):
         if targetTokenizer.lower() not in SUPPORTED_TOKENIZERS:
@@ -40,6 +77,17 @@ class Tokenizer:
         return self.wordTokenizerMap[
             self.targetTokenizer.lower()](sourceString)
 
+    def tokenize_many(self, sourceStrings, sentences=False):
+        '''
+            input: iterable of Strings. sentences selects sentence instead
+            of word tokenization.
+            output: list with the word_tokenize (or sent_tokenize) output of
+            every String, in order. spaCy tokenizes the Strings in batches of
+            self.batchSize across self.nProcess processes.
+        '''
+        return self.manyTokenizerMap[
+            self.targetTokenizer.lower()](sourceStrings, sentences)
+
     def _nltk_sent_tokenize(self, sourceString):
         sentences = sent_tokenize(sourceString)
         return sentences
@@ -48,24 +96,34 @@ class Tokenizer:
         words = word_tokenize(sourceString)
         return words
 
-    def _spacy_sent_tokenize(self, sourceString):
-        doc = self.nlp(sourceString)
+    def _nltk_tokenize_many(self, sourceStrings, sentences):
+        if sentences:
+            return [self._nltk_sent_tokenize(s) for s in sourceStrings]
+        return [self._nltk_word_tokenize(s) for s in sourceStrings]
 
-        sentences = [
-            ''.join(token.string for token in sentence)
+    def _spacy_sentences(self, doc):
+        return [
+            ''.join(token.text_with_ws for token in sentence)
             for sentence in doc.sents
         ]
 
-        return sentences
+    def _spacy_sent_tokenize(self, sourceString):
+        doc = self.sentencizer(self.nlp(sourceString))
+        return self._spacy_sentences(doc)
 
     def _spacy_word_tokenize(self, sourceString):
         doc = self.nlp(sourceString)
-        sentences = doc.sents
-
-        tokens = []
-
-        for sentence in sentences:
-            sentTokens = [token.string for token in sentence]
-            tokens.extend(sentTokens)
-
-        return tokens
+        return [token.text_with_ws for token in doc]
+
+    def _spacy_tokenize_many(self, sourceStrings, sentences):
+        kwargs = {'batch_size': self.batchSize}
+        if self.nProcess > 1:  # Older spaCy versions lack n_process
+            kwargs['n_process'] = self.nProcess
+        docs = self.nlp.pipe(sourceStrings, **kwargs)
+
+        if sentences:
+            sentencizer = self.sentencizer
+            return [
+                self._spacy_sentences(sentencizer(doc)) for doc in docs
+            ]
+        return [[token.text_with_ws for token in doc] for doc in docs]
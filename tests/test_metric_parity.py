@@ -0,0 +1,260 @@
+'''
+    The metrics rewritten on top of evaluator_source_files/ngrams.py must
+    score exactly like the implementations they replaced.
+'''
+import collections
+import math
+import random
+
+import pytest
+
+from Evaluator.evaluator_source_files.bleu import compute_bleu
+from Evaluator.evaluator_source_files.nist import (
+    NIST_ORDER,
+    prepare_all_references,
+    nist_statistics,
+    nist_scores,
+    nist_from_statistics
+)
+from Evaluator.evaluator_source_files.rouge_engine import RougeEngine
+from Evaluator.accumulators import BleuAccumulator
+from tools.tokenizer import Tokenizer
+
+VOCABULARY = ['the', 'cat', 'sat', 'on', 'a', 'mat', 'dog', 'ran', 'far',
+              'away', 'and', 'then', 'it', 'slept', 'here']
+
+
+def randomTokens(rng, minimum=0, maximum=25):
+    return [rng.choice(VOCABULARY)
+            for _ in range(rng.randint(minimum, maximum))]
+
+
+def randomText(rng, sentences=3):
+    return ' . '.join(
+        ' '.join(randomTokens(rng, 1, 12))
+        for _ in range(rng.randint(1, sentences)))
+
+
+def randomCorpus(seed, documents=200, references=3):
+    rng = random.Random(seed)
+    hypotheses = [randomTokens(rng) for _ in range(documents)]
+    referencesList = [
+        [randomTokens(rng, 1) for _ in range(rng.randint(1, references))]
+        for _ in range(documents)
+    ]
+    return hypotheses, referencesList
+
+
+# BLEU
+def _get_ngrams(segment, max_order):
+    ngram_counts = collections.Counter()
+    for order in range(1, max_order + 1):
+        for i in range(0, len(segment) - order + 1):
+            ngram_counts[tuple(segment[i:i + order])] += 1
+    return ngram_counts
+
+
+def reference_compute_bleu(translation_corpus, reference_corpus,
+                           max_order=4, smooth=False):
+    '''
+        compute_bleu before n-grams were hashed, with collections.Counter
+    '''
+    matches_by_order = [0] * max_order
+    possible_matches_by_order = [0] * max_order
+    reference_length = 0
+    translation_length = 0
+    for (references, translation) in zip(reference_corpus,
+                                         translation_corpus):
+        reference_length += min(len(r) for r in references)
+        translation_length += len(translation)
+
+        merged_ref_ngram_counts = collections.Counter()
+        for reference in references:
+            merged_ref_ngram_counts |= _get_ngrams(reference, max_order)
+        translation_ngram_counts = _get_ngrams(translation, max_order)
+        overlap = translation_ngram_counts & merged_ref_ngram_counts
+        for ngram in overlap:
+            matches_by_order[len(ngram) - 1] += overlap[ngram]
+        for order in range(1, max_order + 1):
+            possible_matches = len(translation) - order + 1
+            if possible_matches > 0:
+                possible_matches_by_order[order - 1] += possible_matches
+
+    precisions = [0] * max_order
+    for i in range(0, max_order):
+        if smooth:
+            precisions[i] = ((matches_by_order[i] + 1.) /
+                             (possible_matches_by_order[i] + 1.))
+        elif possible_matches_by_order[i] > 0:
+            precisions[i] = (float(matches_by_order[i]) /
+                             possible_matches_by_order[i])
+        else:
+            precisions[i] = 0.0
+
+    if min(precisions) > 0:
+        p_log_sum = sum((1. / max_order) * math.log(p) for p in precisions)
+        geo_mean = math.exp(p_log_sum)
+    else:
+        geo_mean = 0
+
+    ratio = float(translation_length) / reference_length
+    if ratio > 1.0:
+        bp = 1.
+    else:
+        bp = math.exp(1 - 1. / ratio)
+
+    return (geo_mean * bp, precisions, bp, ratio, translation_length,
+            reference_length)
+
+
+@pytest.mark.parametrize('smooth', [False, True])
+@pytest.mark.parametrize('max_order', [1, 2, 4])
+def test_bleu_sentences_match_counter_implementation(smooth, max_order):
+    hypotheses, referencesList = randomCorpus(0)
+    for hypothesis, references in zip(hypotheses, referencesList):
+        if not hypothesis:
+            for bleu in (compute_bleu, reference_compute_bleu):
+                with pytest.raises(ZeroDivisionError):
+                    bleu([hypothesis], [references], max_order, smooth)
+            continue
+        assert compute_bleu(
+            [hypothesis], [references], max_order, smooth) == \
+            reference_compute_bleu(
+                [hypothesis], [references], max_order, smooth)
+
+
+@pytest.mark.parametrize('smooth', [False, True])
+def test_bleu_corpus_matches_counter_implementation(smooth):
+    hypotheses, referencesList = randomCorpus(1)
+    assert compute_bleu(hypotheses, referencesList, smooth=smooth) == \
+        reference_compute_bleu(hypotheses, referencesList, smooth=smooth)
+
+
+class SplitTokenizer(Tokenizer):
+    '''
+        NLTK Tokenizer splitting sentences on '. ' and words on spaces, so
+        the tests do not need the punkt models.
+    '''
+    def __init__(self):
+        Tokenizer.__init__(self, 'NLTK', batchSize=7)
+
+    def _nltk_sent_tokenize(self, sourceString):
+        return [s for s in sourceString.split('. ') if s]
+
+    def _nltk_word_tokenize(self, sourceString):
+        return sourceString.split()
+
+
+def baseline_sentence_bleu(tokenizer, samples):
+    '''
+        Sentence level BLEU of the benchmark before references were
+        prepared: compute_bleu(hypothesisTokens, referenceTokensLists)
+    '''
+    sumScores = 0.0
+    for hypothesis, references in samples:
+        hypothesisTokens = tokenizer.word_tokenize(hypothesis)
+        referenceTokensLists = [
+            tokenizer.word_tokenize(sentence)
+            for reference in references
+            for sentence in tokenizer.sent_tokenize(reference)
+        ]
+        sumScores += reference_compute_bleu(
+            hypothesisTokens, referenceTokensLists)[0]
+    return sumScores * 100 / len(samples)
+
+
+def accumulator_sentence_bleu(tokenizer, samples):
+    accumulator = BleuAccumulator(compute_bleu, tokenizer, level='sentence')
+    for hypothesis, references in samples:
+        accumulator.add(hypothesis, references)
+    return accumulator.report()
+
+
+def test_bleu_accumulator_sentence_level_matches_baseline():
+    tokenizer = SplitTokenizer()
+    samples = [(
+        'summarization benchmarks evaluate generated',
+        ['summarization is hard. benchmarks matter',
+         'we evaluate. generated text'])]
+    assert accumulator_sentence_bleu(tokenizer, samples) == 100.0
+    assert baseline_sentence_bleu(tokenizer, samples) == 100.0
+
+    rng = random.Random(5)
+    samples = [
+        (' '.join(randomTokens(rng, 1)),
+         ['. '.join(' '.join(randomTokens(rng, 1, 8))
+                    for _ in range(rng.randint(1, 4)))
+          for _ in range(rng.randint(1, 3))])
+        for _ in range(100)
+    ]
+    assert accumulator_sentence_bleu(tokenizer, samples) == \
+        baseline_sentence_bleu(tokenizer, samples)
+
+
+# NIST
+def test_nist_sentences_match_nltk():
+    nist_score = pytest.importorskip('nltk.translate.nist_score')
+    hypotheses, referencesList = randomCorpus(2)
+    for hypothesis, references in zip(hypotheses, referencesList):
+        if len(hypothesis) < NIST_ORDER:
+            continue  # nltk divides by zero without n-grams of every order
+        prepared = prepare_all_references([references])[0]
+        assert nist_from_statistics(
+            *nist_statistics(hypothesis, prepared)) == pytest.approx(
+                nist_score.sentence_nist(references, hypothesis), rel=1e-12)
+
+
+def test_nist_corpus_matches_nltk():
+    nist_score = pytest.importorskip('nltk.translate.nist_score')
+    hypotheses, referencesList = randomCorpus(3)
+    hypotheses = [hypothesis + ['the'] * NIST_ORDER
+                  for hypothesis in hypotheses]
+    statistics = [
+        nist_statistics(hypothesis, prepared)
+        for hypothesis, prepared in zip(
+            hypotheses, prepare_all_references(referencesList))
+    ]
+    numerators, denominators, referenceLengths, hypothesisLengths = \
+        zip(*statistics)
+    score = nist_scores(
+        [[sum(column) for column in zip(*numerators)]],
+        [[sum(column) for column in zip(*denominators)]],
+        [sum(referenceLengths)], [sum(hypothesisLengths)])[0]
+    assert float(score) == pytest.approx(
+        nist_score.corpus_nist(referencesList, hypotheses), rel=1e-12)
+
+
+# ROUGE
+def test_rouge_engine_matches_rouge_package():
+    rouge = pytest.importorskip('rouge')
+    rng = random.Random(4)
+    engine, package = RougeEngine(), rouge.Rouge()
+    pairs = [(randomText(rng), randomText(rng)) for _ in range(300)]
+    pairs.extend([
+        (' . ', 'the cat sat'),
+        ('the cat sat.', '. the  cat . sat .'),
+        ('the the the', 'the'),
+        ('the cat sat . the cat sat', 'the cat sat')
+    ])
+    for hypothesis, reference in pairs:
+        expected = package.get_scores(hypothesis, reference)
+        scores = engine.get_scores(hypothesis, reference)
+        for rougeType, expectedScores in expected[0].items():
+            for key, value in expectedScores.items():
+                assert scores[0][rougeType][key] == pytest.approx(
+                    value, rel=1e-12, abs=1e-15)
+
+
+@pytest.mark.parametrize('hypothesis, reference, message', [
+    ('', 'the cat sat', 'Hypothesis is empty.'),
+    ('...', 'the cat sat', 'Hypothesis is empty.'),
+    ('the cat sat', '', 'Reference is empty.'),
+    ('the cat sat', '..', 'Reference is empty.'),
+])
+def test_rouge_engine_raises_like_rouge_package(hypothesis, reference,
+                                                message):
+    rouge = pytest.importorskip('rouge')
+    with pytest.raises(ValueError, match=message):
+        rouge.Rouge().get_scores(hypothesis, reference)
+    with pytest.raises(ValueError, match=message):
+        RougeEngine().get_scores(hypothesis, reference)
@@ -0,0 +1,73 @@
+'''
+    NativeRouge155 against the installed perl ROUGE-1.5.5, through
+    rouge155.validate. Skipped unless perl, pyrouge and a configured
+    ROUGE-1.5.5 are available.
+'''
+import os
+import random
+import shutil
+
+import pytest
+
+from Evaluator.evaluator_source_files.rouge155 import validate
+from Evaluator.evaluator_source_files.pyrouge_runner import (
+    write_see_file,
+    write_models
+)
+
+TOLERANCE = 1e-5
+WORDS = ['the', 'cats', 'sat', 'on', 'a', 'mat', 'dogs', 'running', 'far',
+         'away', 'and', 'then', 'it', 'slept', 'quietly', 'here']
+
+
+@pytest.fixture(scope='module')
+def rougeClass():
+    if shutil.which('perl') is None:
+        pytest.skip('perl is not installed')
+    pyrouge = pytest.importorskip('pyrouge')
+    try:
+        pyrouge.Rouge155()
+    except Exception as e:
+        pytest.skip('ROUGE-1.5.5 is not configured: {0}'.format(e))
+    return pyrouge.Rouge155
+
+
+def randomSummary(rng):
+    return '\n'.join(
+        ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+        for _ in range(rng.randint(1, 4)))
+
+
+def writeSystems(rougeClass, folder, numSystems=2, numDocuments=20):
+    rng = random.Random(0)
+    modelRoot = os.path.join(str(folder), 'models')
+    os.makedirs(modelRoot)
+    models = write_models(rougeClass, modelRoot, [
+        [randomSummary(rng) for _ in range(rng.randint(1, 3))]
+        for _ in range(numDocuments)])
+
+    systems = []
+    for system in range(numSystems):
+        systemRoot = os.path.join(str(folder), 'system{0}'.format(system))
+        os.makedirs(systemRoot)
+        samples = []
+        for document, modelFilenames in enumerate(models):
+            peerPath = os.path.join(
+                systemRoot, '{0}.html'.format(document))
+            write_see_file(rougeClass, peerPath, randomSummary(rng))
+            samples.append((peerPath, modelRoot, modelFilenames))
+        systems.append(samples)
+    return systems
+
+
+@pytest.mark.parametrize('options', [
+    None,
+    '-c 95 -r 1000 -n 2 -a -m',
+    '-c 95 -2 4 -u -n 1 -f B -a',
+])
+def test_native_scores_match_perl(rougeClass, tmp_path, options):
+    systems = writeSystems(rougeClass, tmp_path)
+    differences = validate(rougeClass, systems, options)
+    assert differences
+    for key, difference in differences.items():
+        assert difference < TOLERANCE, key